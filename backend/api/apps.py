@@ -1,6 +1,52 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
+
+
+def alters_indexed_tables(migration) -> bool:
+    from .models.conversation import Conversation
+    from .models.user_message import UserMessage
+    from .models.assistant_message import AssistantMessage
+    from .models.content_variation import ContentVariation
+
+    indexed = {
+        model._meta.model_name for model in (Conversation, UserMessage, AssistantMessage, ContentVariation)
+    }
+    return migration.app_label == "api" and any(
+        (getattr(operation, "model_name", None) or getattr(operation, "name", "")).lower() in indexed
+        for operation in migration.operations
+    )
+
+
+def drop_search_triggers(using, plan, **kwargs):
+    """
+    Drops the search index triggers before migrations that alter an indexed table: on SQLite
+    that remakes the table, which fails while the triggers of the other indexed tables refer
+    to it, and PostgreSQL won't change the type of a column a trigger is declared on.
+    check_search_index puts them back.
+    """
+    from .repositories.search_repository import SearchRepository
+
+    if any(alters_indexed_tables(migration) for migration, _ in plan or []):
+        SearchRepository.drop_triggers(using)
+
+
+def check_search_index(using, verbosity, **kwargs):
+    """
+    Rebuilds the search index if one of its triggers is missing after migrating, so the
+    index doesn't silently stop following edits.
+    """
+    from .repositories.search_repository import SearchRepository
+
+    if missing := SearchRepository.missing_triggers(using):
+        if verbosity:
+            print(f"  Search index triggers missing ({', '.join(missing)}), rebuilding the index")
+        SearchRepository.rebuild(using)
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        pre_migrate.connect(drop_search_triggers, sender=self)
+        post_migrate.connect(check_search_index, sender=self)
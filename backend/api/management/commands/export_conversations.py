@@ -0,0 +1,31 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.conversation_archive import ConversationArchive, EXPORT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Export a user's conversations as NDJSON, to a file or stdout"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--output", "-o", help="File to write, stdout without it")
+        parser.add_argument(
+            "--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched at a time"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['username']}")
+
+        lines = ConversationArchive.export(user.id, chunk_size=options["chunk_size"])
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8") as output:
+            output.writelines(lines)
+        self.stdout.write(self.style.SUCCESS(f"Exported {user.username}'s conversations to {options['output']}"))
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.conversation_archive import ConversationArchive, IMPORT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Import an NDJSON export as new conversations of a user"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("path", help="The export to import")
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Messages written per transaction"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['username']}")
+
+        try:
+            with open(options["path"], encoding="utf-8") as lines:
+                counts = ConversationArchive.import_lines(user, lines, batch_size=options["batch_size"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {counts['conversations']} conversations, {counts['user_messages']} user messages, "
+                f"{counts['assistant_messages']} assistant messages and {counts['content_variations']} content variations"
+            )
+        )
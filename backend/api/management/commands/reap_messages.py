@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.services.message_reaper import MessageReaper
+
+
+class Command(BaseCommand):
+    help = "Hard-delete soft-deleted messages past RECOVERY_HOURS, with orphan content variations and images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.MESSAGE_REAPER_BATCH_SIZE,
+            help="Rows deleted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        counts = MessageReaper.reap(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {counts['user_messages']} user messages, {counts['assistant_messages']} assistant messages, "
+                f"{counts['content_variations']} content variations and {counts['images']} images"
+            )
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.repositories.search_repository import SearchRepository
+
+
+class Command(BaseCommand):
+    help = "Recreate the search index with its triggers and reindex every conversation title and live message"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report missing triggers, and exit with status 1 if there are any",
+        )
+
+    def handle(self, *args, **options):
+        missing = SearchRepository.missing_triggers()
+        if options["check"]:
+            if missing:
+                self.stderr.write(f"Missing search index triggers: {', '.join(missing)}")
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS("All search index triggers are in place"))
+            return
+
+        SearchRepository.rebuild()
+        self.stdout.write(self.style.SUCCESS("Rebuilt the search index"))
@@ -0,0 +1,57 @@
+import uuid
+from django.db import migrations, models
+
+
+class AlterToolId(migrations.AlterField):
+    """
+    0003 as it runs on PostgreSQL, which can't cast integer ids to uuid and needs the
+    identity dropped first. Tool scripts are stored under their ids, so rather than give
+    existing tools new ones, this refuses to run while there are any. Other databases
+    alter the column as 0003 does.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        self.check_empty(schema_editor)
+        schema_editor.execute('ALTER TABLE "api_tool" ALTER COLUMN "id" DROP IDENTITY IF EXISTS')
+        schema_editor.execute('ALTER TABLE "api_tool" ALTER COLUMN "id" TYPE uuid USING gen_random_uuid()')
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        self.check_empty(schema_editor)
+        schema_editor.execute('ALTER TABLE "api_tool" ALTER COLUMN "id" TYPE integer USING 0')
+        schema_editor.execute(
+            'ALTER TABLE "api_tool" ALTER COLUMN "id" ADD GENERATED BY DEFAULT AS IDENTITY'
+        )
+
+    @staticmethod
+    def check_empty(schema_editor):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('SELECT EXISTS (SELECT 1 FROM "api_tool")')
+            if cursor.fetchone()[0]:
+                raise RuntimeError(
+                    "The tool ids can't be converted between integer and uuid on PostgreSQL "
+                    "while there are tools; export and delete them first."
+                )
+
+
+class Migration(migrations.Migration):
+
+    # Runs instead of 0003 on databases that haven't applied it yet.
+    replaces = [
+        ('api', '0003_alter_tool_id'),
+    ]
+
+    dependencies = [
+        ('api', '0002_tool_description_alter_tool_name'),
+    ]
+
+    operations = [
+        AlterToolId(
+            model_name='tool',
+            name='id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
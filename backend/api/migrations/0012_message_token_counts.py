@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:19
+
+import math
+
+from django.db import migrations, models
+
+
+def backfill_token_counts(apps, schema_editor):
+    # Same estimate as api.services.token_counter, inlined so the migration does not
+    # depend on code that may change later.
+    for model_name in ("UserMessage", "ContentVariation"):
+        model = apps.get_model("api", model_name)
+        batch = []
+        for row in model.objects.filter(token_count=None).only("id", "content").iterator(chunk_size=1000):
+            row.token_count = math.ceil(len(row.content or "") / 4)
+            batch.append(row)
+            if len(batch) == 1000:
+                model.objects.bulk_update(batch, ["token_count"])
+                batch = []
+        model.objects.bulk_update(batch, ["token_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_usermessage_use_tools'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentvariation',
+            name='token_count',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='history_token_budget',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usermessage',
+            name='token_count',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_token_counts, migrations.RunPython.noop),
+    ]
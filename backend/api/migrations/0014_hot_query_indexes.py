@@ -0,0 +1,68 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_conversation_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assistantmessage',
+            name='conversation',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='api.conversation'),
+        ),
+        migrations.AlterField(
+            model_name='conversation',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='tool',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tools', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='usermessage',
+            name='conversation',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='api.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='assistantmessage',
+            index=models.Index(fields=['conversation', 'created_at', 'id'], name='assistantmsg_conv_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assistantmessage',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['conversation', 'created_at'], name='assistantmsg_conv_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assistantmessage',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='assistantmsg_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='conversation_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tool',
+            index=models.Index(fields=['user', 'created_at'], name='tool_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermessage',
+            index=models.Index(fields=['conversation', 'created_at', 'id'], name='usermsg_conv_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermessage',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['conversation', 'created_at'], name='usermsg_conv_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermessage',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='usermsg_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:02
+
+from django.db import migrations
+
+INDEX_NAME = "assistantmsg_tools_used_gin"
+
+
+def create_tools_used_index(apps, schema_editor):
+    # Finds the replies that used a tool (tools_used__contains=[...]) on PostgreSQL, where
+    # tools_used is jsonb. SQLite stores JSON as text and has no index for it.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS "{INDEX_NAME}" ON "api_assistantmessage" '
+        f'USING gin ("tools_used" jsonb_path_ops)'
+    )
+
+
+def drop_tools_used_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX_NAME}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_tools_used_index, drop_tools_used_index),
+    ]
@@ -0,0 +1,400 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:40
+
+from django.db import migrations
+
+# The search index (see api.repositories.search_repository) holds one row per conversation
+# title, live user message and content variation of a live assistant message, kept up to
+# date by the triggers below, so rows written with bulk_create or update() are indexed too.
+#
+# On SQLite it is an FTS5 table whose rowid is derived from the source row: id * 4 + 1 for
+# user messages, id * 4 + 2 for content variations and, as conversations have UUID keys,
+# the id of the conversation in "api_search_conversation_key" * 4 + 3. That table numbers
+# conversations the first time they are indexed, so unlike the implicit rowid of
+# "api_conversation", the number survives the table being remade.
+# Its `owner` column holds "u<user id>", so a search is limited to one user's rows inside
+# the full-text query.
+#
+# Altering one of the indexed tables on SQLite remakes the table, which drops its
+# triggers and fails while the triggers of the other tables refer to it; PostgreSQL won't
+# change the type of a column a trigger is declared on. So the triggers are dropped before
+# migrations that alter those tables, and a check after every migrate rebuilds the index
+# if a trigger is missing (see ApiConfig.ready). `manage.py rebuild_search_index` rebuilds
+# it on demand. All of them use the statements below.
+
+SQLITE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE "api_search_index" USING fts5(
+        owner, body, kind UNINDEXED, message_id UNINDEXED, conversation_id UNINDEXED,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TABLE "api_search_conversation_key" (
+        "id" integer PRIMARY KEY,
+        "conversation_id" char(32) NOT NULL UNIQUE
+    )
+    """,
+]
+
+SQLITE_TRIGGERS = [
+    # Conversation titles.
+    """
+    CREATE TRIGGER "api_search_conversation_insert" AFTER INSERT ON "api_conversation" BEGIN
+        INSERT OR IGNORE INTO "api_search_conversation_key" (conversation_id) VALUES (NEW.id);
+        INSERT INTO "api_search_index" (rowid, owner, body, kind, message_id, conversation_id)
+        SELECT k.id * 4 + 3, 'u' || NEW.user_id, NEW.title, 'conversation', NULL, NEW.id
+        FROM "api_search_conversation_key" k WHERE k.conversation_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER "api_search_conversation_update" AFTER UPDATE OF title, user_id ON "api_conversation" BEGIN
+        DELETE FROM "api_search_index" WHERE rowid = (
+            SELECT id * 4 + 3 FROM "api_search_conversation_key" WHERE conversation_id = OLD.id
+        );
+        INSERT INTO "api_search_index" (rowid, owner, body, kind, message_id, conversation_id)
+        SELECT k.id * 4 + 3, 'u' || NEW.user_id, NEW.title, 'conversation', NULL, NEW.id
+        FROM "api_search_conversation_key" k WHERE k.conversation_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER "api_search_conversation_delete" AFTER DELETE ON "api_conversation" BEGIN
+        DELETE FROM "api_search_index" WHERE rowid = (
+            SELECT id * 4 + 3 FROM "api_search_conversation_key" WHERE conversation_id = OLD.id
+        );
+        DELETE FROM "api_search_conversation_key" WHERE conversation_id = OLD.id;
+    END
+    """,
+    # User messages, while they aren't deleted.
+    """
+    CREATE TRIGGER "api_search_usermessage_insert" AFTER INSERT ON "api_usermessage"
+    WHEN NOT NEW.is_deleted BEGIN
+        INSERT INTO "api_search_index" (rowid, owner, body, kind, message_id, conversation_id)
+        SELECT NEW.id * 4 + 1, 'u' || c.user_id, NEW.content, 'user_message', NEW.id, NEW.conversation_id
+        FROM "api_conversation" c WHERE c.id = NEW.conversation_id;
+    END
+    """,
+    """
+    CREATE TRIGGER "api_search_usermessage_update" AFTER UPDATE OF content, is_deleted ON "api_usermessage" BEGIN
+        DELETE FROM "api_search_index" WHERE rowid = OLD.id * 4 + 1;
+        INSERT INTO "api_search_index" (rowid, owner, body, kind, message_id, conversation_id)
+        SELECT NEW.id * 4 + 1, 'u' || c.user_id, NEW.content, 'user_message', NEW.id, NEW.conversation_id
+        FROM "api_conversation" c WHERE c.id = NEW.conversation_id AND NOT NEW.is_deleted;
+    END
+    """,
+    """
+    CREATE TRIGGER "api_search_usermessage_delete" AFTER DELETE ON "api_usermessage" BEGIN
+        DELETE FROM "api_search_index" WHERE rowid = OLD.id * 4 + 1;
+    END
+    """,
+    # Content variations, indexed once they are added to an assistant message that isn't deleted.
+    """
+    CREATE TRIGGER "api_search_variation_link_insert" AFTER INSERT ON "api_assistantmessage_content_variations" BEGIN
+        DELETE FROM "api_search_index" WHERE rowid = NEW.contentvariation_id * 4 + 2;
+        INSERT INTO "api_search_index" (rowid, owner, body, kind, message_id, conversation_id)
+        SELECT v.id * 4 + 2, 'u' || c.user_id, v.content, 'assistant_message', a.id, a.conversation_id
+        FROM "api_contentvariation" v, "api_assistantmessage" a, "api_conversation" c
+        WHERE v.id = NEW.contentvariation_id AND a.id = NEW.assistantmessage_id
+            AND c.id = a.conversation_id AND NOT a.is_deleted;
+    END
+    """,
+    """
+    CREATE TRIGGER "api_search_variation_link_delete" AFTER DELETE ON "api_assistantmessage_content_variations" BEGIN
+        DELETE FROM "api_search_index" WHERE rowid = OLD.contentvariation_id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER "api_search_variation_update" AFTER UPDATE OF content ON "api_contentvariation" BEGIN
+        DELETE FROM "api_search_index" WHERE rowid = OLD.id * 4 + 2;
+        INSERT INTO "api_search_index" (rowid, owner, body, kind, message_id, conversation_id)
+        SELECT NEW.id * 4 + 2, 'u' || c.user_id, NEW.content, 'assistant_message', a.id, a.conversation_id
+        FROM "api_assistantmessage_content_variations" l, "api_assistantmessage" a, "api_conversation" c
+        WHERE l.contentvariation_id = NEW.id AND a.id = l.assistantmessage_id
+            AND c.id = a.conversation_id AND NOT a.is_deleted;
+    END
+    """,
+    """
+    CREATE TRIGGER "api_search_variation_delete" AFTER DELETE ON "api_contentvariation" BEGIN
+        DELETE FROM "api_search_index" WHERE rowid = OLD.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER "api_search_assistantmessage_update" AFTER UPDATE OF is_deleted ON "api_assistantmessage" BEGIN
+        DELETE FROM "api_search_index" WHERE rowid IN (
+            SELECT contentvariation_id * 4 + 2 FROM "api_assistantmessage_content_variations"
+            WHERE assistantmessage_id = NEW.id
+        );
+        INSERT INTO "api_search_index" (rowid, owner, body, kind, message_id, conversation_id)
+        SELECT v.id * 4 + 2, 'u' || c.user_id, v.content, 'assistant_message', NEW.id, NEW.conversation_id
+        FROM "api_assistantmessage_content_variations" l, "api_contentvariation" v, "api_conversation" c
+        WHERE l.assistantmessage_id = NEW.id AND v.id = l.contentvariation_id
+            AND c.id = NEW.conversation_id AND NOT NEW.is_deleted;
+    END
+    """,
+]
+
+# What is already there.
+SQLITE_POPULATE = [
+    """
+    INSERT INTO "api_search_conversation_key" (conversation_id)
+    SELECT id FROM "api_conversation" ORDER BY created_at, id
+    """,
+    """
+    INSERT INTO "api_search_index" (rowid, owner, body, kind, message_id, conversation_id)
+    SELECT k.id * 4 + 3, 'u' || c.user_id, c.title, 'conversation', NULL, c.id
+    FROM "api_conversation" c, "api_search_conversation_key" k
+    WHERE k.conversation_id = c.id
+    """,
+    """
+    INSERT INTO "api_search_index" (rowid, owner, body, kind, message_id, conversation_id)
+    SELECT m.id * 4 + 1, 'u' || c.user_id, m.content, 'user_message', m.id, m.conversation_id
+    FROM "api_usermessage" m, "api_conversation" c
+    WHERE c.id = m.conversation_id AND NOT m.is_deleted
+    """,
+    """
+    INSERT OR REPLACE INTO "api_search_index" (rowid, owner, body, kind, message_id, conversation_id)
+    SELECT v.id * 4 + 2, 'u' || c.user_id, v.content, 'assistant_message', a.id, a.conversation_id
+    FROM "api_assistantmessage_content_variations" l, "api_contentvariation" v,
+        "api_assistantmessage" a, "api_conversation" c
+    WHERE v.id = l.contentvariation_id AND a.id = l.assistantmessage_id
+        AND c.id = a.conversation_id AND NOT a.is_deleted
+    """,
+]
+
+SQLITE_TRIGGER_NAMES = [
+    f"api_search_{name}"
+    for name in (
+        "conversation_insert",
+        "conversation_update",
+        "conversation_delete",
+        "usermessage_insert",
+        "usermessage_update",
+        "usermessage_delete",
+        "variation_link_insert",
+        "variation_link_delete",
+        "variation_update",
+        "variation_delete",
+        "assistantmessage_update",
+    )
+]
+
+SQLITE_DROP_TRIGGERS = [f'DROP TRIGGER IF EXISTS "{name}"' for name in SQLITE_TRIGGER_NAMES]
+
+SQLITE_BACKWARDS = [
+    *SQLITE_DROP_TRIGGERS,
+    'DROP TABLE IF EXISTS "api_search_index"',
+    'DROP TABLE IF EXISTS "api_search_conversation_key"',
+]
+
+# On PostgreSQL it is a table keyed by "c:<conversation id>", "u:<user message id>" or
+# "v:<content variation id>", with a generated tsvector and a GIN index on it.
+
+POSTGRESQL_INDEX = [
+    """
+    CREATE TABLE "api_search_index" (
+        "key" text PRIMARY KEY,
+        "kind" text NOT NULL,
+        "message_id" integer,
+        "conversation_id" uuid NOT NULL,
+        "user_id" integer NOT NULL,
+        "body" text NOT NULL,
+        "document" tsvector GENERATED ALWAYS AS (to_tsvector('english', "body")) STORED
+    )
+    """,
+    # Without fastupdate every insert goes straight into the index, rather than into a
+    # pending list that each search reads through until autovacuum merges it.
+    'CREATE INDEX "api_search_index_document" ON "api_search_index" USING gin ("document") '
+    "WITH (fastupdate = off)",
+    'CREATE INDEX "api_search_index_user" ON "api_search_index" ("user_id")',
+]
+
+POSTGRESQL_TRIGGERS = [
+    """
+    CREATE FUNCTION "api_search_conversation"() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            DELETE FROM "api_search_index" WHERE "key" = 'c:' || OLD.id;
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            INSERT INTO "api_search_index" ("key", "kind", "message_id", "conversation_id", "user_id", "body")
+            VALUES ('c:' || NEW.id, 'conversation', NULL, NEW.id, NEW.user_id, NEW.title);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER "api_search_conversation"
+    AFTER INSERT OR DELETE OR UPDATE OF title, user_id ON "api_conversation"
+    FOR EACH ROW EXECUTE FUNCTION "api_search_conversation"()
+    """,
+    """
+    CREATE FUNCTION "api_search_usermessage"() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            DELETE FROM "api_search_index" WHERE "key" = 'u:' || OLD.id;
+        END IF;
+        IF TG_OP <> 'DELETE' AND NOT NEW.is_deleted THEN
+            INSERT INTO "api_search_index" ("key", "kind", "message_id", "conversation_id", "user_id", "body")
+            SELECT 'u:' || NEW.id, 'user_message', NEW.id, NEW.conversation_id, c.user_id, NEW.content
+            FROM "api_conversation" c WHERE c.id = NEW.conversation_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER "api_search_usermessage"
+    AFTER INSERT OR DELETE OR UPDATE OF content, is_deleted ON "api_usermessage"
+    FOR EACH ROW EXECUTE FUNCTION "api_search_usermessage"()
+    """,
+    """
+    CREATE FUNCTION "api_search_variation_link"() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM "api_search_index" WHERE "key" = 'v:' || OLD.contentvariation_id;
+            RETURN NULL;
+        END IF;
+        INSERT INTO "api_search_index" ("key", "kind", "message_id", "conversation_id", "user_id", "body")
+        SELECT 'v:' || v.id, 'assistant_message', a.id, a.conversation_id, c.user_id, v.content
+        FROM "api_contentvariation" v, "api_assistantmessage" a, "api_conversation" c
+        WHERE v.id = NEW.contentvariation_id AND a.id = NEW.assistantmessage_id
+            AND c.id = a.conversation_id AND NOT a.is_deleted
+        ON CONFLICT ("key") DO UPDATE SET
+            "message_id" = EXCLUDED."message_id",
+            "conversation_id" = EXCLUDED."conversation_id",
+            "user_id" = EXCLUDED."user_id",
+            "body" = EXCLUDED."body";
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER "api_search_variation_link"
+    AFTER INSERT OR DELETE ON "api_assistantmessage_content_variations"
+    FOR EACH ROW EXECUTE FUNCTION "api_search_variation_link"()
+    """,
+    """
+    CREATE FUNCTION "api_search_variation"() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM "api_search_index" WHERE "key" = 'v:' || OLD.id;
+        IF TG_OP <> 'DELETE' THEN
+            INSERT INTO "api_search_index" ("key", "kind", "message_id", "conversation_id", "user_id", "body")
+            SELECT 'v:' || NEW.id, 'assistant_message', a.id, a.conversation_id, c.user_id, NEW.content
+            FROM "api_assistantmessage_content_variations" l, "api_assistantmessage" a, "api_conversation" c
+            WHERE l.contentvariation_id = NEW.id AND a.id = l.assistantmessage_id
+                AND c.id = a.conversation_id AND NOT a.is_deleted
+            LIMIT 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER "api_search_variation"
+    AFTER DELETE OR UPDATE OF content ON "api_contentvariation"
+    FOR EACH ROW EXECUTE FUNCTION "api_search_variation"()
+    """,
+    """
+    CREATE FUNCTION "api_search_assistantmessage"() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM "api_search_index" WHERE "key" IN (
+            SELECT 'v:' || contentvariation_id FROM "api_assistantmessage_content_variations"
+            WHERE assistantmessage_id = NEW.id
+        );
+        IF NOT NEW.is_deleted THEN
+            INSERT INTO "api_search_index" ("key", "kind", "message_id", "conversation_id", "user_id", "body")
+            SELECT 'v:' || v.id, 'assistant_message', NEW.id, NEW.conversation_id, c.user_id, v.content
+            FROM "api_assistantmessage_content_variations" l, "api_contentvariation" v, "api_conversation" c
+            WHERE l.assistantmessage_id = NEW.id AND v.id = l.contentvariation_id
+                AND c.id = NEW.conversation_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER "api_search_assistantmessage"
+    AFTER UPDATE OF is_deleted ON "api_assistantmessage"
+    FOR EACH ROW EXECUTE FUNCTION "api_search_assistantmessage"()
+    """,
+]
+
+# What is already there.
+POSTGRESQL_POPULATE = [
+    """
+    INSERT INTO "api_search_index" ("key", "kind", "message_id", "conversation_id", "user_id", "body")
+    SELECT 'c:' || id, 'conversation', NULL, id, user_id, title FROM "api_conversation"
+    """,
+    """
+    INSERT INTO "api_search_index" ("key", "kind", "message_id", "conversation_id", "user_id", "body")
+    SELECT 'u:' || m.id, 'user_message', m.id, m.conversation_id, c.user_id, m.content
+    FROM "api_usermessage" m, "api_conversation" c
+    WHERE c.id = m.conversation_id AND NOT m.is_deleted
+    """,
+    """
+    INSERT INTO "api_search_index" ("key", "kind", "message_id", "conversation_id", "user_id", "body")
+    SELECT 'v:' || v.id, 'assistant_message', a.id, a.conversation_id, c.user_id, v.content
+    FROM "api_assistantmessage_content_variations" l, "api_contentvariation" v,
+        "api_assistantmessage" a, "api_conversation" c
+    WHERE v.id = l.contentvariation_id AND a.id = l.assistantmessage_id
+        AND c.id = a.conversation_id AND NOT a.is_deleted
+    ON CONFLICT ("key") DO NOTHING
+    """,
+]
+
+# Each trigger with the table it is on.
+POSTGRESQL_TRIGGER_TABLES = {
+    "api_search_conversation": "api_conversation",
+    "api_search_usermessage": "api_usermessage",
+    "api_search_variation_link": "api_assistantmessage_content_variations",
+    "api_search_variation": "api_contentvariation",
+    "api_search_assistantmessage": "api_assistantmessage",
+}
+
+POSTGRESQL_DROP_TRIGGERS = [
+    f'DROP TRIGGER IF EXISTS "{name}" ON "{table}"' for name, table in POSTGRESQL_TRIGGER_TABLES.items()
+]
+
+POSTGRESQL_BACKWARDS = [
+    *POSTGRESQL_DROP_TRIGGERS,
+    *(f'DROP FUNCTION IF EXISTS "{name}"()' for name in POSTGRESQL_TRIGGER_TABLES),
+    'DROP TABLE IF EXISTS "api_search_index"',
+]
+
+STATEMENTS = {
+    "sqlite": (SQLITE_INDEX + SQLITE_TRIGGERS + SQLITE_POPULATE, SQLITE_BACKWARDS),
+    "postgresql": (POSTGRESQL_INDEX + POSTGRESQL_TRIGGERS + POSTGRESQL_POPULATE, POSTGRESQL_BACKWARDS),
+}
+
+TRIGGER_NAMES = {
+    "sqlite": SQLITE_TRIGGER_NAMES,
+    "postgresql": list(POSTGRESQL_TRIGGER_TABLES),
+}
+
+DROP_TRIGGERS = {
+    "sqlite": SQLITE_DROP_TRIGGERS,
+    "postgresql": POSTGRESQL_DROP_TRIGGERS,
+}
+
+
+def create_search_index(apps, schema_editor):
+    forwards, _ = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in forwards:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    _, backwards = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in backwards:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_assistantmessage_tools_used_gin'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
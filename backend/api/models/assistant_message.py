@@ -11,7 +11,7 @@ from .user_message import UserMessage
 
 class AssistantMessage(models.Model):
     id = models.AutoField(primary_key=True)
-    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, db_index=False)
     content_variations = models.ManyToManyField(ContentVariation)
     generated_by = models.ForeignKey(UserMessage, on_delete=models.DO_NOTHING)
     model = models.ForeignKey(Model, on_delete=models.SET_NULL, null=True)
@@ -22,6 +22,27 @@ class AssistantMessage(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True)
     tools_used = models.JSONField(null=True, default=None)
 
+    class Meta:
+        indexes = [
+            # Loading a conversation and paging through it on (created_at, id). This also serves
+            # lookups by conversation alone, so the foreign key has no index of its own.
+            models.Index(
+                fields=["conversation", "created_at", "id"], name="assistantmsg_conv_created_idx"
+            ),
+            # The prompt history, which skips deleted messages.
+            models.Index(
+                fields=["conversation", "created_at"],
+                condition=models.Q(is_deleted=False),
+                name="assistantmsg_conv_live_idx",
+            ),
+            # Soft-deleted messages by age, a small index as few messages are deleted.
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(is_deleted=True),
+                name="assistantmsg_deleted_idx",
+            ),
+        ]
+
     def soft_delete(self):
         self.is_deleted = True
         self.deleted_at = timezone.now()
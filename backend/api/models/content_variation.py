@@ -1,10 +1,20 @@
 from django.db import models
 
+from ..services.token_counter import estimate_tokens
+
 
 class ContentVariation(models.Model):
     # Model to store different content versions
     id = models.AutoField(primary_key=True)
     content = models.TextField()
+    # Estimated once on save, used to fit the prompt history into a token budget.
+    token_count = models.PositiveIntegerField(null=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        self.token_count = estimate_tokens(self.content)
+        if kwargs.get("update_fields") is not None and "content" in kwargs["update_fields"]:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "token_count"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Content Variation {self.id}"
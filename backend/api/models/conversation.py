@@ -7,11 +7,22 @@ class Conversation(models.Model):
     id = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4)
     title = models.CharField(max_length=255)
     user = models.ForeignKey(
-        User, related_name="conversations", on_delete=models.CASCADE
+        User, related_name="conversations", on_delete=models.CASCADE, db_index=False
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     liked = models.BooleanField(default=False)
+    # Rolling summary of the turns up to `summarized_until`, sent in place of those turns
+    # when the user has `compact_history` on (see ConversationSummarizer).
+    summary = models.TextField(blank=True, default="")
+    summarized_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # A user's conversations, newest first. This also serves lookups by user alone, so
+            # the foreign key has no index of its own.
+            models.Index(fields=["user", "created_at", "id"], name="conversation_user_created_idx"),
+        ]
 
     def __str__(self):
         return f"Conversation {self.id} - {self.title}"
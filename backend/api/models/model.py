@@ -7,6 +7,8 @@ class Model(models.Model):
     model = models.CharField(max_length=255, unique=False)
     liked = models.BooleanField(default=False)
     provider = models.CharField(max_length=255, unique=False)
+    # Tokens of conversation history sent with each prompt; HISTORY_TOKEN_BUDGET when empty.
+    history_token_budget = models.PositiveIntegerField(null=True, blank=True)
     color = models.CharField(
         max_length=25,
         choices=[
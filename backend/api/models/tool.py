@@ -5,12 +5,19 @@ from django.contrib.auth.models import User
 
 class Tool(models.Model):
     id = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4)
-    user = models.ForeignKey(User, related_name="tools", on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name="tools", on_delete=models.CASCADE, db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     name = models.CharField(max_length=255, blank=True)
     description = models.TextField(blank=True, default="")
     script = models.TextField(blank=True, default="")
 
+    class Meta:
+        indexes = [
+            # A user's tools in creation order. This also serves lookups by user alone, so the
+            # foreign key has no index of its own.
+            models.Index(fields=["user", "created_at"], name="tool_user_created_idx"),
+        ]
+
     def __str__(self):
         return self.name
@@ -4,10 +4,11 @@ from django.db import models
 from django.conf import settings
 
 from .conversation import Conversation
+from ..services.token_counter import estimate_tokens
 
 class UserMessage(models.Model):
     id = models.AutoField(primary_key=True)
-    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, db_index=False)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     image = models.ImageField(
@@ -16,6 +17,35 @@ class UserMessage(models.Model):
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
     use_tools = models.BooleanField(default=False)
+    # Estimated once on save, used to fit the prompt history into a token budget.
+    token_count = models.PositiveIntegerField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Loading a conversation and paging through it on (created_at, id). This also serves
+            # lookups by conversation alone, so the foreign key has no index of its own.
+            models.Index(
+                fields=["conversation", "created_at", "id"], name="usermsg_conv_created_idx"
+            ),
+            # The prompt history, which skips deleted messages.
+            models.Index(
+                fields=["conversation", "created_at"],
+                condition=models.Q(is_deleted=False),
+                name="usermsg_conv_live_idx",
+            ),
+            # Soft-deleted messages by age, a small index as few messages are deleted.
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(is_deleted=True),
+                name="usermsg_deleted_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.token_count = estimate_tokens(self.content)
+        if kwargs.get("update_fields") is not None and "content" in kwargs["update_fields"]:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "token_count"}
+        super().save(*args, **kwargs)
 
     def soft_delete(self):
         self.is_deleted = True
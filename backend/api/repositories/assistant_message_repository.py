@@ -0,0 +1,101 @@
+from typing import Dict, List
+
+from django.db import transaction
+
+from ..models.assistant_message import AssistantMessage
+from ..models.content_variation import ContentVariation
+from ..services.token_counter import estimate_tokens
+
+
+class AssistantMessageRepository:
+    """
+    Write helpers for assistant messages and their content variations.
+    """
+
+    @staticmethod
+    def create(
+        conversation_id,
+        generated_by_id: int,
+        model_id: int | None,
+        provider: str,
+        contents: List[str],
+        tools_used=None,
+        liked: bool = False,
+    ) -> AssistantMessage:
+        """
+        Creates an assistant message and its content variations in a single transaction.
+
+        The variations are inserted with one bulk insert and linked with one insert into
+        the many-to-many through table, instead of two queries per variation.
+
+        Returns:
+            AssistantMessage: The new message; `created_variations` holds the new ContentVariation rows.
+        """
+        return AssistantMessageRepository.create_many(
+            [
+                {
+                    "conversation_id": conversation_id,
+                    "generated_by_id": generated_by_id,
+                    "model_id": model_id,
+                    "provider": provider,
+                    "contents": contents,
+                    "tools_used": tools_used,
+                    "liked": liked,
+                }
+            ]
+        )[0]
+
+    @staticmethod
+    def create_many(messages: List[Dict]) -> List[AssistantMessage]:
+        """
+        Creates many assistant messages and their content variations in a single transaction,
+        with three inserts however many there are: the messages, the variations, and the
+        links between them.
+
+        Args:
+            messages (List[Dict]): The arguments of create() for each message; 'conversation_id',
+                'generated_by_id', 'model_id', 'provider' and 'contents', optionally
+                'tools_used' and 'liked'.
+
+        Returns:
+            List[AssistantMessage]: The new messages, in the same order; `created_variations`
+                holds the new ContentVariation rows of each.
+        """
+        with transaction.atomic():
+            assistant_messages = AssistantMessage.objects.bulk_create(
+                [
+                    AssistantMessage(
+                        conversation_id=message["conversation_id"],
+                        generated_by_id=message["generated_by_id"],
+                        model_id=message["model_id"],
+                        provider=message["provider"],
+                        liked=message.get("liked", False),
+                        tools_used=message.get("tools_used"),
+                    )
+                    for message in messages
+                ]
+            )
+
+            content_variations = ContentVariation.objects.bulk_create(
+                # bulk_create skips save(), so the token counts are set here.
+                [
+                    ContentVariation(content=content, token_count=estimate_tokens(content))
+                    for message in messages
+                    for content in message["contents"]
+                ]
+            )
+
+            through = AssistantMessage.content_variations.through
+            links, variations = [], iter(content_variations)
+            for assistant_message, message in zip(assistant_messages, messages):
+                assistant_message.created_variations = [next(variations) for _ in message["contents"]]
+                links.extend(
+                    through(
+                        assistantmessage_id=assistant_message.id,
+                        contentvariation_id=content_variation.id,
+                    )
+                    for content_variation in assistant_message.created_variations
+                )
+            through.objects.bulk_create(links)
+
+        return assistant_messages
@@ -0,0 +1,351 @@
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.db import models
+from django.db.models import Case, Count, OuterRef, Prefetch, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Substr
+from django.utils import timezone
+
+from ..models.conversation import Conversation
+from ..models.user_message import UserMessage
+from ..models.content_variation import ContentVariation
+from ..models.assistant_message import AssistantMessage
+from ..services.token_counter import estimate_tokens
+
+
+PREVIEW_LENGTH = 120
+
+
+class ConversationRepository:
+    """
+    Data access helpers for reading conversations without going through the serializers.
+    """
+
+    @staticmethod
+    def get_conversations(
+        user_id, limit: int = None, before: Optional[Tuple] = None, with_preview: bool = False
+    ) -> Tuple[List[Conversation], Optional[Tuple]]:
+        """
+        Loads a user's conversations for the sidebar, newest first, in a single query.
+
+        Each conversation is annotated with its sidebar `grouping` ("Today", "This Week",
+        "This Month" or "Old", by UTC date of creation). With `with_preview`, also with
+        `message_count` and `preview`, the start of its newest message, not counting deleted
+        messages.
+
+        Args:
+            user_id: The id of the user to load conversations for.
+            limit (int, optional): The number of conversations in a page; all of them without it.
+            before (Tuple, optional): The (created_at, id) of the last conversation of the previous page.
+            with_preview (bool, optional): Whether to annotate message counts and previews.
+
+        Returns:
+            Tuple[List[Conversation], Optional[Tuple]]: The conversations, and the key to load the
+                next page with, or None if there is none.
+        """
+        today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        conversations = (
+            Conversation.objects.filter(user_id=user_id)
+            .defer("summary", "summarized_until")
+            .annotate(
+                grouping=Case(
+                    When(created_at__gte=today, then=Value("Today")),
+                    When(created_at__gte=today - timedelta(days=7), then=Value("This Week")),
+                    When(created_at__gte=today.replace(day=1), then=Value("This Month")),
+                    default=Value("Old"),
+                    output_field=models.CharField(),
+                )
+            )
+            .order_by("-created_at", "-id")
+        )
+
+        if before is not None:
+            created_at, conversation_id = before
+            conversations = conversations.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=conversation_id)
+            )
+
+        if with_preview:
+            conversations = ConversationRepository._with_preview(conversations)
+
+        if limit is None:
+            rows, next_key = list(conversations), None
+        else:
+            rows = list(conversations[: limit + 1])
+            next_key = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_key = (rows[-1].created_at, rows[-1].id)
+
+        if with_preview:
+            for conversation in rows:
+                # The newer of the last user and the last assistant message.
+                if conversation.last_assistant_at and (
+                    not conversation.last_user_at
+                    or conversation.last_assistant_at >= conversation.last_user_at
+                ):
+                    conversation.preview = conversation.last_assistant_preview
+                else:
+                    conversation.preview = conversation.last_user_preview
+
+        return rows, next_key
+
+    @staticmethod
+    def get_message_history(
+        conversation_id, count: int, token_budget: int = None, since=None, block: int = 1, keep: int = 0
+    ) -> List[Dict]:
+        """
+        Loads the prompt history window for a conversation.
+
+        The newest message of the conversation is the user message currently being answered,
+        so it is excluded; the window is at most the `count - 2` messages before it, which matches
+        the `[-count + 1 : -1]` slice the chat views used to take over the serialized conversation.
+        With a `token_budget`, the window is cut to the newest messages whose stored token
+        counts fit in the budget, and with `since` to the messages created after that time.
+
+        With a `block` above 1, old messages are dropped `block` at a time, counted from the
+        first message after `since`, so the window keeps the same first message for several
+        turns and the prompt prefix stays the same for the providers' prompt caches. The
+        window is then between `count - 1 - block` and `count - 2` messages long.
+
+        With `keep`, the window instead starts at the first message after `since` as long as
+        fewer than `keep` messages would be left out before it, e.g. turns not yet summarized.
+
+        Args:
+            conversation_id: The id of the conversation to load history for.
+            count (int): The user's `message_history_count` setting.
+            token_budget (int, optional): The most history tokens to return, see ModelRepository.get_history_token_budget.
+            since (datetime, optional): Only return messages created after this, e.g. `Conversation.summarized_until`.
+            block (int, optional): The number of messages dropped from the start of the window at a time.
+            keep (int, optional): The fewest messages left out of the window before it moves on from `since`.
+
+        Returns:
+            List[Dict]: Oldest first, each with 'role', 'content' (latest content variation for
+                assistant messages), 'image' (the stored image path or None) and 'created_at'.
+        """
+        limit = count - 1
+        if limit <= 1:
+            return []
+
+        user_messages = ConversationRepository._user_messages(conversation_id, since)
+        assistant_messages = ConversationRepository._assistant_messages(conversation_id, since)
+
+        if block > 1 or keep:
+            # Messages before the current one, and the first of them in the window: the
+            # window starts on a multiple of `block` and moves on only a block at a time.
+            count = ConversationRepository._count
+            total = (
+                Conversation.objects.filter(id=conversation_id)
+                .values_list(count(user_messages) + count(assistant_messages), flat=True)
+                .first()
+                or 0
+            ) - 1
+            start = max(-(-(total - (limit - 1)) // block) * block, 0)
+            if start < keep:
+                start = 0
+                limit = total + 1
+            limit = min(limit, total - start + 1)
+            if limit <= 1:
+                return []
+
+        # Each side is an ordered, limited query on its own table; merging the two short
+        # lists here is cheaper than a UNION, which SQLite won't limit per branch.
+        rows = sorted(
+            [
+                *user_messages.order_by("-created_at")[:limit],
+                *assistant_messages.order_by("-created_at")[:limit],
+            ],
+            key=lambda row: row["created_at"],
+            reverse=True,
+        )[1:limit]
+
+        if token_budget is not None:
+            # Newest first, stop at the first message that no longer fits.
+            used = 0
+            for index, row in enumerate(rows):
+                tokens = row["token_count"]
+                if tokens is None:
+                    tokens = estimate_tokens(row["content"])
+                used += tokens
+                if used > token_budget:
+                    # Drop whole blocks from the old end, as for the count above.
+                    dropped = -(-(len(rows) - index) // block) * block
+                    rows = rows[: max(len(rows) - dropped, 0)]
+                    break
+
+        return [ConversationRepository._history_entry(row) for row in reversed(rows)]
+
+    @staticmethod
+    def get_messages_between(conversation_id, after, before, limit: int) -> List[Dict]:
+        """
+        Loads up to `limit` messages created after `after` (if given) and before `before`,
+        oldest first, in the same shape as get_message_history.
+        """
+        user_messages = ConversationRepository._user_messages(conversation_id, after)
+        assistant_messages = ConversationRepository._assistant_messages(conversation_id, after)
+
+        rows = sorted(
+            [
+                *user_messages.filter(created_at__lt=before).order_by("created_at")[:limit],
+                *assistant_messages.filter(created_at__lt=before).order_by("created_at")[:limit],
+            ],
+            key=lambda row: row["created_at"],
+        )[:limit]
+
+        return [ConversationRepository._history_entry(row) for row in rows]
+
+    @staticmethod
+    def get_assistant_messages(conversation_id):
+        """
+        The conversation's assistant messages, deleted ones included, with everything the
+        serializers read from them loaded in two queries.
+        """
+        return (
+            AssistantMessage.objects.filter(conversation_id=conversation_id)
+            .select_related("model", "generated_by")
+            .prefetch_related(
+                Prefetch("content_variations", queryset=ContentVariation.objects.order_by("id"))
+            )
+        )
+
+    @staticmethod
+    def get_message_page(
+        conversation_id, limit: int, before: Optional[Tuple] = None
+    ) -> Tuple[List, Optional[Tuple]]:
+        """
+        Loads a page of a conversation's messages, deleted ones included, for display.
+
+        Messages of both tables are ordered on (created_at, id), with a user message before an
+        assistant message that has the same key. Each table is read with a keyset condition and
+        a limit, so a page costs the same however long the conversation is.
+
+        Args:
+            conversation_id: The id of the conversation to load messages for.
+            limit (int): The number of messages in a page.
+            before (Tuple, optional): The key of the oldest message of the previous page, as returned
+                by this method as (created_at, id, type); without it the newest page is loaded.
+
+        Returns:
+            Tuple[List, Optional[Tuple]]: The UserMessage and AssistantMessage instances of the page,
+                oldest first, and the key to load the next older page with, or None if there is none.
+        """
+        user_messages = UserMessage.objects.filter(conversation_id=conversation_id)
+        assistant_messages = ConversationRepository.get_assistant_messages(conversation_id)
+
+        if before is not None:
+            created_at, message_id, message_type = before
+            older = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id)
+            # User messages sort before assistant messages with the same key.
+            if message_type == "assistant":
+                user_messages = user_messages.filter(older | Q(created_at=created_at, id=message_id))
+            else:
+                user_messages = user_messages.filter(older)
+            assistant_messages = assistant_messages.filter(older)
+
+        rows = sorted(
+            [
+                *user_messages.order_by("-created_at", "-id")[: limit + 1],
+                *assistant_messages.order_by("-created_at", "-id")[: limit + 1],
+            ],
+            key=lambda message: (message.created_at, message.id, isinstance(message, AssistantMessage)),
+            reverse=True,
+        )
+
+        page = rows[:limit]
+        next_key = None
+        if len(rows) > limit:
+            oldest = page[-1]
+            next_key = (
+                oldest.created_at,
+                oldest.id,
+                "assistant" if isinstance(oldest, AssistantMessage) else "user",
+            )
+
+        return page[::-1], next_key
+
+    @staticmethod
+    def _with_preview(conversations):
+        live_user_messages = UserMessage.objects.filter(
+            conversation=OuterRef("pk"), is_deleted=False
+        ).order_by()
+        live_assistant_messages = AssistantMessage.objects.filter(
+            conversation=OuterRef("pk"), is_deleted=False
+        ).order_by()
+
+        last_user_message = live_user_messages.order_by("-created_at", "-id")[:1]
+        last_assistant_message = live_assistant_messages.order_by("-created_at", "-id")[:1]
+        last_assistant_variation = (
+            ContentVariation.objects.filter(
+                assistantmessage=Subquery(
+                    AssistantMessage.objects.filter(
+                        conversation=OuterRef(OuterRef("pk")), is_deleted=False
+                    )
+                    .order_by("-created_at", "-id")
+                    .values("id")[:1]
+                )
+            )
+            .order_by("-id")
+            .annotate(preview=Substr("content", 1, PREVIEW_LENGTH))
+        )
+
+        count = ConversationRepository._count
+
+        return conversations.annotate(
+            message_count=count(live_user_messages) + count(live_assistant_messages),
+            last_user_at=Subquery(last_user_message.values("created_at")),
+            last_user_preview=Subquery(
+                last_user_message.annotate(preview=Substr("content", 1, PREVIEW_LENGTH)).values("preview")
+            ),
+            last_assistant_at=Subquery(last_assistant_message.values("created_at")),
+            last_assistant_preview=Subquery(last_assistant_variation.values("preview")[:1]),
+        )
+
+    @staticmethod
+    def _count(messages):
+        # The number of `messages`, as a subquery, so counts over several tables take one query.
+        return Coalesce(
+            Subquery(
+                messages.order_by().values("conversation").annotate(count=Count("pk")).values("count")
+            ),
+            0,
+        )
+
+    @staticmethod
+    def _user_messages(conversation_id, since=None):
+        user_messages = UserMessage.objects.filter(
+            conversation_id=conversation_id, is_deleted=False
+        )
+        if since is not None:
+            user_messages = user_messages.filter(created_at__gt=since)
+
+        return user_messages.annotate(role=Value("user")).values(
+            "role", "content", "image", "token_count", "created_at"
+        )
+
+    @staticmethod
+    def _assistant_messages(conversation_id, since=None):
+        latest_variation = ContentVariation.objects.filter(
+            assistantmessage=OuterRef("pk")
+        ).order_by("-id")
+
+        assistant_messages = AssistantMessage.objects.filter(
+            conversation_id=conversation_id, is_deleted=False
+        )
+        if since is not None:
+            assistant_messages = assistant_messages.filter(created_at__gt=since)
+
+        return assistant_messages.annotate(
+            role=Value("assistant"),
+            content=Subquery(latest_variation.values("content")[:1]),
+            token_count=Subquery(latest_variation.values("token_count")[:1]),
+            image=Value(None, output_field=models.CharField()),
+        ).values("role", "content", "image", "token_count", "created_at")
+
+    @staticmethod
+    def _history_entry(row) -> Dict:
+        return {
+            "role": row["role"],
+            "content": row["content"] or "",
+            "image": row["image"] or None,
+            "created_at": row["created_at"],
+        }
@@ -0,0 +1,23 @@
+from django.conf import settings
+
+from ..models.model import Model
+
+
+class ModelRepository:
+    """
+    Read helpers for models.
+    """
+
+    @staticmethod
+    def get_history_token_budget(model: str, provider: str) -> int:
+        """
+        Returns how many tokens of conversation history to send with a prompt to the given
+        model: its `history_token_budget`, or HISTORY_TOKEN_BUDGET if it has none.
+        """
+        budget = (
+            Model.objects.filter(model=model, provider=provider)
+            .exclude(history_token_budget=None)
+            .values_list("history_token_budget", flat=True)
+            .first()
+        )
+        return budget if budget is not None else settings.HISTORY_TOKEN_BUDGET
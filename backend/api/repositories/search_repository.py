@@ -0,0 +1,192 @@
+import re
+import uuid
+from importlib import import_module
+from typing import Dict, List
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+
+from ..models.conversation import Conversation
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+SNIPPET_WORDS = 16
+
+# The migration that defines the search index, which rebuild() recreates it from. A later
+# migration that changes the index takes its place here.
+SEARCH_INDEX_MIGRATION = "api.migrations.0016_search_index"
+
+# PostgreSQL's English stop words, which its search ignores; left out of SQLite searches
+# too, where they would only slow the search down by matching nearly every message.
+STOP_WORDS = frozenset(
+    """
+    i me my myself we our ours ourselves you your yours yourself yourselves he him his
+    himself she her hers herself it its itself they them their theirs themselves what which
+    who whom this that these those am is are was were be been being have has had having do
+    does did doing a an the and but if or because as until while of at by for with about
+    against between into through during before after above below to from up down in out on
+    off over under again further then once here there when where why how all any both each
+    few more most other some such no nor not only own same so than too very s t can will
+    just don should now
+    """.split()
+)
+
+
+class SearchRepository:
+    """
+    Full-text search over a user's conversation titles, user messages and assistant
+    replies (every content variation), through the search index of api migration 0016:
+    an FTS5 table on SQLite and a tsvector column with a GIN index on PostgreSQL, both
+    kept up to date by triggers. Deleted messages are not in the index.
+    """
+
+    @staticmethod
+    def search(user_id, query: str, limit: int) -> List[Dict]:
+        """
+        Finds the best matches for a query, in two queries: the search, and the titles of the
+        conversations the matches are in.
+
+        Every word of the query has to match, after stemming, so "running tests" also finds
+        "run the test". Stop words ("the", "to", ...), punctuation and search operators are
+        ignored.
+
+        Args:
+            user_id: The id of the user whose conversations to search.
+            query (str): The words to search for.
+            limit (int): The most matches to return.
+
+        Returns:
+            List[Dict]: The best matches first, each with 'type' ("conversation", "user_message"
+                or "assistant_message"), 'message_id' (None for a conversation title),
+                'conversation_id', 'conversation_title', 'snippet' (the matching text, matched
+                words between <mark> and </mark>, not HTML-escaped) and 'rank' (higher is better).
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+
+        if connection.vendor == "postgresql":
+            rows = SearchRepository._search_postgresql(user_id, " ".join(words), limit)
+        else:
+            rows = SearchRepository._search_sqlite(user_id, words, limit)
+
+        rows = [
+            (kind, message_id, uuid.UUID(str(conversation_id)), snippet, rank)
+            for kind, message_id, conversation_id, snippet, rank in rows
+        ]
+        titles = dict(
+            Conversation.objects.filter(id__in={row[2] for row in rows}).values_list("id", "title")
+        )
+
+        return [
+            {
+                "type": kind,
+                "message_id": message_id,
+                "conversation_id": str(conversation_id),
+                "conversation_title": titles.get(conversation_id),
+                "snippet": snippet,
+                "rank": round(rank, 4),
+            }
+            for kind, message_id, conversation_id, snippet, rank in rows
+        ]
+
+    @staticmethod
+    def _search_sqlite(user_id, words: List[str], limit: int):
+        words = [word for word in words if word.lower() not in STOP_WORDS]
+        if not words:
+            return []
+
+        # Quoted, so words like AND or NEAR aren't read as FTS5 operators.
+        terms = " ".join(f'"{word}"' for word in words)
+        match = f'owner : "u{int(user_id)}" AND body : ({terms})'
+        # Kept a top-level query: SQLite then makes the snippets of the returned rows only,
+        # where in a subquery it would make one for every match.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT kind, message_id, conversation_id,
+                    snippet("api_search_index", 1, %s, %s, '…', %s),
+                    -bm25("api_search_index", 0.0, 1.0) AS score
+                FROM "api_search_index"
+                WHERE "api_search_index" MATCH %s
+                ORDER BY score DESC
+                LIMIT %s
+                """,
+                [SNIPPET_START, SNIPPET_END, SNIPPET_WORDS, match, limit],
+            )
+            return cursor.fetchall()
+
+    @staticmethod
+    def _search_postgresql(user_id, text: str, limit: int):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT s.kind, s.message_id, s.conversation_id,
+                    ts_headline('english', s.body, s.query, %s), s.rank
+                FROM (
+                    SELECT i.kind, i.message_id, i.conversation_id, i.body, q.query,
+                        ts_rank_cd(i.document, q.query) AS rank
+                    FROM "api_search_index" i, plainto_tsquery('english', %s) q(query)
+                    WHERE i.user_id = %s AND i.document @@ q.query
+                    ORDER BY rank DESC
+                    LIMIT %s
+                ) s
+                ORDER BY s.rank DESC
+                """,
+                [
+                    f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, "
+                    f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=1",
+                    text,
+                    user_id,
+                    limit,
+                ],
+            )
+            return cursor.fetchall()
+
+    @staticmethod
+    def missing_triggers(using: str = DEFAULT_DB_ALIAS) -> List[str]:
+        """
+        Returns the names of the search index triggers missing from the database, none if
+        the database has no search index.
+        """
+        migration = import_module(SEARCH_INDEX_MIGRATION)
+        db = connections[using]
+        expected = migration.TRIGGER_NAMES.get(db.vendor, [])
+        if not expected or "api_search_index" not in db.introspection.table_names():
+            return []
+
+        with db.cursor() as cursor:
+            if db.vendor == "postgresql":
+                cursor.execute(
+                    """
+                    SELECT t.tgname FROM pg_trigger t, pg_class c
+                    WHERE c.oid = t.tgrelid AND pg_table_is_visible(c.oid) AND NOT t.tgisinternal
+                    """
+                )
+            else:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            existing = {name for (name,) in cursor.fetchall()}
+        return [name for name in expected if name not in existing]
+
+    @staticmethod
+    def drop_triggers(using: str = DEFAULT_DB_ALIAS):
+        """
+        Drops the search index triggers, leaving the index itself.
+        """
+        migration = import_module(SEARCH_INDEX_MIGRATION)
+        db = connections[using]
+        with db.cursor() as cursor:
+            for statement in migration.DROP_TRIGGERS.get(db.vendor, []):
+                cursor.execute(statement)
+
+    @staticmethod
+    def rebuild(using: str = DEFAULT_DB_ALIAS):
+        """
+        Drops the search index and creates it again, with its triggers and a row for every
+        conversation title and live message, in one transaction.
+        """
+        migration = import_module(SEARCH_INDEX_MIGRATION)
+        db = connections[using]
+        forwards, backwards = migration.STATEMENTS.get(db.vendor, ([], []))
+        with transaction.atomic(using=using), db.cursor() as cursor:
+            for statement in backwards + forwards:
+                cursor.execute(statement)
@@ -6,6 +6,7 @@ from django.conf import settings
 from ..models.conversation import Conversation
 from ..models.user_message import UserMessage
 from ..models.assistant_message import AssistantMessage
+from ..repositories.conversation_repository import ConversationRepository
 
 from .user_message_serializer import UserMessageSerializer
 from .assistant_message_serializer import AssistantMessageSerializer
@@ -28,79 +29,86 @@ class ConversationDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "user", "created_at", "updated_at"]
 
     def get_messages(self, obj):
-        user_messages = UserMessage.objects.filter(conversation=obj)
-        user_message_list = UserMessageSerializer(user_messages, many=True).data
-        for message in user_message_list:
-            message["type"] = "user"
-            message["image"] = (
-                self.build_full_image_url(message["image"])
-                if message["image"]
-                else None
-            )
-            if message["is_deleted"]:
-                if message["recoverable"]:
-                    deleted_time = datetime.strptime(message["deleted_at"], "%Y-%m-%dT%H:%M:%S.%fZ")
-                    deleted_time = deleted_time.replace(tzinfo=pytz.utc)
-                    expiration_time = deleted_time + timedelta(hours=settings.RECOVERY_HOURS or 24)
-                    current_time = datetime.now(pytz.utc)
-                    remaining_time = expiration_time - current_time
-                    if remaining_time.total_seconds() > 0:
-                        hours, remainder = divmod(int(remaining_time.total_seconds()), 3600)
-                        message["time_remaining"] = f"{hours} more hour{'s' if hours > 1 else ''}"
-                    else: 
-                        message["time_remaining"] = "0 more hours"
-                    deleted_time_iso = deleted_time.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
-                    message["content"] = (
-                        f"*This message was deleted on {deleted_time_iso} and will be recoverable for {message['time_remaining']}.*"
-                        if remaining_time.total_seconds() > 0 else
-                        "*This message was deleted and is no longer recoverable.*"
-                    )
-                    message["image"] = None
-                else:
-                    deleted_time = datetime.strptime(message["deleted_at"], "%Y-%m-%dT%H:%M:%S.%fZ")
-                    deleted_time_iso = deleted_time.replace(tzinfo=pytz.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
-                    message["content"] = f"*This message was deleted on {deleted_time_iso} and is no longer recoverable.*"
-                    message["image"] = None
+        merged_messages = self.serialize_messages(
+            [
+                *UserMessage.objects.filter(conversation=obj),
+                # The related rows are loaded up front, so the number of queries doesn't grow
+                # with the length of the conversation.
+                *ConversationRepository.get_assistant_messages(obj.id),
+            ]
+        )
+        merged_messages.sort(key=lambda x: x["created_at"])
+
+        return merged_messages
 
-        assistant_messages = AssistantMessage.objects.filter(conversation=obj)
-        assistant_message_list = AssistantMessageSerializer(
-            assistant_messages, many=True
-        ).data
-        for message in assistant_message_list:
-            message["type"] = "assistant"
-            if message["generated_by"]["image"]:
-                message["generated_by"]["image"] = self.build_full_image_url(
-                    message["generated_by"]["image"]
+    def serialize_messages(self, messages):
+        """
+        Serializes user and assistant messages, keeping their order, the way the chat shows
+        them: with full image URLs and deleted messages replaced by a placeholder.
+        """
+        user_message_list = iter(
+            UserMessageSerializer(
+                [message for message in messages if isinstance(message, UserMessage)], many=True
+            ).data
+        )
+        assistant_message_list = iter(
+            AssistantMessageSerializer(
+                [message for message in messages if isinstance(message, AssistantMessage)],
+                many=True,
+            ).data
+        )
+
+        serialized = []
+        for instance in messages:
+            if isinstance(instance, UserMessage):
+                message = next(user_message_list)
+                message["type"] = "user"
+                message["image"] = (
+                    self.build_full_image_url(message["image"])
+                    if message["image"]
+                    else None
                 )
-            if message["is_deleted"]:
-                if message["recoverable"]:
-                    deleted_time = datetime.strptime(message["deleted_at"], "%Y-%m-%dT%H:%M:%S.%fZ")
-                    deleted_time = deleted_time.replace(tzinfo=pytz.utc)
-                    expiration_time = deleted_time + timedelta(hours=settings.RECOVERY_HOURS or 24)
-                    current_time = datetime.now(pytz.utc)
-                    remaining_time = expiration_time - current_time
-                    if remaining_time.total_seconds() > 0:
-                        hours, remainder = divmod(int(remaining_time.total_seconds()), 3600)
-                        message["time_remaining"] = f"{hours} more hour{'s' if hours > 1 else ''}"
-                    else: 
-                        message["time_remaining"] = "0 more hours"
-                    deleted_time_iso = deleted_time.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
-                    message["content_variations"] = [{"id": -1, "content": (
-                        f"*This message was deleted on {deleted_time_iso} and will be recoverable for {message['time_remaining']}.*"
-                        if remaining_time.total_seconds() > 0 else
-                        "*This message was deleted and is no longer recoverable.*"
-                    )}]
+                if message["is_deleted"]:
+                    message["content"] = self.deleted_placeholder(message)
                     message["image"] = None
-                else:
-                    deleted_time = datetime.strptime(message["deleted_at"], "%Y-%m-%dT%H:%M:%S.%fZ")
-                    deleted_time_iso = deleted_time.replace(tzinfo=pytz.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
-                    message["content_variations"] = [{"id": -1, "content": f"*This message was deleted on {deleted_time_iso} and is no longer recoverable.*"}]
+            else:
+                message = next(assistant_message_list)
+                message["type"] = "assistant"
+                if message["generated_by"]["image"]:
+                    message["generated_by"]["image"] = self.build_full_image_url(
+                        message["generated_by"]["image"]
+                    )
+                if message["is_deleted"]:
+                    message["content_variations"] = [
+                        {"id": -1, "content": self.deleted_placeholder(message)}
+                    ]
                     message["image"] = None
+            serialized.append(message)
 
-        merged_messages = user_message_list + assistant_message_list
-        merged_messages.sort(key=lambda x: x["created_at"])
+        return serialized
 
-        return merged_messages
+    def deleted_placeholder(self, message):
+        """
+        Returns the text shown in place of a deleted message, and sets its `time_remaining`
+        while it can still be recovered.
+        """
+        deleted_time = datetime.fromisoformat(
+            message["deleted_at"].replace("Z", "+00:00")
+        ).astimezone(pytz.utc)
+        deleted_time_iso = deleted_time.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+        if not message["recoverable"]:
+            return f"*This message was deleted on {deleted_time_iso} and is no longer recoverable.*"
+
+        expiration_time = deleted_time + timedelta(hours=settings.RECOVERY_HOURS or 24)
+        remaining_time = expiration_time - datetime.now(pytz.utc)
+        if remaining_time.total_seconds() <= 0:
+            message["time_remaining"] = "0 more hours"
+            return "*This message was deleted and is no longer recoverable.*"
+
+        hours = int(remaining_time.total_seconds()) // 3600
+        message["time_remaining"] = f"{hours} more hour{'s' if hours > 1 else ''}"
+        return f"*This message was deleted on {deleted_time_iso} and will be recoverable for {message['time_remaining']}.*"
 
     def build_full_image_url(self, image_path):
         request = self.context.get("request")
@@ -6,4 +6,24 @@ class ConversationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Conversation
         fields = "__all__"
-        read_only_fields = ["id", "user", "created_at", "updated_at"]
\ No newline at end of file
+        read_only_fields = ["id", "user", "created_at", "updated_at", "summary", "summarized_until"]
+
+
+class ConversationListSerializer(serializers.ModelSerializer):
+    """
+    The sidebar's view of a conversation, as loaded by ConversationRepository.get_conversations.
+    """
+
+    grouping = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Conversation
+        fields = ("id", "title", "created_at", "updated_at", "user", "liked", "grouping")
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        if hasattr(instance, "message_count"):
+            representation["message_count"] = instance.message_count
+            representation["preview"] = instance.preview
+        return representation
@@ -7,7 +7,8 @@ class UserMessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = UserMessage
-        fields = "__all__"
+        # token_count is only for fitting the history into a model's context.
+        exclude = ["token_count"]
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
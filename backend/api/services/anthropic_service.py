@@ -2,7 +2,7 @@ import os
 import logging
 
 from typing import Dict, List
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
 from .base_llm_service import BaseLLMService
 
 class AnthropicService(BaseLLMService):
@@ -10,7 +10,7 @@ class AnthropicService(BaseLLMService):
     A service class for interacting with Anthrpic's Chat Completions API.
     """
 
-    def __init__(self, api_key: str = None, client: Anthropic = None):
+    def __init__(self, api_key: str = None, client: Anthropic = None, async_client: AsyncAnthropic = None):
         """
         Initializes the AnthropicService with the necessary API key for authentication.
 
@@ -20,8 +20,10 @@ class AnthropicService(BaseLLMService):
 
         if key := (api_key or os.getenv("ANTHROPIC_API_KEY")):
             self.client = client or Anthropic(api_key=key)
+            self.async_client = async_client or AsyncAnthropic(api_key=key)
         else:
             self.client = None
+            self.async_client = None
 
         self.logger = logging.getLogger(__name__)
 
@@ -50,7 +52,7 @@ class AnthropicService(BaseLLMService):
             from anthropic.types.completion import Completion
 
             response: Completion = self.client.messages.create(
-                model=model, messages=[self.map_payload_to_provider(message) for message in messages], max_tokens=4096
+                model=model, messages=self.map_messages(messages), max_tokens=4096
             )
             response_json = response.model_dump()
             response_json["message"] = {"content": response_json["content"][0]["text"]}
@@ -80,8 +82,9 @@ class AnthropicService(BaseLLMService):
 
         try:
             with self.client.messages.stream(
-                model=model, messages=[self.map_payload_to_provider(message) for message in messages], max_tokens=4096
+                model=model, messages=self.map_messages(messages), max_tokens=4096
             ) as stream:
+                self.track_response(stream.response)
                 for text in stream.text_stream:
                     if text is not None:
                         yield {
@@ -91,6 +94,44 @@ class AnthropicService(BaseLLMService):
                             }
                         }
 
+                yield self.map_usage(stream.get_final_message().usage)
+
+        except Exception as e:
+            self.logger.error(f"Anthropic API streaming request failed: {e}")
+            yield {"error": str(e)}
+
+    async def chat_stream_async(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        """
+        Sends a chat completion request to the Anthropic API with streaming enabled, without blocking a thread.
+
+        Args:
+            model (str): The name of the model to use for the chat.
+            messages (List[Dict[str, str]]): A list of dictionaries representing the chat messages.
+
+        Yields:
+            Dict: Stream chunks from the API containing partial chat completion data.
+        """
+        if not self.async_client:
+            yield {
+                "error": "Anthropic Service is not initialized. Please ensure the .env has the ANTHROPIC_API_KEY variable set."
+            }
+            return
+
+        try:
+            async with self.async_client.messages.stream(
+                model=model, messages=self.map_messages(messages), max_tokens=4096
+            ) as stream:
+                async for text in stream.text_stream:
+                    if text is not None:
+                        yield {
+                            "message": {
+                                "content": text,
+                                "role": "assistant",
+                            }
+                        }
+
+                yield self.map_usage((await stream.get_final_message()).usage)
+
         except Exception as e:
             self.logger.error(f"Anthropic API streaming request failed: {e}")
             yield {"error": str(e)}
@@ -112,7 +153,35 @@ class AnthropicService(BaseLLMService):
 
         return {}
 
-    def map_payload_to_provider(self, message):
+    def map_messages(self, messages):
+        """
+        Maps the messages of a request and marks the stable parts of the prompt as prompt
+        cache breakpoints: the first message, which is the conversation summary or the start
+        of the history window (see build_history), the end of the previous turn, and the end
+        of the prompt.
+
+        Anthropic caches the prompt up to each breakpoint, and looks back from a breakpoint
+        for the longest prefix it has cached. The next turn's prompt repeats this one, so it
+        reads this prompt from the cache and only the reply and the new message are processed
+        again; after the window drops a block of old turns, the first breakpoint still reads
+        the summary. Prompts shorter than the model's minimum cacheable length are not cached.
+        """
+        breakpoints = {0, len(messages) - 2, len(messages) - 1}
+        return [
+            self.map_payload_to_provider(message, cache=index in breakpoints)
+            for index, message in enumerate(messages)
+        ]
+
+    def map_usage(self, usage) -> Dict:
+        cache_read = usage.cache_read_input_tokens or 0
+        cache_creation = usage.cache_creation_input_tokens or 0
+        return self.usage_chunk(
+            input_tokens=usage.input_tokens + cache_read + cache_creation,
+            cached_input_tokens=cache_read,
+            output_tokens=usage.output_tokens,
+        )
+
+    def map_payload_to_provider(self, message, cache: bool = False):
         mapped_message = {
             "role": message.get("role", "user"),
             "content": [{"type": "text", "text": message.get("content", "")}]
@@ -128,6 +197,9 @@ class AnthropicService(BaseLLMService):
                         "data": image.get("data", "")
                     }
                 })
+
+        if cache:
+            mapped_message["content"][-1]["cache_control"] = {"type": "ephemeral"}
                 
         return mapped_message
 
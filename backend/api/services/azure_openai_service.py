@@ -93,18 +93,18 @@ class AzureOpenAIService(BaseLLMService):
             return
 
         try:
-            stream = self.client.chat.completions.create(
+            with self.client.chat.completions.create(
                 model=model, messages=messages, stream=True, **kwargs
-            )
-
-            for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    yield {
-                        "message": {
-                            "content": chunk.choices[0].delta.content,
-                            "role": "assistant",
+            ) as stream:
+                self.track_response(stream.response)
+                for chunk in stream:
+                    if chunk.choices[0].delta.content is not None:
+                        yield {
+                            "message": {
+                                "content": chunk.choices[0].delta.content,
+                                "role": "assistant",
+                            }
                         }
-                    }
 
         except Exception as e:
             self.logger.error(f"Azure OpenAI API streaming request failed: {e}")
@@ -1,6 +1,69 @@
-from typing import List, Dict
+import socket
+import threading
+from typing import AsyncIterator, List, Dict
 from abc import ABC, abstractmethod
 
+from asgiref.sync import sync_to_async
+
+
+class StreamCancel:
+    """
+    Lets a cancelled stream close the provider responses a sync chat_stream is reading on
+    another thread.
+
+    The thread reading the stream enters `with cancel:`, and the services pass each provider
+    response they open to BaseLLMService.track_response. cancel() shuts their sockets down,
+    which also ends a read blocked on a slow first token; responses opened after that (say,
+    the request following a tool call) are closed as soon as they are tracked.
+    """
+
+    _local = threading.local()
+
+    def __init__(self):
+        self.cancelled = False
+        self.responses = []
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        StreamCancel._local.current = self
+        return self
+
+    def __exit__(self, *exc_info):
+        StreamCancel._local.current = None
+
+    @classmethod
+    def current(cls) -> "StreamCancel | None":
+        return getattr(cls._local, "current", None)
+
+    def track(self, response):
+        with self.lock:
+            if not self.cancelled:
+                self.responses.append(response)
+                return
+        self.close(response)
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            responses, self.responses = self.responses, []
+        for response in responses:
+            self.close(response)
+
+    @staticmethod
+    def close(response):
+        # Closing the response alone doesn't wake a thread blocked reading its socket.
+        if response.is_closed:
+            return
+        network_stream = response.extensions.get("network_stream")
+        sock = network_stream.get_extra_info("socket") if network_stream else None
+        try:
+            if sock is not None:
+                sock.shutdown(socket.SHUT_RDWR)
+            response.close()
+        except Exception:
+            pass
+
+
 class BaseLLMService(ABC):
     @abstractmethod
     def chat(
@@ -12,7 +75,7 @@ class BaseLLMService(ABC):
         **kwargs,
     ) -> Dict:
         pass
-    
+
     def chat_stream(
         self,
         model: str,
@@ -23,6 +86,71 @@ class BaseLLMService(ABC):
     ) -> Dict:
         pass
 
+    async def chat_stream_async(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        use_tools: bool = False,
+        user_tools: List[str] | None = None,
+        **kwargs,
+    ) -> AsyncIterator[Dict]:
+        """
+        Async variant of chat_stream used by the ASGI streaming view.
+
+        Providers without an async client fall back to pulling chunks from the
+        sync chat_stream generator in a worker thread, one chunk at a time.
+        """
+        stream = iter(
+            self.chat_stream(
+                model=model,
+                messages=messages,
+                use_tools=use_tools,
+                user_tools=user_tools,
+                **kwargs,
+            )
+        )
+        done = object()
+        next_chunk = sync_to_async(next, thread_sensitive=False)
+        while (chunk := await next_chunk(stream, done)) is not done:
+            yield chunk
+
+    @staticmethod
+    def track_response(response):
+        """
+        Lets the current StreamCancel, if any, close a provider response (an httpx.Response).
+        Also works as an httpx "response" event hook.
+        """
+        if cancel := StreamCancel.current():
+            cancel.track(response)
+
+    @staticmethod
+    def make_usage(input_tokens, cached_input_tokens, output_tokens, prompt_ms=None) -> Dict:
+        """
+        Token usage of a request in the same shape for every provider.
+
+        Args:
+            input_tokens (int): Prompt tokens, including the ones read from the provider's prompt cache.
+            cached_input_tokens (int | None): Prompt tokens read from the prompt cache, None if the provider doesn't report it.
+            output_tokens (int): Generated tokens.
+            prompt_ms (float, optional): Time spent processing the prompt, if the provider reports it.
+        """
+        return {
+            "input_tokens": input_tokens,
+            "cached_input_tokens": cached_input_tokens,
+            "output_tokens": output_tokens,
+            "prompt_ms": prompt_ms,
+        }
+
+    @classmethod
+    def usage_chunk(cls, *args, **kwargs) -> Dict:
+        """
+        Last chunk of a stream, reporting the request's usage (see make_usage).
+        """
+        return {
+            "message": {"content": "", "role": "assistant"},
+            "usage": cls.make_usage(*args, **kwargs),
+        }
+
     @abstractmethod
     def get_models(self) -> Dict:
         pass
@@ -30,7 +158,7 @@ class BaseLLMService(ABC):
     @abstractmethod
     def get_model(self) -> Dict:
         pass
-    
+
     @abstractmethod
     def map_payload_to_provider(self, message):
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,440 @@
+import json
+import uuid
+import logging
+import posixpath
+import itertools
+
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Iterable, Iterator
+
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from ..models.model import Model
+from ..models.conversation import Conversation
+from ..models.user_message import UserMessage
+from ..models.content_variation import ContentVariation
+from ..models.assistant_message import AssistantMessage
+from .token_counter import estimate_tokens
+
+ARCHIVE_VERSION = 1
+EXPORT_CHUNK_SIZE = 500
+EXPORT_CONVERSATION_BATCH = 100
+IMPORT_BATCH_SIZE = 1000
+
+
+def _datetime(value) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def _parse_datetime(value) -> datetime | None:
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+class ConversationArchive:
+    """
+    Exports a user's conversations as NDJSON, one JSON object per line, and imports them.
+
+    The first line is a header, {"type": "archive", "version": 1}. Then each conversation
+    has a "conversation" line, followed by a "user_message" line per user message and an
+    "assistant_message" line per assistant message, which holds its content variations.
+    Messages refer to their conversation, and replies to the user message they answer, by
+    the ids these had when exported. Deleted messages are included, images by their stored
+    path; an import keeps an image only if the importing user's messages already refer to
+    it, so an archive can't point a message at another user's upload.
+
+    Both directions read and write rows in chunks, so memory use doesn't grow with the
+    size of the archive.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def export(user_id, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Yields the user's conversations as NDJSON lines, oldest conversation first.
+
+        Args:
+            user_id: The id of the user to export.
+            chunk_size (int, optional): Rows fetched from the database at a time.
+
+        Yields:
+            str: One line, ending with a newline.
+        """
+        yield ConversationArchive._line({"type": "archive", "version": ARCHIVE_VERSION})
+
+        conversations = (
+            Conversation.objects.filter(user_id=user_id)
+            .order_by("created_at", "id")
+            .iterator(chunk_size=chunk_size)
+        )
+        # The messages of a batch of conversations are read with one query per table, in
+        # the order of the conversations, and split up again by conversation as they stream.
+        while batch := list(itertools.islice(conversations, EXPORT_CONVERSATION_BATCH)):
+            ids = [conversation.id for conversation in batch]
+            order = ("conversation__created_at", "conversation_id", "created_at", "id")
+            user_messages = itertools.groupby(
+                UserMessage.objects.filter(conversation_id__in=ids)
+                .order_by(*order)
+                .values(
+                    "id",
+                    "conversation_id",
+                    "content",
+                    "created_at",
+                    "image",
+                    "is_deleted",
+                    "deleted_at",
+                    "use_tools",
+                )
+                .iterator(chunk_size=chunk_size),
+                key=lambda message: message["conversation_id"],
+            )
+            assistant_messages = itertools.groupby(
+                AssistantMessage.objects.filter(conversation_id__in=ids)
+                .select_related("model")
+                .prefetch_related(
+                    Prefetch(
+                        "content_variations",
+                        queryset=ContentVariation.objects.order_by("id").only("id", "content"),
+                        to_attr="variations",
+                    )
+                )
+                .order_by(*order)
+                .iterator(chunk_size=chunk_size),
+                key=lambda message: message.conversation_id,
+            )
+            next_user_messages = next(user_messages, None)
+            next_assistant_messages = next(assistant_messages, None)
+
+            for conversation in batch:
+                yield ConversationArchive._line(
+                    {
+                        "type": "conversation",
+                        "id": str(conversation.id),
+                        "title": conversation.title,
+                        "created_at": _datetime(conversation.created_at),
+                        "updated_at": _datetime(conversation.updated_at),
+                        "liked": conversation.liked,
+                        "summary": conversation.summary,
+                        "summarized_until": _datetime(conversation.summarized_until),
+                    }
+                )
+
+                if next_user_messages and next_user_messages[0] == conversation.id:
+                    for message in next_user_messages[1]:
+                        yield ConversationArchive._line(
+                            {
+                                "type": "user_message",
+                                "id": message["id"],
+                                "conversation": str(conversation.id),
+                                "content": message["content"],
+                                "created_at": _datetime(message["created_at"]),
+                                "image": message["image"] or None,
+                                "is_deleted": message["is_deleted"],
+                                "deleted_at": _datetime(message["deleted_at"]),
+                                "use_tools": message["use_tools"],
+                            }
+                        )
+                    next_user_messages = next(user_messages, None)
+
+                if next_assistant_messages and next_assistant_messages[0] == conversation.id:
+                    for message in next_assistant_messages[1]:
+                        yield ConversationArchive._line(
+                            {
+                                "type": "assistant_message",
+                                "id": message.id,
+                                "conversation": str(conversation.id),
+                                "generated_by": message.generated_by_id,
+                                "model": message.model.name if message.model else None,
+                                "provider": message.provider,
+                                "created_at": _datetime(message.created_at),
+                                "liked": message.liked,
+                                "is_deleted": message.is_deleted,
+                                "deleted_at": _datetime(message.deleted_at),
+                                "tools_used": message.tools_used,
+                                "content_variations": [
+                                    variation.content for variation in message.variations
+                                ],
+                            }
+                        )
+                    next_assistant_messages = next(assistant_messages, None)
+
+    @staticmethod
+    def import_lines(user, lines: Iterable, batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Imports an export into a user's account, as new conversations.
+
+        Rows are written with bulk_create, `batch_size` messages at a time, each batch in its
+        own short transaction. If a line can't be imported, the conversations imported up to
+        then are deleted again before the error is raised.
+
+        Args:
+            user: The user to import the conversations for.
+            lines (Iterable): The NDJSON lines, as str or bytes, e.g. an open file.
+            batch_size (int, optional): Messages written per transaction.
+
+        Returns:
+            Dict[str, int]: The number of conversations, user messages, assistant messages and
+                content variations imported.
+
+        Raises:
+            ValueError: If a line isn't valid, with its line number.
+        """
+        importer = ConversationImporter(user, batch_size)
+        try:
+            for number, line in enumerate(lines, start=1):
+                try:
+                    if isinstance(line, bytes):
+                        line = line.decode("utf-8")
+                    if not line.strip():
+                        continue
+                    importer.add(json.loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    raise ValueError(f"Line {number}: {e!r}") from e
+            importer.flush()
+        except Exception:
+            importer.rollback()
+            raise
+
+        ConversationArchive.logger.info(f"Imported {importer.counts} for user {user.id}")
+        return importer.counts
+
+    @staticmethod
+    def _line(record: Dict) -> str:
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class ConversationImporter:
+    """
+    Buffers the rows of an import and writes them in batches, see ConversationArchive.
+
+    Only the user message ids of the conversation being read are remembered, to resolve
+    what its replies refer to, so a message has to come after its conversation's line and
+    before the next conversation's.
+    """
+
+    def __init__(self, user, batch_size: int = IMPORT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        self.counts = {
+            "conversations": 0,
+            "user_messages": 0,
+            "assistant_messages": 0,
+            "content_variations": 0,
+        }
+        self.created_conversation_ids = []
+        self.models = {}
+        self.images = {}
+
+        self.conversation = None
+        self.conversation_key = None
+        # Exported id -> the UserMessage while it is buffered, its new id once written.
+        self.user_messages = {}
+
+        self.pending_conversations = []
+        self.pending_user_messages = []
+        # (AssistantMessage, the user message it replies to, contents)
+        self.pending_assistant_messages = []
+
+    def add(self, record: Dict):
+        kind = record["type"]
+        if kind == "archive":
+            if record.get("version") != ARCHIVE_VERSION:
+                raise ValueError(f"Unsupported archive version {record.get('version')}")
+        elif kind == "conversation":
+            self.add_conversation(record)
+        elif kind == "user_message":
+            self.add_user_message(record)
+        elif kind == "assistant_message":
+            self.add_assistant_message(record)
+        else:
+            raise ValueError(f"Unknown type {kind}")
+
+        if len(self.pending_user_messages) + len(self.pending_assistant_messages) >= self.batch_size:
+            self.flush()
+
+    def add_conversation(self, record: Dict):
+        created_at = _parse_datetime(record["created_at"]) or timezone.now()
+        self.conversation = Conversation(
+            id=uuid.uuid4(),
+            user=self.user,
+            title=record["title"][:255],
+            created_at=created_at,
+            updated_at=_parse_datetime(record.get("updated_at")) or created_at,
+            liked=bool(record.get("liked")),
+            summary=record.get("summary") or "",
+            summarized_until=_parse_datetime(record.get("summarized_until")),
+        )
+        self.conversation_key = record["id"]
+        self.user_messages = {}
+        self.pending_conversations.append(self.conversation)
+
+    def add_user_message(self, record: Dict):
+        message = UserMessage(
+            conversation=self.conversation_for(record),
+            content=record["content"],
+            created_at=_parse_datetime(record["created_at"]),
+            image=self.image(record.get("image")),
+            is_deleted=bool(record.get("is_deleted")),
+            deleted_at=_parse_datetime(record.get("deleted_at")),
+            use_tools=bool(record.get("use_tools")),
+            # bulk_create doesn't call save(), which estimates it otherwise.
+            token_count=estimate_tokens(record["content"]),
+        )
+        self.user_messages[record["id"]] = message
+        self.pending_user_messages.append(message)
+
+    def add_assistant_message(self, record: Dict):
+        if record["generated_by"] not in self.user_messages:
+            raise ValueError(f"Unknown user message {record['generated_by']}")
+
+        message = AssistantMessage(
+            conversation=self.conversation_for(record),
+            model=self.model(record.get("model")),
+            provider=record["provider"],
+            created_at=_parse_datetime(record["created_at"]),
+            liked=bool(record.get("liked")),
+            is_deleted=bool(record.get("is_deleted")),
+            deleted_at=_parse_datetime(record.get("deleted_at")),
+            tools_used=record.get("tools_used"),
+        )
+        contents = [str(content) for content in record.get("content_variations") or []]
+        self.pending_assistant_messages.append(
+            (message, self.user_messages[record["generated_by"]], contents)
+        )
+
+    def conversation_for(self, record: Dict) -> Conversation:
+        if self.conversation is None or record["conversation"] != self.conversation_key:
+            raise ValueError(f"Message outside of its conversation {record['conversation']}")
+        return self.conversation
+
+    def image(self, path: str | None) -> str | None:
+        # The path is stored as is, so it is only kept if it is an upload the user's own
+        # messages refer to, e.g. when re-importing an export on the same instance.
+        if not path:
+            return None
+        if path not in self.images:
+            upload_to = UserMessage._meta.get_field("image").upload_to
+            self.images[path] = (
+                path.startswith(upload_to)
+                and posixpath.normpath(path) == path
+                and UserMessage.objects.filter(conversation__user=self.user, image=path).exists()
+            )
+        return path if self.images[path] else None
+
+    def model(self, name: str | None) -> Model | None:
+        # Models are matched by name, and left empty when this instance doesn't have one.
+        if not name:
+            return None
+        if name not in self.models:
+            self.models[name] = Model.objects.filter(name=name).first()
+        return self.models[name]
+
+    def flush(self):
+        """
+        Writes the buffered rows in one transaction.
+        """
+        if not (
+            self.pending_conversations
+            or self.pending_user_messages
+            or self.pending_assistant_messages
+        ):
+            return
+
+        with transaction.atomic():
+            if self.pending_conversations:
+                self.create(Conversation, self.pending_conversations, ["created_at", "updated_at"])
+                self.created_conversation_ids.extend(
+                    conversation.id for conversation in self.pending_conversations
+                )
+                self.counts["conversations"] += len(self.pending_conversations)
+
+            if self.pending_user_messages:
+                self.create(UserMessage, self.pending_user_messages, ["created_at"])
+                self.counts["user_messages"] += len(self.pending_user_messages)
+
+            if self.pending_assistant_messages:
+                self.flush_assistant_messages()
+
+        self.pending_conversations = []
+        self.pending_user_messages = []
+        self.pending_assistant_messages = []
+        self.user_messages = {
+            key: message if isinstance(message, int) else message.id
+            for key, message in self.user_messages.items()
+        }
+
+    def flush_assistant_messages(self):
+        messages = []
+        for message, generated_by, _ in self.pending_assistant_messages:
+            message.generated_by_id = generated_by if isinstance(generated_by, int) else generated_by.id
+            messages.append(message)
+        self.create(AssistantMessage, messages, ["created_at"])
+
+        variations, links = [], []
+        for message, _, contents in self.pending_assistant_messages:
+            for content in contents:
+                variations.append(ContentVariation(content=content, token_count=estimate_tokens(content)))
+                links.append(message)
+        ContentVariation.objects.bulk_create(variations, batch_size=self.batch_size)
+
+        Through = AssistantMessage.content_variations.through
+        Through.objects.bulk_create(
+            [
+                Through(assistantmessage_id=message.id, contentvariation_id=variation.id)
+                for message, variation in zip(links, variations)
+            ],
+            batch_size=self.batch_size,
+        )
+        self.counts["assistant_messages"] += len(messages)
+        self.counts["content_variations"] += len(variations)
+
+    def create(self, model, objects, timestamp_fields):
+        timestamps = [[getattr(obj, field) for field in timestamp_fields] for obj in objects]
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+        # bulk_create stamps auto_now(_add) fields with the current time, so the exported
+        # times are put back. bulk_update would build a CASE expression per row, which takes
+        # as long as the insert; this is one UPDATE ... FROM (VALUES ...) per batch.
+        fields = [model._meta.get_field(field) for field in timestamp_fields]
+        rows = []
+        for obj, values in zip(objects, timestamps):
+            row = [model._meta.pk.get_db_prep_value(obj.pk, connection)]
+            for field, value in zip(fields, values):
+                if value is None:
+                    value = getattr(obj, field.attname)
+                setattr(obj, field.attname, value)
+                row.append(field.get_db_prep_value(value, connection))
+            rows.append(row)
+
+        quote = connection.ops.quote_name
+        assignments = ", ".join(
+            f"{quote(field.column)} = v.column{index}" for index, field in enumerate(fields, start=2)
+        )
+        placeholders = "(" + ", ".join(["%s"] * (len(fields) + 1)) + ")"
+        size = min(self.batch_size, connection.ops.bulk_batch_size(["pk", *fields], objects))
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), size):
+                batch = rows[start : start + size]
+                cursor.execute(
+                    f"UPDATE {quote(model._meta.db_table)} SET {assignments} "
+                    f"FROM (VALUES {', '.join([placeholders] * len(batch))}) AS v "
+                    f"WHERE {quote(model._meta.db_table)}.{quote(model._meta.pk.column)} = v.column1",
+                    [value for row in batch for value in row],
+                )
+
+    def rollback(self):
+        """
+        Deletes the conversations written so far, with their messages.
+        """
+        for start in range(0, len(self.created_conversation_ids), 100):
+            Conversation.objects.filter(
+                id__in=self.created_conversation_ids[start : start + 100]
+            ).delete()
+        self.created_conversation_ids = []
@@ -0,0 +1,126 @@
+import logging
+import threading
+
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+from .llm_service_factory import LLMServiceFactory
+from ..models.conversation import Conversation
+from ..repositories.conversation_repository import ConversationRepository
+
+PROMPTS = {
+    "title": "Generate a concise, creative title for the following conversation using the provided summary. Always start and end the title with an emoji. Return only the title, no other text or markdown. Always return text. If there is no conversation, make a random title.",
+    "summary": "Create a summary of the following conversation. Return only the summary, no other text or markdown.",
+}
+
+
+class ConversationSummarizer:
+    """
+    Summarizes conversations, for magic titles and for the rolling summary that stands
+    in for older turns when a user has `compact_history` on.
+
+    The rolling summary is refreshed on a background thread: each refresh folds the
+    turns between `Conversation.summarized_until` and the start of the recent window into
+    the previous summary, so the chat request never waits for it.
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation-summarizer")
+    _pending = set()
+    _lock = threading.Lock()
+
+    logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def summarize(llm_service, model: str, history: str, previous_summary: str = "") -> Dict:
+        """
+        Asks the model for a summary of `history`, continuing `previous_summary` if given.
+
+        Args:
+            llm_service (BaseLLMService): The service to summarize with.
+            model (str): The model to summarize with.
+            history (str): The turns to summarize, one "role: content" line each.
+            previous_summary (str, optional): The summary of the turns before `history`.
+
+        Returns:
+            Dict: The provider's chat response, or a dict with an 'error' key.
+        """
+        content = f"MESSAGE HISTORY:\n{history}"
+        if previous_summary:
+            content = f"PREVIOUS SUMMARY:\n{previous_summary}\n\n{content}"
+
+        return llm_service.chat(
+            model=model,
+            messages=[
+                {
+                    "role": "assistant",
+                    "content": PROMPTS.get("summary"),
+                },
+                {
+                    "role": "user",
+                    "content": content,
+                },
+            ],
+        )
+
+    @staticmethod
+    def format_history(messages: List[Dict]) -> str:
+        return "".join(f"{message['role']}: {message['content']}\n" for message in messages)
+
+    @classmethod
+    def schedule_refresh(cls, conversation_id, before, model: str, provider: str):
+        """
+        Queues a refresh of the conversation's rolling summary up to `before`, unless one is
+        already queued for it.
+        """
+        with cls._lock:
+            if conversation_id in cls._pending:
+                return
+            cls._pending.add(conversation_id)
+
+        cls._executor.submit(cls._refresh, conversation_id, before, model, provider)
+
+    @classmethod
+    def _refresh(cls, conversation_id, before, model: str, provider: str):
+        try:
+            conversation = Conversation.objects.only("summary", "summarized_until").get(
+                id=conversation_id
+            )
+            turns = ConversationRepository.get_messages_between(
+                conversation_id,
+                after=conversation.summarized_until,
+                before=before,
+                limit=settings.SUMMARY_MAX_TURNS,
+            )
+            # Not worth a model call yet. Until there are enough of them, build_history keeps
+            # these turns in the history window, so the model still sees them verbatim.
+            if len(turns) < settings.SUMMARY_MIN_TURNS:
+                return
+
+            llm_service = LLMServiceFactory.get_service(provider)
+            if not llm_service:
+                return
+
+            response = cls.summarize(
+                llm_service, model, cls.format_history(turns), conversation.summary
+            )
+            if not response or "error" in response:
+                cls.logger.error(f"Failed to summarize conversation {conversation_id}: {response}")
+                return
+
+            # update() leaves updated_at alone, and matching on the old summarized_until drops
+            # the result if another refresh got there first.
+            Conversation.objects.filter(
+                id=conversation_id, summarized_until=conversation.summarized_until
+            ).update(
+                summary=response["message"]["content"],
+                summarized_until=turns[-1]["created_at"],
+            )
+        except Exception:
+            cls.logger.exception(f"Failed to summarize conversation {conversation_id}")
+        finally:
+            with cls._lock:
+                cls._pending.discard(conversation_id)
+            connection.close()
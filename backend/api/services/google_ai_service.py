@@ -1,5 +1,6 @@
 import os
 import logging
+from contextlib import aclosing, closing
 from typing import List, Dict
 from google import genai
 from google.genai import types
@@ -21,7 +22,11 @@ class GoogleAIService(BaseLLMService):
             api_key (str): The Google AI API key.
         """
         if key := (api_key or os.getenv("GEMINI_API_KEY")):
-            self.client = client or Client(api_key=key)
+            # The hook lets a cancelled stream close the response it is reading (see StreamCancel).
+            self.client = client or Client(
+                api_key=key,
+                http_options=types.HttpOptions(client_args={"event_hooks": {"response": [self.track_response]}}),
+            )
         else:
             self.client = None
 
@@ -69,15 +74,59 @@ class GoogleAIService(BaseLLMService):
             return
 
         try:
-            response = self.client.models.generate_content_stream(model=model, contents=[self.map_payload_to_provider(message) for message in messages])
-            for chunk in response:
-                if chunk is not None and chunk.text is not None:
-                    yield {
-                        "message": {
-                            "content": chunk.text,
-                            "role": "assistant",
+            with closing(self.client.models.generate_content_stream(model=model, contents=[self.map_payload_to_provider(message) for message in messages])) as response:
+                usage = None
+                for chunk in response:
+                    if chunk is not None and chunk.text is not None:
+                        yield {
+                            "message": {
+                                "content": chunk.text,
+                                "role": "assistant",
+                            }
                         }
-                    }
+                    if chunk is not None and chunk.usage_metadata:
+                        usage = chunk.usage_metadata
+
+                if usage:
+                    yield self.map_usage(usage)
+
+        except Exception as e:
+            self.logger.error(f"Google API streaming request failed: {e}")
+            yield {"error": str(e)}
+
+    async def chat_stream_async(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        """
+        Sends a chat completion request to the Google API with streaming enabled, without blocking a thread.
+
+        Args:
+            model (str): The name of the model to use for the chat.
+            messages (List[Dict[str, str]]): A list of dictionaries representing the chat messages.
+
+        Yields:
+            Dict: Stream chunks from the API containing partial chat completion data.
+        """
+        if not self.client:
+            yield {
+                "error": "Google Service is not initialized. Please ensure the .env has the GEMINI_API_KEY variable set."
+            }
+            return
+
+        try:
+            async with aclosing(await self.client.aio.models.generate_content_stream(model=model, contents=[self.map_payload_to_provider(message) for message in messages])) as response:
+                usage = None
+                async for chunk in response:
+                    if chunk is not None and chunk.text is not None:
+                        yield {
+                            "message": {
+                                "content": chunk.text,
+                                "role": "assistant",
+                            }
+                        }
+                    if chunk is not None and chunk.usage_metadata:
+                        usage = chunk.usage_metadata
+
+                if usage:
+                    yield self.map_usage(usage)
 
         except Exception as e:
             self.logger.error(f"Google API streaming request failed: {e}")
@@ -105,6 +154,14 @@ class GoogleAIService(BaseLLMService):
             self.logger.error(f"Failed to retrieve model details: {e}")
             return {"error": str(e)}
     
+    def map_usage(self, usage) -> Dict:
+        # Gemini caches repeated prompt prefixes implicitly and reports the hits here.
+        return self.usage_chunk(
+            input_tokens=usage.prompt_token_count,
+            cached_input_tokens=usage.cached_content_token_count or 0,
+            output_tokens=usage.candidates_token_count,
+        )
+
     def map_payload_to_provider(self, message):
         mapped_message = {
             "role": message.get("role", "user"),
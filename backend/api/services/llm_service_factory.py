@@ -1,3 +1,7 @@
+import os
+import threading
+
+from typing import Dict, Tuple
 from .base_llm_service import BaseLLMService
 from .ollama_service import OllamaService
 from .openai_service import OpenAIService
@@ -6,17 +10,53 @@ from .anthropic_service import AnthropicService
 from .google_ai_service import GoogleAIService
 
 class LLMServiceFactory:
-    @staticmethod
-    def get_service(provider: str = "ollama") -> BaseLLMService:
-        if provider == "ollama":
-            return OllamaService()
-        elif provider == "openai":
-            return OpenAIService()
-        elif provider == "azure_openai":
-            return AzureOpenAIService()
-        elif provider == "anthropic":
-            return AnthropicService()
-        elif provider == "google":
-            return GoogleAIService()
-        else:
-            return None
\ No newline at end of file
+    """
+    Hands out one long-lived service per provider and configuration, so the SDK clients
+    and their connection pools are reused across requests instead of rebuilt each time.
+    """
+
+    # provider -> (service class, environment variables that configure its client)
+    PROVIDERS = {
+        "ollama": (OllamaService, ("OLLAMA_ENDPOINT",)),
+        "openai": (OpenAIService, ("OPENAI_API_KEY",)),
+        "azure_openai": (
+            AzureOpenAIService,
+            ("AZURE_OPENAI_API_KEY", "AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_API_VERSION"),
+        ),
+        "anthropic": (AnthropicService, ("ANTHROPIC_API_KEY",)),
+        "google": (GoogleAIService, ("GEMINI_API_KEY",)),
+    }
+
+    _services: Dict[Tuple, BaseLLMService] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_service(cls, provider: str = "ollama") -> BaseLLMService:
+        if provider not in cls.PROVIDERS:
+            return None
+
+        service_class, settings = cls.PROVIDERS[provider]
+        # Keyed on the current configuration so a changed endpoint or key gets a fresh client.
+        key = (provider, *(os.getenv(setting) for setting in settings))
+
+        service = cls._services.get(key)
+        if service is None:
+            with cls._lock:
+                service = cls._services.get(key)
+                if service is None:
+                    service = service_class()
+                    cls._services[key] = service
+        return service
+
+    @classmethod
+    def reset(cls, provider: str = None):
+        """
+        Drops the cached services, for every provider or only the given one, so the
+        next get_service call builds new clients.
+        """
+        with cls._lock:
+            if provider is None:
+                cls._services.clear()
+            else:
+                for key in [key for key in cls._services if key[0] == provider]:
+                    del cls._services[key]
@@ -0,0 +1,149 @@
+import logging
+import threading
+
+from datetime import timedelta
+from typing import Dict
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from ..models.user_message import UserMessage
+from ..models.content_variation import ContentVariation
+from ..models.assistant_message import AssistantMessage
+
+# Uploaded images are written before their message is saved, so a file this new without
+# a message may still be about to get one.
+ORPHAN_IMAGE_GRACE = timedelta(hours=1)
+
+
+class MessageReaper:
+    """
+    Hard-deletes soft-deleted messages once they can no longer be recovered, along with
+    the content variations and uploaded images nothing refers to any more.
+
+    Rows are deleted in batches of `MESSAGE_REAPER_BATCH_SIZE`, each in its own short
+    transaction, so a large backlog doesn't hold a write lock for long. The web server
+    runs this every `MESSAGE_REAPER_INTERVAL` seconds on a background thread, and
+    `python manage.py reap_messages` runs it once.
+    """
+
+    _thread = None
+    _stop = threading.Event()
+    _lock = threading.Lock()
+
+    logger = logging.getLogger(__name__)
+
+    @classmethod
+    def reap(cls, batch_size: int = None, now=None) -> Dict[str, int]:
+        """
+        Runs one cleanup.
+
+        Args:
+            batch_size (int, optional): Rows deleted per transaction. Defaults to MESSAGE_REAPER_BATCH_SIZE.
+            now (datetime, optional): The time to measure the recovery window from. Defaults to now.
+
+        Returns:
+            Dict[str, int]: The number of assistant messages, user messages, content variations
+                and image files removed.
+        """
+        batch_size = batch_size or settings.MESSAGE_REAPER_BATCH_SIZE
+        now = now or timezone.now()
+        cutoff = now - timedelta(hours=settings.RECOVERY_HOURS or 24)
+
+        counts = {}
+        # Replies go first: a user message can't be deleted while a reply still points at it.
+        counts["assistant_messages"] = cls._delete_in_batches(
+            AssistantMessage.objects.filter(is_deleted=True, deleted_at__lt=cutoff), batch_size
+        )
+        counts["user_messages"] = cls._delete_in_batches(
+            UserMessage.objects.filter(is_deleted=True, deleted_at__lt=cutoff).filter(
+                ~Exists(AssistantMessage.objects.filter(generated_by=OuterRef("pk")))
+            ),
+            batch_size,
+        )
+        # Left behind by the replies above, and by conversations deleted with their messages.
+        counts["content_variations"] = cls._delete_in_batches(
+            ContentVariation.objects.filter(
+                ~Exists(
+                    AssistantMessage.content_variations.through.objects.filter(
+                        contentvariation=OuterRef("pk")
+                    )
+                )
+            ),
+            batch_size,
+        )
+        counts["images"] = cls.remove_orphan_images(now)
+
+        if any(counts.values()):
+            cls.logger.info(f"Reaped {counts}")
+        return counts
+
+    @staticmethod
+    def _delete_in_batches(queryset, batch_size: int) -> int:
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                ids = list(queryset.values_list("id", flat=True)[:batch_size])
+                if not ids:
+                    return deleted
+                queryset.model.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+    @staticmethod
+    def remove_orphan_images(now=None) -> int:
+        """
+        Deletes uploaded message images that no user message refers to.
+
+        Returns:
+            int: The number of files deleted.
+        """
+        upload_to = UserMessage._meta.get_field("image").upload_to
+        if not default_storage.exists(upload_to):
+            return 0
+
+        referenced = set(
+            UserMessage.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .values_list("image", flat=True)
+            .iterator()
+        )
+        cutoff = (now or timezone.now()) - ORPHAN_IMAGE_GRACE
+
+        removed = 0
+        _, files = default_storage.listdir(upload_to)
+        for file in files:
+            name = f"{upload_to}{file}"
+            if name in referenced or default_storage.get_modified_time(name) >= cutoff:
+                continue
+            default_storage.delete(name)
+            removed += 1
+
+        return removed
+
+    @classmethod
+    def start(cls):
+        """
+        Starts reaping every MESSAGE_REAPER_INTERVAL seconds on a daemon thread, unless the
+        interval is 0 or it is already running in this process.
+        """
+        if settings.MESSAGE_REAPER_INTERVAL <= 0:
+            return
+
+        with cls._lock:
+            if cls._thread is not None:
+                return
+            cls._thread = threading.Thread(target=cls._run, name="message-reaper", daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def _run(cls):
+        while not cls._stop.wait(settings.MESSAGE_REAPER_INTERVAL):
+            try:
+                cls.reap()
+            except Exception:
+                cls.logger.exception("Failed to reap deleted messages")
+            finally:
+                connection.close()
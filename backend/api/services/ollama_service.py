@@ -2,8 +2,9 @@ import os
 import asyncio
 import logging
 
+from contextlib import aclosing, closing
 from typing import List, Dict
-from ollama import Client, RequestError, ResponseError
+from ollama import AsyncClient, Client, RequestError, ResponseError
 from .base_llm_service import BaseLLMService
 from .tool_service import ToolManager
 
@@ -12,37 +13,65 @@ class OllamaService(BaseLLMService):
     A service class for interacting with an Ollama API.
     """
 
-    def __init__(self, endpoint: str = None, client: Client = None):
+    def __init__(self, endpoint: str = None, client: Client = None, async_client: AsyncClient = None):
         """
         Initializes the OllamaService.
 
         Args:
             endpoint (str, optional): The host URL for the Ollama API. Defaults to the environment variable OLLAMA_ENDPOINT.
             client (Client, optional): An instance of the Client class. If not provided, a new Client will be created using the specified endpoint.
+            async_client (AsyncClient, optional): An instance of the AsyncClient class used by chat_stream_async. If not provided, one is created using the specified endpoint.
         """
         self.logger = logging.getLogger(__name__)
-        self.client = client or Client(endpoint or os.getenv("OLLAMA_ENDPOINT", "http://localhost:11434"))
+        host = endpoint or os.getenv("OLLAMA_ENDPOINT", "http://localhost:11434")
+        # The hook lets a cancelled stream close the response it is reading (see StreamCancel).
+        self.client = client or Client(host, event_hooks={"response": [self.track_response]})
+        self.async_client = async_client or AsyncClient(host)
+        # How long Ollama keeps the model loaded after a request. While it is loaded, a prompt
+        # that starts like the previous one reuses its KV cache instead of prefilling again.
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
         self.tool_manager = ToolManager(tools_dir=os.path.join(os.getcwd(), "api", "tools"))
 
-    async def process_tool_calls(self, response):
+    async def process_tool_calls(self, tool_calls, tools):
+        """
+        Runs the tool calls of a reply, each distinct call once.
+
+        Args:
+            tool_calls: The tool calls of the model's reply.
+            tools (Dict[str, Dict]): The tools of this request, from ToolManager.load_tools.
+                The service is shared by every request, so the tools are passed along rather
+                than kept on it.
+
+        Returns:
+            Tuple[str, List[Dict]]: The results as text for the model, and the calls that returned one.
+        """
         seen_called_tools = set()
-        called_tools = []
-        tool_call_results = ""
-        for tool in response.message.tool_calls or []:
+        functions = []
+        for tool in tool_calls or []:
             entry = (tool.function.name, str(tool.function.arguments).lower())
             if entry in seen_called_tools:
                 continue
             seen_called_tools.add(entry)
-            try:
-                result = await self.tool_manager.run_tool(
-                    tool.function.name, **tool.function.arguments
-                )
-                if result:
-                    tool_call_results += f"Function call to tool {tool.function.name}:\n\tArguments: {tool.function.arguments}\n\tResult: {result}\n\n"
-                    called_tools.append(tool.function.dict())
-            except Exception as e:
-                print(f"\t  error: {e}")
-                tool_call_results += f"Function call to tool {tool.function.name}:\n\tArguments: {tool.function.arguments}\n\tResult: Error Occurred {e}, no result\n\n"
+            functions.append(tool.function)
+
+        # The calls are independent, so they run together and the turn waits for the slowest
+        # one. A call that fails or times out is reported as such, with the others' results.
+        results = await self.tool_manager.run_tools(
+            [(function.name, function.arguments or {}) for function in functions], tools
+        )
+
+        called_tools = []
+        tool_call_results = ""
+        for function, result in zip(functions, results):
+            if isinstance(result, asyncio.TimeoutError):
+                self.logger.warning(f"Tool {function.name} timed out")
+                tool_call_results += f"Function call to tool {function.name}:\n\tArguments: {function.arguments}\n\tResult: Timed out, no result\n\n"
+            elif isinstance(result, Exception):
+                print(f"\t  error: {result}")
+                tool_call_results += f"Function call to tool {function.name}:\n\tArguments: {function.arguments}\n\tResult: Error Occurred {result}, no result\n\n"
+            elif result:
+                tool_call_results += f"Function call to tool {function.name}:\n\tArguments: {function.arguments}\n\tResult: {result}\n\n"
+                called_tools.append(function.dict())
 
         return tool_call_results, called_tools
 
@@ -61,6 +90,8 @@ class OllamaService(BaseLLMService):
             model (str): The name of the model to use for the chat.
             messages (List[Dict[str, str]]): A list of dictionaries representing the messages in the conversation.
                 Each dictionary should have at least 'role' and 'content' keys.
+            use_tools (bool, optional): Whether the model may call the user's tools.
+            user_tools (List[str], optional): The ids of the user's tools, loaded for this request only.
 
         Returns:
             Dict: The response from the Ollama API.
@@ -76,18 +107,18 @@ class OllamaService(BaseLLMService):
         try:
             called_tools = None
             if use_tools and user_tools:
-                self.tool_manager.load_tools(valid_tools=user_tools)
-                tools = self.tool_manager.get_tools(user_tool_ids=user_tools)
+                tools = self.tool_manager.submit(self.tool_manager.load_tools(valid_tools=user_tools)).result()
 
                 if tools:
                     response = self.client.chat(
                         model=model,
                         messages=[self.map_payload_to_provider(message) for message in messages],
                         stream=False,
-                        tools=tools.values(),
+                        tools=[tool["schema"] for tool in tools.values()],
+                        keep_alive=self.keep_alive,
                     )
 
-                    data, called_tools = asyncio.run(self.process_tool_calls(response=response))
+                    data, called_tools = self.tool_manager.submit(self.process_tool_calls(response.message.tool_calls, tools)).result()
 
                     if data:
                         messages.append(
@@ -101,6 +132,7 @@ class OllamaService(BaseLLMService):
                 model=model,
                 messages=[self.map_payload_to_provider(message) for message in messages],
                 stream=False,
+                keep_alive=self.keep_alive,
             ).model_dump()
             response["tools_used"] = called_tools
 
@@ -124,6 +156,8 @@ class OllamaService(BaseLLMService):
             model (str): The name of the model to use for the chat.
             messages (List[Dict[str, str]]): A list of dictionaries representing the messages in the conversation.
                 Each dictionary should have at least 'role' and 'content' keys.
+            use_tools (bool, optional): Whether the model may call the user's tools.
+            user_tools (List[str], optional): The ids of the user's tools, loaded for this request only.
 
         Returns:
             Generator: A generator that yields responses from the Ollama API.
@@ -137,33 +171,94 @@ class OllamaService(BaseLLMService):
             }
             return
         try:
-            called_tools = None
+            tools = None
             if use_tools and user_tools:
-                self.tool_manager.load_tools(valid_tools=user_tools)
-                tools = self.tool_manager.get_tools(user_tool_ids=user_tools)
-
-                if tools:
-                    response = self.client.chat(
-                        model=model,
-                        messages=[self.map_payload_to_provider(message) for message in messages],
-                        stream=False,
-                        tools=tools.values(),
-                    )
+                tools = self.tool_manager.submit(self.tool_manager.load_tools(valid_tools=user_tools)).result()
+
+            # The first request is streamed too: its tokens go straight to the client, unless
+            # the model calls a tool, and only then is there a second request with the results.
+            tool_calls = []
+            # Closed together with this generator, which ends the request to Ollama.
+            with closing(self.client.chat(model=model, messages=[self.map_payload_to_provider(message) for message in messages], stream=True, tools=[tool["schema"] for tool in tools.values()] if tools else None, keep_alive=self.keep_alive)) as stream:
+                for response in stream:
+                    tool_calls.extend(response.message.tool_calls or [])
+                    if not tool_calls:
+                        yield self.map_stream_response(response, None)
+            if not tool_calls:
+                return
+
+            data, called_tools = self.tool_manager.submit(self.process_tool_calls(tool_calls, tools)).result()
+
+            self.logger.info(f"Called Tools: {called_tools}")
+
+            if data:
+                messages.append({
+                    "role": "user",
+                    "content": f"Utilize the following information from a tool call you just performed to answer the user's question. Don't reference the fact that you used a tool.\n\nDATA:\n{data}",
+                })
+
+            with closing(self.client.chat(model=model, messages=[self.map_payload_to_provider(message) for message in messages], stream=True, keep_alive=self.keep_alive)) as stream:
+                for response in stream:
+                    yield self.map_stream_response(response, called_tools)
+        except (RequestError, ResponseError) as e:
+            self.logger.error(f"API request failed: {e}")
+            yield {"error": str(e)}
 
-                    data, called_tools = asyncio.run(self.process_tool_calls(response=response))
+    async def chat_stream_async(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        use_tools: bool = False,
+        user_tools: List[str] | None = None,
+        **kwargs,
+    ):
+        """
+        Sends a message through the Ollama API with streaming enabled, without blocking a thread.
 
-                    self.logger.info(f"Called Tools: {called_tools}")
+        Args:
+            model (str): The name of the model to use for the chat.
+            messages (List[Dict[str, str]]): A list of dictionaries representing the messages in the conversation.
+                Each dictionary should have at least 'role' and 'content' keys.
+            use_tools (bool, optional): Whether the model may call the user's tools.
+            user_tools (List[str], optional): The ids of the user's tools, loaded for this request only.
 
-                    if data:
-                        messages.append({
-                            "role": "user",
-                            "content": f"Utilize the following information from a tool call you just performed to answer the user's question. Don't reference the fact that you used a tool.\n\nDATA:\n{data}",
-                        })
-
-            for response in self.client.chat(model=model, messages=[self.map_payload_to_provider(message) for message in messages], stream=True):
-                response = response.model_dump()
-                response["tools_used"] = called_tools
-                yield response
+        Returns:
+            AsyncGenerator: An async generator that yields responses from the Ollama API.
+        """
+        if not self.async_client:
+            yield {
+                "error": "Ollama Service is not initialized. Please ensure the .env has the OLLAMA_ENDPOINT variable set."
+            }
+            return
+        try:
+            tools = None
+            if use_tools and user_tools:
+                # On the tool loop like the tool calls: without tool processes, loading runs the scripts.
+                tools = await asyncio.wrap_future(self.tool_manager.submit(self.tool_manager.load_tools(valid_tools=user_tools)))
+
+            # Streamed from the first request, as in chat_stream.
+            tool_calls = []
+            async with aclosing(await self.async_client.chat(model=model, messages=[self.map_payload_to_provider(message) for message in messages], stream=True, tools=[tool["schema"] for tool in tools.values()] if tools else None, keep_alive=self.keep_alive)) as stream:
+                async for response in stream:
+                    tool_calls.extend(response.message.tool_calls or [])
+                    if not tool_calls:
+                        yield self.map_stream_response(response, None)
+            if not tool_calls:
+                return
+
+            data, called_tools = await asyncio.wrap_future(self.tool_manager.submit(self.process_tool_calls(tool_calls, tools)))
+
+            self.logger.info(f"Called Tools: {called_tools}")
+
+            if data:
+                messages.append({
+                    "role": "user",
+                    "content": f"Utilize the following information from a tool call you just performed to answer the user's question. Don't reference the fact that you used a tool.\n\nDATA:\n{data}",
+                })
+
+            async with aclosing(await self.async_client.chat(model=model, messages=[self.map_payload_to_provider(message) for message in messages], stream=True, keep_alive=self.keep_alive)) as stream:
+                async for response in stream:
+                    yield self.map_stream_response(response, called_tools)
         except (RequestError, ResponseError) as e:
             self.logger.error(f"API request failed: {e}")
             yield {"error": str(e)}
@@ -203,6 +298,20 @@ class OllamaService(BaseLLMService):
         except (RequestError, ResponseError) as e:
             return {"error": str(e)}
     
+    def map_stream_response(self, response, called_tools):
+        response = response.model_dump()
+        response["tools_used"] = called_tools
+        if response.get("done"):
+            # Ollama only counts the prompt tokens it had to evaluate, tokens reused from the
+            # KV cache show up as a shorter prompt_eval_count and prompt_eval_duration.
+            response["usage"] = self.make_usage(
+                input_tokens=response.get("prompt_eval_count"),
+                cached_input_tokens=None,
+                output_tokens=response.get("eval_count"),
+                prompt_ms=(response.get("prompt_eval_duration") or 0) / 1_000_000,
+            )
+        return response
+
     def map_payload_to_provider(self, message):
         mapped_message = {
             "role": message.get("role", "user"),
@@ -2,7 +2,7 @@ import os
 import logging
 
 from typing import Dict, List
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from .base_llm_service import BaseLLMService
 
 class OpenAIService(BaseLLMService):
@@ -10,7 +10,7 @@ class OpenAIService(BaseLLMService):
     A service class for interacting with OpenAI's Chat Completions API.
     """
 
-    def __init__(self, api_key: str = None, client: OpenAI = None):
+    def __init__(self, api_key: str = None, client: OpenAI = None, async_client: AsyncOpenAI = None):
         """
         Initializes the OpenAIService with the necessary API key for authentication.
 
@@ -20,8 +20,10 @@ class OpenAIService(BaseLLMService):
 
         if key := (api_key or os.getenv("OPENAI_API_KEY")):
             self.client = client or OpenAI(api_key=key)
+            self.async_client = async_client or AsyncOpenAI(api_key=key)
         else:
             self.client = None
+            self.async_client = None
 
         self.logger = logging.getLogger(__name__)
 
@@ -83,23 +85,77 @@ class OpenAIService(BaseLLMService):
             return
 
         try:
-            stream = self.client.chat.completions.create(
-                model=model, messages=[self.map_payload_to_provider(message) for message in messages], stream=True
-            )
+            with self.client.chat.completions.create(
+                model=model,
+                messages=[self.map_payload_to_provider(message) for message in messages],
+                stream=True,
+                stream_options={"include_usage": True},
+            ) as stream:
+                self.track_response(stream.response)
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content is not None:
+                        yield {
+                            "message": {
+                                "content": chunk.choices[0].delta.content,
+                                "role": "assistant",
+                            }
+                        }
+                    if chunk.usage:
+                        yield self.map_usage(chunk.usage)
+
+        except Exception as e:
+            self.logger.error(f"OpenAI API streaming request failed: {e}")
+            yield {"error": str(e)}
+
+    async def chat_stream_async(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        """
+        Sends a chat completion request to the OpenAI API with streaming enabled, without blocking a thread.
+
+        Args:
+            model (str): The name of the model to use for the chat.
+            messages (List[Dict[str, str]]): A list of dictionaries representing the chat messages.
 
-            for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    yield {
-                        "message": {
-                            "content": chunk.choices[0].delta.content,
-                            "role": "assistant",
+        Yields:
+            Dict: Stream chunks from the API containing partial chat completion data.
+        """
+        if not self.async_client:
+            yield {
+                "error": "OpenAI Service is not initialized. Please ensure the .env has the OPENAI_API_KEY variable set."
+            }
+            return
+
+        try:
+            async with await self.async_client.chat.completions.create(
+                model=model,
+                messages=[self.map_payload_to_provider(message) for message in messages],
+                stream=True,
+                stream_options={"include_usage": True},
+            ) as stream:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content is not None:
+                        yield {
+                            "message": {
+                                "content": chunk.choices[0].delta.content,
+                                "role": "assistant",
+                            }
                         }
-                    }
+                    if chunk.usage:
+                        yield self.map_usage(chunk.usage)
 
         except Exception as e:
             self.logger.error(f"OpenAI API streaming request failed: {e}")
             yield {"error": str(e)}
 
+    def map_usage(self, usage) -> Dict:
+        # OpenAI caches long prompt prefixes automatically; the history is always sent oldest
+        # first and unchanged, so each turn's prompt starts with the previous one.
+        details = usage.prompt_tokens_details
+        return self.usage_chunk(
+            input_tokens=usage.prompt_tokens,
+            cached_input_tokens=(details.cached_tokens or 0) if details else 0,
+            output_tokens=usage.completion_tokens,
+        )
+
     def get_models(self) -> Dict:
         if not self.client:
             return {
@@ -0,0 +1,197 @@
+import time
+import uuid
+import asyncio
+import threading
+
+from collections import deque
+from typing import Dict, List, Tuple
+from django.conf import settings
+
+
+class ReplayGapError(Exception):
+    """Raised when a subscriber asks for events that were already evicted from the buffer."""
+
+
+class StreamBuffer:
+    """
+    The SSE frames of one in-flight generation.
+
+    Frames are numbered from 1 and kept in a bounded ring buffer, so any number of
+    subscribers can read from a given event id and then follow the live tail. Sync
+    subscribers block on a condition, async ones await an event set from the
+    publishing thread.
+
+    A stream is cancelled explicitly with cancel(), or once it has had no subscribers
+    for a grace period (see cancel_if_abandoned).
+    """
+
+    def __init__(self, user_id: int, max_events: int):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.events = deque(maxlen=max_events)
+        self.last_id = 0
+        self.done = False
+        self.finished_at = None
+        self.condition = threading.Condition()
+        self.async_waiters = []
+        # The asyncio task producing the frames, when generation runs on an event loop.
+        self.task = None
+        # Called by cancel() to stop a producer thread (see StreamPublisher.run).
+        self.on_cancel = None
+        self.subscribers = 0
+        self.abandoned_at = None
+        self.cancel_reason = None
+
+    def publish(self, frame: bytes):
+        with self.condition:
+            self.last_id += 1
+            self.events.append(
+                (self.last_id, f"id: {self.id}:{self.last_id}\n".encode("utf-8") + frame)
+            )
+            self._notify()
+
+    def close(self):
+        with self.condition:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._notify()
+
+    def subscribe(self):
+        with self.condition:
+            self.subscribers += 1
+            self.abandoned_at = None
+
+    def unsubscribe(self):
+        with self.condition:
+            self.subscribers -= 1
+            if self.subscribers or self.done:
+                return
+            self.abandoned_at = abandoned_at = time.monotonic()
+
+        # Checked once the grace period has passed, not only when the next chunk comes.
+        if self.task:
+            loop = self.task.get_loop()
+            loop.call_soon_threadsafe(
+                loop.call_later, settings.STREAM_CANCEL_GRACE, self.cancel_if_abandoned, abandoned_at
+            )
+        else:
+            timer = threading.Timer(settings.STREAM_CANCEL_GRACE, self.cancel_if_abandoned, (abandoned_at,))
+            timer.daemon = True
+            timer.start()
+
+    def cancel(self, reason: str = "request") -> bool:
+        """
+        Stops generation right away: the producer task is cancelled, a producer thread is
+        told through on_cancel. Returns False if the stream already ended.
+        """
+        with self.condition:
+            if self.done or self.cancel_reason:
+                return False
+            self.cancel_reason = reason
+
+        if self.task:
+            self.task.get_loop().call_soon_threadsafe(self.task.cancel)
+        elif self.on_cancel:
+            self.on_cancel()
+        return True
+
+    def cancel_if_abandoned(self, since: float = None) -> bool:
+        """
+        Cancels the stream once it has had no subscribers for STREAM_CANCEL_GRACE seconds,
+        which leaves a dropped client time to resume. With `since`, cancels if nobody has
+        subscribed since the stream was abandoned at that time.
+        """
+        with self.condition:
+            if since is not None:
+                abandoned = self.subscribers == 0 and self.abandoned_at == since
+            else:
+                abandoned = (
+                    self.subscribers == 0
+                    and self.abandoned_at is not None
+                    and time.monotonic() - self.abandoned_at >= settings.STREAM_CANCEL_GRACE
+                )
+        return abandoned and self.cancel("disconnect")
+
+    def _notify(self):
+        self.condition.notify_all()
+        for loop, waiter in self.async_waiters:
+            loop.call_soon_threadsafe(waiter.set)
+        self.async_waiters = []
+
+    def _since(self, after_id: int) -> Tuple[List[Tuple[int, bytes]], bool]:
+        if self.events and after_id < self.events[0][0] - 1:
+            raise ReplayGapError(f"Events after {after_id} are no longer buffered.")
+        return [event for event in self.events if event[0] > after_id], self.done
+
+    def can_replay(self, after_id: int) -> bool:
+        with self.condition:
+            return not self.events or after_id >= self.events[0][0] - 1
+
+    def wait(self, after_id: int, timeout: float) -> Tuple[List[Tuple[int, bytes]], bool]:
+        """
+        Returns the events after `after_id` and whether the stream is done, blocking up to
+        `timeout` seconds for new ones.
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.done or self.last_id > after_id, timeout=timeout
+            )
+            return self._since(after_id)
+
+    async def wait_async(self, after_id: int, timeout: float) -> Tuple[List[Tuple[int, bytes]], bool]:
+        """
+        Async version of wait() for ASGI views.
+        """
+        waiter = asyncio.Event()
+        with self.condition:
+            if self.done or self.last_id > after_id:
+                return self._since(after_id)
+            self.async_waiters.append((asyncio.get_running_loop(), waiter))
+
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        with self.condition:
+            return self._since(after_id)
+
+
+class StreamBroker:
+    """
+    Process-wide registry of StreamBuffers. Finished streams stay available for
+    STREAM_REPLAY_TTL seconds so clients can still catch up after a reconnect. So does a
+    stream nobody is subscribed to, in case its producer died without closing it.
+    """
+
+    _streams: Dict[str, StreamBuffer] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def create(cls, user_id: int) -> StreamBuffer:
+        buffer = StreamBuffer(user_id=user_id, max_events=settings.STREAM_REPLAY_EVENTS)
+        with cls._lock:
+            cls._evict_expired()
+            cls._streams[buffer.id] = buffer
+        return buffer
+
+    @classmethod
+    def get(cls, stream_id: str, user_id: int) -> StreamBuffer | None:
+        with cls._lock:
+            cls._evict_expired()
+            buffer = cls._streams.get(str(stream_id))
+        if buffer is None or buffer.user_id != user_id:
+            return None
+        return buffer
+
+    @classmethod
+    def _evict_expired(cls):
+        now = time.monotonic()
+        expired = [
+            stream_id
+            for stream_id, buffer in cls._streams.items()
+            if (since := buffer.finished_at if buffer.done else buffer.abandoned_at) is not None
+            and now - since > settings.STREAM_REPLAY_TTL
+        ]
+        for stream_id in expired:
+            del cls._streams[stream_id]
@@ -0,0 +1,76 @@
+import json
+import time
+
+from typing import Dict
+from django.conf import settings
+
+
+class ChunkCoalescer:
+    """
+    Batches streamed provider chunks into fewer SSE frames.
+
+    The first chunk is sent as soon as it arrives. After that, content is held until
+    `window_ms` has passed since the last frame or `max_bytes` of content is waiting, and
+    goes out as one frame: the newest chunk with the buffered content joined into
+    `message.content`. A window of 0 sends one frame per chunk.
+
+    add() can only flush when a chunk arrives, so the caller waits for the next chunk for
+    at most remaining() seconds and calls flush() when that runs out. Content is then never
+    held back longer than the window, however slow the next token is.
+    """
+
+    def __init__(self, window_ms: int = None, max_bytes: int = None):
+        self.window = (settings.STREAM_COALESCE_MS if window_ms is None else window_ms) / 1000
+        self.max_bytes = settings.STREAM_COALESCE_BYTES if max_bytes is None else max_bytes
+        self.parts = []
+        self.size = 0
+        self.pending = None
+        self.last_flush = None
+
+    def add(self, chunk: Dict) -> bytes | None:
+        """
+        Buffers a chunk and returns a frame when one is due, otherwise None.
+        """
+        content = (chunk.get("message") or {}).get("content") or ""
+        self.parts.append(content)
+        # In bytes, as max_bytes is: non-ASCII text takes up to 4 per character.
+        self.size += len(content.encode("utf-8"))
+        self.pending = chunk
+
+        now = time.monotonic()
+        if (
+            self.last_flush is None
+            or now - self.last_flush >= self.window
+            or self.size >= self.max_bytes
+        ):
+            return self.flush(now)
+        return None
+
+    def remaining(self) -> float | None:
+        """
+        Returns the seconds until the buffered content is due, or None if nothing is buffered.
+        """
+        if self.pending is None:
+            return None
+        return max(self.last_flush + self.window - time.monotonic(), 0)
+
+    def flush(self, now: float = None) -> bytes | None:
+        """
+        Returns a frame for whatever is buffered, or None if nothing is.
+        """
+        if self.pending is None:
+            return None
+
+        chunk = self.pending
+        if len(self.parts) > 1:
+            chunk = {
+                **chunk,
+                "message": {**(chunk.get("message") or {}), "content": "".join(self.parts)},
+            }
+
+        self.parts = []
+        self.size = 0
+        self.pending = None
+        self.last_flush = now if now is not None else time.monotonic()
+
+        return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
@@ -0,0 +1,101 @@
+import logging
+import threading
+
+from typing import Dict
+
+
+class StreamMetrics:
+    """
+    Process-wide counters for streamed generations.
+
+    Tokens saved by a cancellation are estimated as the mean length of the completed
+    replies of the same model (of any model while there are none) minus what was
+    generated before the stream was cancelled.
+
+    Provider usage is summed per model, so the share of prompt tokens read from the
+    providers' prompt caches, and the prompt processing time, can be followed over time.
+    """
+
+    _lock = threading.Lock()
+    _counters = {
+        "streams_completed": 0,
+        "streams_cancelled": 0,
+        "tokens_generated": 0,
+        "tokens_before_cancel": 0,
+        "tokens_saved": 0,
+    }
+    _cancel_reasons: Dict[str, int] = {}
+    # model -> [completed streams, tokens generated by them]
+    _completed_by_model: Dict[str, list] = {}
+    _usage_by_model: Dict[str, Dict] = {}
+
+    logger = logging.getLogger(__name__)
+
+    @classmethod
+    def record_completed(cls, model: str, tokens: int):
+        with cls._lock:
+            cls._counters["streams_completed"] += 1
+            cls._counters["tokens_generated"] += tokens
+            completed = cls._completed_by_model.setdefault(model, [0, 0])
+            completed[0] += 1
+            completed[1] += tokens
+
+    @classmethod
+    def record_cancelled(cls, model: str, tokens: int, reason: str):
+        with cls._lock:
+            streams, generated = cls._completed_by_model.get(model, (0, 0))
+            if not streams:
+                streams = cls._counters["streams_completed"]
+                generated = cls._counters["tokens_generated"]
+            saved = max(generated // streams - tokens, 0) if streams else 0
+
+            cls._counters["streams_cancelled"] += 1
+            cls._counters["tokens_generated"] += tokens
+            cls._counters["tokens_before_cancel"] += tokens
+            cls._counters["tokens_saved"] += saved
+            cls._cancel_reasons[reason] = cls._cancel_reasons.get(reason, 0) + 1
+
+        cls.logger.info(
+            f"Stream cancelled ({reason}) for {model} after ~{tokens} tokens, ~{saved} tokens saved"
+        )
+
+    @classmethod
+    def record_usage(cls, model: str, usage: Dict):
+        """
+        Adds a request's usage, as returned by BaseLLMService.make_usage.
+        """
+        with cls._lock:
+            totals = cls._usage_by_model.setdefault(
+                model,
+                {
+                    "requests": 0,
+                    "input_tokens": 0,
+                    "cached_input_tokens": 0,
+                    "output_tokens": 0,
+                    "prompt_ms": 0.0,
+                    # Input tokens of the requests whose provider reports cache hits.
+                    "cache_reported_input_tokens": 0,
+                },
+            )
+            totals["requests"] += 1
+            for key in ("input_tokens", "cached_input_tokens", "output_tokens", "prompt_ms"):
+                totals[key] += usage.get(key) or 0
+            if usage.get("cached_input_tokens") is not None:
+                totals["cache_reported_input_tokens"] += usage.get("input_tokens") or 0
+
+    @classmethod
+    def snapshot(cls) -> Dict:
+        with cls._lock:
+            usage = {
+                model: {
+                    **totals,
+                    "cache_hit_rate": (
+                        round(totals["cached_input_tokens"] / totals["cache_reported_input_tokens"], 3)
+                        if totals["cache_reported_input_tokens"]
+                        else None
+                    ),
+                    "prompt_ms_per_request": round(totals["prompt_ms"] / totals["requests"], 1),
+                }
+                for model, totals in cls._usage_by_model.items()
+            }
+            return {**cls._counters, "cancel_reasons": dict(cls._cancel_reasons), "usage": usage}
@@ -0,0 +1,11 @@
+import math
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough, provider-independent token count (about four characters per token).
+
+    Used for bookkeeping and history budgets, where the providers' own tokenizers are
+    not available or too slow to run per message.
+    """
+    return math.ceil(len(text or "") / 4)
@@ -1,70 +1,637 @@
 import os
+import math
+import signal
+import asyncio
 import inspect
+import logging
+import functools
+import threading
 import importlib.util
-from typing import Callable, Dict, Any, List
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Coroutine, Dict, Any, List, Tuple
 
+import httpx
+from django.conf import settings
+from ollama._utils import convert_function_to_tool
 
-class ToolManager:
-    def __init__(self, tools_dir: str):
-        self.tools_dir = tools_dir
-        self.tools = {}
-
-    def load_tools(self, valid_tools: List[str] = None):
-        """Dynamically loads all tools from the tools directory."""
-        for file_name in os.listdir(self.tools_dir):
-            if file_name.endswith(".py"):
-                module_name = file_name[:-3]
-                if module_name in valid_tools:
-                    try:
-                        module_path = os.path.join(self.tools_dir, file_name)
-                        self._load_tool(module_name, module_path)
-                    except Exception as e:
-                        print(f"Failed to load tool!: {e}")
-
-    def _load_tool(self, module_name: str, module_path: str):
-        """Loads a single tool module."""
-        spec = importlib.util.spec_from_file_location(module_name, module_path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
 
-        # Find all callable functions in the module
-        for name, func in inspect.getmembers(module, inspect.isfunction):
-            if self._is_valid_tool(func):
-                self.tools[name] = {"id": module_name, "function": func}
+class ToolRegistry:
+    """
+    Process-wide cache of the compiled tool scripts, keyed by tool id, so a chat with tools
+    doesn't execute every script (and import its dependencies) again. With TOOL_PROCESSES
+    set it is only used in the tool processes; the server never imports a script itself.
+
+    An entry is compiled again when its file changes, by modification time or size, which
+    also catches a tool saved through another worker process, and is dropped right away
+    when the tool is saved or deleted here (ToolFileMixin).
+    """
+
+    # tool id -> ((st_mtime_ns, st_size) of the script, {function name: function})
+    _entries: Dict[str, Tuple[Tuple[int, int], Dict[str, Callable]]] = {}
+    _lock = threading.Lock()
+
+    logger = logging.getLogger(__name__)
+
+    @classmethod
+    def get(cls, tool_id: str, path: str) -> Dict[str, Callable]:
+        """
+        Returns the tool functions of a script, compiling it on first use or after a change.
 
+        Args:
+            tool_id (str): The id of the tool.
+            path (str): The path of its script.
+
+        Returns:
+            Dict[str, Callable]: The functions by name; empty if the script is missing or fails to load.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            cls.invalidate(tool_id)
+            return {}
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        entry = cls._entries.get(tool_id)
+        if entry is None or entry[0] != stamp:
+            with cls._lock:
+                entry = cls._entries.get(tool_id)
+                if entry is None or entry[0] != stamp:
+                    entry = (stamp, cls._load(tool_id, path))
+                    cls._entries[tool_id] = entry
+        return entry[1]
+
+    @classmethod
+    def invalidate(cls, tool_id=None):
+        """
+        Drops the compiled script of a tool, or of every tool, so the next use compiles it again.
+        """
+        with cls._lock:
+            if tool_id is None:
+                cls._entries.clear()
+            else:
+                cls._entries.pop(str(tool_id), None)
 
-    def _is_valid_tool(self, func: Callable) -> bool:
+    @classmethod
+    def _load(cls, tool_id: str, path: str) -> Dict[str, Callable]:
+        # A script that fails is cached as empty too, until its file changes.
+        try:
+            spec = importlib.util.spec_from_file_location(tool_id, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception as e:
+            cls.logger.error(f"Failed to load tool {tool_id}: {e}")
+            return {}
+
+        # Find all callable functions in the module
+        return {
+            name: func
+            for name, func in inspect.getmembers(module, inspect.isfunction)
+            if cls._is_valid_tool(func)
+        }
+
+    @staticmethod
+    def _is_valid_tool(func: Callable) -> bool:
         """Validates if a function is a valid tool."""
         # Ensure the function has type annotations and a docstring
         return bool(func.__annotations__) and bool(func.__doc__)
 
+
+class ToolManager:
+    # Shared by every manager in the process, created on first use.
+    _executor: ThreadPoolExecutor | None = None
+    _executor_lock = threading.Lock()
+    # The event loop tool calls run on, on a thread of its own, and the HTTP client that
+    # async tools share on it.
+    _loop: asyncio.AbstractEventLoop | None = None
+    _http_client: httpx.AsyncClient | None = None
+
+    def __init__(self, tools_dir: str):
+        self.tools_dir = tools_dir
+
+    async def load_tools(self, valid_tools: List[str] = None) -> Dict[str, Dict]:
+        """
+        Loads the given tools from the tools directory. With TOOL_PROCESSES set, a tool process
+        compiles each script and sends back its functions' schemas (ToolProcessPool.describe),
+        so the server never runs a tool's code; otherwise the scripts are compiled here, once
+        per process (ToolRegistry).
+
+        The manager keeps nothing of what it loads: the map is built for each call, so the
+        tools one request loads never reach another's.
+
+        Args:
+            valid_tools (List[str], optional): The ids of the tools to load.
+
+        Returns:
+            Dict[str, Dict]: The tools' functions by name, each with the "id" of its tool, the
+                "schema" to send the model and, when tools run in this process, the "function";
+                pass it on to run_tools.
+        """
+        tools = {}
+        for tool_id in valid_tools or []:
+            module_path = os.path.join(self.tools_dir, f"{tool_id}.py")
+            if settings.TOOL_PROCESSES:
+                try:
+                    schemas = await asyncio.wait_for(
+                        ToolProcessPool.describe(tool_id, module_path), settings.TOOL_CALL_TIMEOUT
+                    )
+                except (ToolProcessError, asyncio.TimeoutError) as e:
+                    ToolProcessPool.logger.error(f"Failed to load tool {tool_id}: {str(e) or 'timed out'}")
+                    continue
+                for name, schema in schemas.items():
+                    tools[name] = {"id": tool_id, "schema": schema}
+            else:
+                for name, func in ToolRegistry.get(tool_id, module_path).items():
+                    tools[name] = {"id": tool_id, "schema": tool_schema(func), "function": func}
+        return tools
+
     def is_async(self, func: Callable) -> bool:
         """Determines if a function is asynchronous."""
         return inspect.iscoroutinefunction(func)
 
-    def get_tools(self, user_tool_ids) -> Dict[str, Callable]:
-        """Returns the loaded tools."""
-        tools = {}
-        for name, tool in self.tools.items():
-            if tool["id"] in user_tool_ids:
-                tools[name] = tool["function"]
-        return tools
-    async def run_tool(self, tool_name: str, **kwargs) -> Any:
+    async def run_tool(self, tools: Dict[str, Dict], tool_name: str, arguments: Dict) -> Any:
         """
-        Executes a tool by name, handling async or sync calls.
+        Executes a tool by name, handling async or sync calls. With TOOL_PROCESSES set, the
+        call runs in one of the tool processes (ToolProcessPool); otherwise sync tools run on
+        the process's tool thread pool, so they don't block the event loop.
 
         Args:
+            tools (Dict[str, Dict]): The tools of the request, as returned by load_tools.
             tool_name (str): The name of the tool to run.
-            kwargs: Arguments to pass to the tool.
+            arguments (Dict): Arguments to pass to the tool.
 
         Returns:
             Any: The result of the tool execution.
         """
-        tool = self.tools.get(tool_name)["function"]
+        tool = tools.get(tool_name)
         if not tool:
             print(f"Tool '{tool_name}' not found.")
             return None
 
-        if self.is_async(tool):
-            return await tool(**kwargs)
-        return tool(**kwargs)
\ No newline at end of file
+        if settings.TOOL_PROCESSES:
+            path = os.path.join(self.tools_dir, f"{tool['id']}.py")
+            return await ToolProcessPool.run(tool["id"], path, tool_name, arguments)
+
+        function = tool["function"]
+        if self.is_async(function):
+            return await function(**arguments)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor(), functools.partial(function, **arguments)
+        )
+
+    async def run_tools(
+        self,
+        calls: List[Tuple[str, Dict]],
+        tools: Dict[str, Dict],
+        timeout: float = None,
+        concurrency: int = None,
+    ) -> List[Any]:
+        """
+        Executes tool calls concurrently, so they take as long as the slowest instead of
+        the sum of all of them.
+
+        Args:
+            calls (List[Tuple[str, Dict]]): The name and arguments of each call.
+            tools (Dict[str, Dict]): The tools of the request, as returned by load_tools.
+            timeout (float, optional): Seconds each call may take. Defaults to TOOL_CALL_TIMEOUT.
+            concurrency (int, optional): Calls run at a time. Defaults to TOOL_CALL_CONCURRENCY.
+
+        Returns:
+            List[Any]: The result of each call, in the same order; for a call that failed or
+                timed out, the exception it raised (asyncio.TimeoutError, or ToolProcessError
+                when it ran in a tool process).
+        """
+        timeout = settings.TOOL_CALL_TIMEOUT if timeout is None else timeout
+        semaphore = asyncio.Semaphore(concurrency or settings.TOOL_CALL_CONCURRENCY)
+
+        async def run(tool_name, arguments):
+            async with semaphore:
+                return await asyncio.wait_for(self.run_tool(tools, tool_name, arguments), timeout)
+
+        return await asyncio.gather(
+            *(run(tool_name, arguments) for tool_name, arguments in calls), return_exceptions=True
+        )
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=settings.TOOL_THREADS, thread_name_prefix="tool"
+                    )
+        return cls._executor
+
+    @classmethod
+    def loop(cls) -> asyncio.AbstractEventLoop:
+        """
+        Returns the process's tool event loop, started on first use and kept running, so a
+        tool turn pays no loop setup and async tools can keep connections open across turns.
+        """
+        if cls._loop is None:
+            with cls._executor_lock:
+                if cls._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="tool-loop", daemon=True).start()
+                    cls._loop = loop
+        return cls._loop
+
+    @classmethod
+    def submit(cls, coroutine: Coroutine) -> Future:
+        """
+        Runs a coroutine on the tool event loop, from any thread.
+
+        Args:
+            coroutine (Coroutine): The coroutine to run, e.g. a run_tools call.
+
+        Returns:
+            Future: Its result; wait on it with result(), or await asyncio.wrap_future(...)
+                from another event loop.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, cls.loop())
+
+    @classmethod
+    def http_client(cls) -> httpx.AsyncClient:
+        """
+        Returns the HTTP client async tools share, which pools connections across calls and
+        turns. Only usable from the tool event loop, i.e. in an async tool:
+
+            response = await ToolManager.http_client().get(url)
+        """
+        # Only ever made on the tool loop's thread, so it needs no lock.
+        if cls._http_client is None:
+            cls._http_client = httpx.AsyncClient(
+                timeout=settings.TOOL_CALL_TIMEOUT, follow_redirects=True,
+                limits=httpx.Limits(max_connections=settings.TOOL_HTTP_CONNECTIONS),
+            )
+        return cls._http_client
+
+
+class ToolProcessError(Exception):
+    """Raised for a tool call that failed in a tool process, or took the process down with it."""
+
+
+def tool_schema(function: Callable) -> Dict:
+    """The schema a tool function is sent to the model with, as the ollama client makes it from the function."""
+    return convert_function_to_tool(function).model_dump(exclude_none=True)
+
+
+def serve_tools(conn, preload: List[Tuple[str, str]], memory_mb: int, cpu_seconds: float):
+    """
+    The loop of a tool process: answers the requests sent over conn, one at a time, until it
+    is sent None or the server goes away. A request is ("call", tool id, path, function name,
+    arguments), which runs a tool function, or ("describe", tool id, path), which compiles a
+    script and returns the schemas of its functions by name.
+
+    Args:
+        conn: The process's end of its pipe to the server.
+        preload (List[Tuple[str, str]]): The id and path of the tools to compile up front.
+        memory_mb (int): The process's address space limit, in MB; 0 for none.
+        cpu_seconds (float): The CPU time each call may use; 0 for no limit.
+    """
+    import resource
+
+    # Ctrl+C on the server is the server's to handle; it stops this process in turn.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    for tool_id, path in preload:
+        ToolRegistry.get(tool_id, path)
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        op, tool_id, path, *call = request
+
+        # The CPU limit counts from the start of the process, so each request gets its seconds
+        # on top of those used so far. Going over sends SIGXCPU, which ends the process.
+        if cpu_seconds:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            limit = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+            resource.setrlimit(resource.RLIMIT_CPU, (limit, resource.getrlimit(resource.RLIMIT_CPU)[1]))
+
+        try:
+            functions = ToolRegistry.get(tool_id, path)
+            if op == "describe":
+                result = {name: tool_schema(function) for name, function in functions.items()}
+            else:
+                tool_name, arguments = call
+                function = functions.get(tool_name)
+                if function is None:
+                    raise LookupError(f"Tool '{tool_name}' not found.")
+                if inspect.iscoroutinefunction(function):
+                    result = ToolManager.submit(function(**arguments)).result()
+                else:
+                    result = function(**arguments)
+            reply = (True, result)
+        except Exception as e:
+            # Sent as text: the server can't always unpickle an exception class of the tool's.
+            reply = (False, str(e) or type(e).__name__)
+
+        try:
+            conn.send(reply)
+        except Exception:
+            # A result that doesn't pickle is sent as text, which is how the model sees it anyway.
+            conn.send((reply[0], str(reply[1])))
+
+
+class ToolProcess:
+    """A worker process of the ToolProcessPool and the server's end of its pipe."""
+
+    def __init__(self, process: multiprocessing.Process, conn):
+        self.process = process
+        self.conn = conn
+        self.calls = 0
+
+    @classmethod
+    def start(cls, preload: List[Tuple[str, str]]) -> "ToolProcess":
+        """
+        Starts a process, forked from the forkserver, which has imported this module (and with
+        it httpx and Django's settings) once for all of them. Like a spawned process, it runs
+        the main module again, which for a server's entry point does next to nothing.
+        """
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=serve_tools,
+            args=(child_conn, preload, settings.TOOL_PROCESS_MEMORY_MB, settings.TOOL_CALL_CPU_SECONDS),
+            name="tool",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return cls(process, conn)
+
+    async def call(self, request: Tuple) -> Tuple[bool, Any]:
+        """
+        Sends a request (see serve_tools) to the process, waiting for the reply on the event loop.
+
+        Returns:
+            Tuple[bool, Any]: Whether the request succeeded, and its result or the error's message.
+
+        Raises:
+            EOFError: The process ended during the request.
+        """
+        self.conn.send(request)
+
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        fd = self.conn.fileno()
+        loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
+        return self.conn.recv()
+
+    def stop(self, kill: bool = False):
+        """Asks the process to exit after its current call, or kills it right away."""
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.conn.close()
+
+
+class ToolProcessPool:
+    """
+    Process-wide pool of up to TOOL_PROCESSES tool processes, which run tool calls apart from
+    the server, so a slow or CPU-heavy tool doesn't hold a server thread and whatever memory
+    a tool leaks goes away with its process.
+
+    The processes also compile the scripts and return the schemas of their functions
+    (describe), so the server never imports a tool. A process keeps the tools it has used
+    compiled, starts with those the pool has used so far,
+    runs one call at a time under a memory (TOOL_PROCESS_MEMORY_MB) and CPU
+    (TOOL_CALL_CPU_SECONDS) limit, and is replaced after TOOL_PROCESS_MAX_CALLS calls. A call
+    that times out kills its process. Replacements start in the background, so calls find a
+    warm process.
+
+    All of the pool's state is used from the tool event loop only (ToolManager.loop), so it
+    needs no lock.
+    """
+
+    _idle: List[ToolProcess] = []
+    _size = 0
+    _waiters: deque = deque()
+    # tool id -> path of the tools used so far, compiled by each new process before its first call
+    _preload: Dict[str, str] = {}
+    # tool id -> ((st_mtime_ns, st_size) of the script, {function name: schema}), as in ToolRegistry
+    _schemas: Dict[str, Tuple[Tuple[int, int], Dict[str, Dict]]] = {}
+
+    logger = logging.getLogger(__name__)
+
+    @classmethod
+    async def run(cls, tool_id: str, path: str, tool_name: str, arguments: Dict) -> Any:
+        """
+        Runs a tool call in a tool process.
+
+        Args:
+            tool_id (str): The id of the tool.
+            path (str): The path of its script.
+            tool_name (str): The name of the function to call.
+            arguments (Dict): The arguments to call it with.
+
+        Returns:
+            Any: The result of the call.
+
+        Raises:
+            ToolProcessError: The tool raised, or its process ended during the call, e.g.
+                over its memory or CPU limit.
+        """
+        if asyncio.get_running_loop() is not ToolManager.loop():
+            return await asyncio.wrap_future(
+                ToolManager.submit(cls.run(tool_id, path, tool_name, arguments))
+            )
+        return await cls._request(("call", tool_id, path, tool_name, arguments), f"Tool {tool_name}")
+
+    @classmethod
+    async def describe(cls, tool_id: str, path: str, preload: bool = True) -> Dict[str, Dict]:
+        """
+        Returns the schemas of a script's tool functions, which a tool process compiles the
+        script for. They are kept until the file changes, by modification time or size.
+
+        Args:
+            tool_id (str): The id of the tool.
+            path (str): The path of its script.
+            preload (bool, optional): Whether new processes should compile the tool up front,
+                as for a tool that is in use.
+
+        Returns:
+            Dict[str, Dict]: The schemas by function name, see tool_schema; empty if the script
+                is missing or fails to load.
+
+        Raises:
+            ToolProcessError: The script took its process down, e.g. over its CPU limit.
+        """
+        if asyncio.get_running_loop() is not ToolManager.loop():
+            return await asyncio.wrap_future(ToolManager.submit(cls.describe(tool_id, path, preload)))
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            cls._schemas.pop(tool_id, None)
+            return {}
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        entry = cls._schemas.get(tool_id)
+        if entry is None or entry[0] != stamp:
+            entry = (stamp, await cls._request(("describe", tool_id, path), f"Loading tool {tool_id}", preload))
+            cls._schemas[tool_id] = entry
+        return entry[1]
+
+    @classmethod
+    async def _request(cls, request: Tuple, name: str, preload: bool = True) -> Any:
+        _, tool_id, path, *_ = request
+        if preload:
+            cls._preload[tool_id] = path
+        process = await cls._acquire()
+        try:
+            ok, value = await process.call(request)
+        except (EOFError, OSError):
+            cls._discard(process)
+            process.process.join(0.1)
+            code = process.process.exitcode
+            # e.g. SIGXCPU, over its CPU limit, or SIGKILL from the kernel's OOM killer
+            ending = f"killed by {signal.Signals(-code).name}" if code and code < 0 else f"exit code {code}"
+            raise ToolProcessError(f"{name} ended its process ({ending})")
+        except BaseException:
+            # Timed out or cancelled: the process may still be running the request.
+            cls._discard(process, kill=True)
+            raise
+
+        process.calls += 1
+        if process.calls >= settings.TOOL_PROCESS_MAX_CALLS:
+            cls._discard(process)
+        else:
+            cls._release(process)
+
+        if not ok:
+            raise ToolProcessError(value)
+        return value
+
+    @classmethod
+    def start(cls, tools_dir: str = None) -> Future | None:
+        """
+        Starts the pool's processes in the background, unless TOOL_PROCESSES is 0, so the
+        first tool calls find them warm. With `tools_dir`, also loads the schemas of the tools
+        in it, so the first turns with tools don't wait for a process to compile them.
+
+        Returns:
+            Future | None: Done once the schemas are loaded; None without tool processes.
+        """
+        if settings.TOOL_PROCESSES <= 0:
+            return None
+        ToolManager.loop().call_soon_threadsafe(cls._fill)
+        return ToolManager.submit(cls._describe_all(tools_dir))
+
+    @classmethod
+    async def _describe_all(cls, tools_dir: str = None):
+        paths = [
+            os.path.join(tools_dir, name)
+            for name in (os.listdir(tools_dir) if tools_dir and os.path.isdir(tools_dir) else [])
+            if name.endswith(".py") and name != "__init__.py"
+        ]
+        # Not preloaded by new processes: only the tools in use are.
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(
+                    cls.describe(os.path.basename(path)[:-3], path, preload=False),
+                    settings.TOOL_CALL_TIMEOUT,
+                )
+                for path in paths
+            ),
+            return_exceptions=True,
+        )
+        for path, result in zip(paths, results):
+            if isinstance(result, BaseException):
+                cls.logger.error(f"Failed to load tool {path}: {str(result) or 'timed out'}")
+
+    @classmethod
+    async def _acquire(cls) -> ToolProcess:
+        while True:
+            while cls._idle:
+                process = cls._idle.pop()
+                if process.process.is_alive():
+                    return process
+                cls._discard(process)
+            if cls._size < settings.TOOL_PROCESSES:
+                cls._size += 1
+                return await cls._start()
+
+            waiter = asyncio.get_running_loop().create_future()
+            cls._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Passed on to the next waiter, if it was woken for a process it won't take.
+                if waiter.done() and not waiter.cancelled():
+                    cls._wake()
+                raise
+
+    @classmethod
+    async def _start(cls) -> ToolProcess:
+        # Counted in _size already. Started on a thread, since starting blocks for a moment.
+        future = asyncio.get_running_loop().run_in_executor(
+            ToolManager.executor(), ToolProcess.start, list(cls._preload.items())
+        )
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Kept for the next call rather than left running.
+            future.add_done_callback(cls._started)
+            raise
+        except BaseException:
+            cls._size -= 1
+            cls._wake()
+            raise
+
+    @classmethod
+    def _started(cls, future):
+        if future.cancelled() or future.exception():
+            if not future.cancelled():
+                cls.logger.error(f"Failed to start a tool process: {future.exception()}")
+            cls._size -= 1
+            cls._wake()
+        else:
+            cls._release(future.result())
+
+    @classmethod
+    def _release(cls, process: ToolProcess):
+        cls._idle.append(process)
+        cls._wake()
+
+    @classmethod
+    def _discard(cls, process: ToolProcess, kill: bool = False):
+        """Stops a process and starts its replacement in the background."""
+        process.stop(kill=kill)
+        cls._size -= 1
+        cls._fill()
+
+    @classmethod
+    def _fill(cls):
+        loop = asyncio.get_running_loop()
+        while cls._size < settings.TOOL_PROCESSES:
+            cls._size += 1
+            loop.run_in_executor(
+                ToolManager.executor(), ToolProcess.start, list(cls._preload.items())
+            ).add_done_callback(cls._started)
+
+    @classmethod
+    def _wake(cls):
+        while cls._waiters:
+            waiter = cls._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
@@ -1,11 +1,30 @@
 from django.urls import path
 
 from .views.index import Index
-from .views.conversation import ConversationListCreateView, ConversationDetailView
+from .views.conversation import (
+    ConversationListCreateView,
+    ConversationDetailView,
+    ConversationMessagesView,
+    ConversationSearchView,
+    ConversationExportView,
+    ConversationImportView,
+)
 from .views.user_message import UserMessageListCreateView, UserMessageDetailView
-from .views.assistant_message import AssistantMessageListCreateView, AssistantMessageDetailView
+from .views.assistant_message import (
+    AssistantMessageListCreateView,
+    AssistantMessageBatchCreateView,
+    AssistantMessageDetailView,
+)
 from .views.model import ModelListCreateView, ModelDetailWithInfoView, ModelsPopulateAPIView
-from .views.chat import ChatAPIView, StreamChatAPIView
+from .views.chat import (
+    ChatAPIView,
+    StreamChatAPIView,
+    StreamResumeAPIView,
+    StreamCancelAPIView,
+    StreamMetricsAPIView,
+    AsyncStreamChatView,
+    AsyncStreamResumeView,
+)
 from .views.three_suggestions import ThreeSuggestionsAPIView
 from .views.tool import ToolsListCreateView, ToolsDetailView
 from .views.magic_title import MagicTitleAPIView
@@ -14,16 +33,26 @@ from .views.magic_title import MagicTitleAPIView
 urlpatterns = [
     path("", Index.as_view(), name="index"),
     path("conversations/", ConversationListCreateView.as_view(), name="conversations"),
+    path("conversations/search/", ConversationSearchView.as_view(), name="conversation-search"),
+    path("conversations/export/", ConversationExportView.as_view(), name="conversation-export"),
+    path("conversations/import/", ConversationImportView.as_view(), name="conversation-import"),
     path("conversations/<str:pk>/", ConversationDetailView.as_view(), name="conversation-detail"),
+    path("conversations/<uuid:pk>/messages/", ConversationMessagesView.as_view(), name="conversation-messages"),
     path("messages/user/", UserMessageListCreateView.as_view(), name="user-messages"),
     path("messages/user/<int:pk>/", UserMessageDetailView.as_view(), name="user-message-detail"),
     path("messages/assistant/", AssistantMessageListCreateView.as_view(), name="assistant-messages"),
+    path("messages/assistant/batch/", AssistantMessageBatchCreateView.as_view(), name="assistant-messages-batch"),
     path("messages/assistant/<int:pk>/", AssistantMessageDetailView.as_view(), name="assistant-message-detail"),
     path("models/", ModelListCreateView.as_view(), name="models"),
     path("models/<int:pk>/", ModelDetailWithInfoView.as_view(), name="models"),
     path("models/populate/", ModelsPopulateAPIView.as_view(), name="models-populate"),
     path("chat/", ChatAPIView.as_view(), name="chat"),
     path("chat/stream/", StreamChatAPIView.as_view(), name="chat-stream"),
+    path("chat/stream/async/", AsyncStreamChatView.as_view(), name="chat-stream-async"),
+    path("chat/stream/metrics/", StreamMetricsAPIView.as_view(), name="chat-stream-metrics"),
+    path("chat/stream/<uuid:stream_id>/", StreamResumeAPIView.as_view(), name="chat-stream-resume"),
+    path("chat/stream/<uuid:stream_id>/cancel/", StreamCancelAPIView.as_view(), name="chat-stream-cancel"),
+    path("chat/stream/async/<uuid:stream_id>/", AsyncStreamResumeView.as_view(), name="chat-stream-async-resume"),
     path("suggestions/", ThreeSuggestionsAPIView.as_view(), name="suggestions"),
     path("tools/", ToolsListCreateView.as_view(), name="tools"),
     path("tools/<str:pk>/", ToolsDetailView.as_view(), name="tools-detail"),
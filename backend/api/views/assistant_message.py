@@ -1,4 +1,9 @@
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import status
+from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
@@ -6,12 +11,89 @@ from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIV
 from ..models.assistant_message import AssistantMessage
 from ..models.content_variation import ContentVariation
 from ..models.user_message import UserMessage
-from ..models.conversation import Conversation
 from ..models.model import Model
+from ..repositories.assistant_message_repository import AssistantMessageRepository
 
 from ..serializers.assistant_message_serializer import AssistantMessageSerializer
 
 
+def parse_id(value) -> int | None:
+    # Ids are posted as numbers or strings ("12").
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def resolve_assistant_messages(user, items) -> Tuple[List[Dict] | None, str | None]:
+    """
+    Checks assistant messages posted by a user and turns them into the arguments of
+    AssistantMessageRepository.create_many, with one query for the user messages they reply
+    to and one for their models, however many there are.
+
+    Each item has 'generated_by' (a user message of the user), 'content_variations' (a list of
+    strings) and 'model', and optionally 'conversation' (which has to be the user message's),
+    'provider' (the model's by default), 'liked' and 'tools_used'.
+
+    Returns:
+        Tuple[List[Dict] | None, str | None]: The arguments, and None; or None and the error.
+    """
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return None, "Expected a list of messages."
+
+    user_messages = UserMessage.objects.filter(conversation__user=user).in_bulk(
+        {parse_id(item.get("generated_by")) for item in items} - {None}
+    )
+    models = Model.objects.in_bulk({parse_id(item.get("model")) for item in items} - {None})
+
+    messages = []
+    for index, item in enumerate(items):
+        prefix = f"Message {index}: " if len(items) > 1 else ""
+        user_message = user_messages.get(parse_id(item.get("generated_by")))
+        if user_message is None:
+            return None, f"{prefix}User message not found."
+        conversation_id = item.get("conversation")
+        if conversation_id is not None and str(conversation_id) != str(user_message.conversation_id):
+            return None, f"{prefix}The user message isn't in this conversation."
+        model = models.get(parse_id(item.get("model")))
+        if item.get("model") is not None and model is None:
+            return None, f"{prefix}Model not found."
+        provider = item.get("provider") or (model.provider if model else None)
+        if not provider:
+            return None, f"{prefix}No provider."
+        contents = item.get("content_variations", [])
+        if not isinstance(contents, list) or not all(isinstance(content, str) for content in contents):
+            return None, f"{prefix}content_variations has to be a list of strings."
+
+        messages.append(
+            {
+                "conversation_id": user_message.conversation_id,
+                "generated_by_id": user_message.id,
+                "model_id": model.id if model else None,
+                "provider": provider,
+                "contents": contents,
+                "tools_used": item.get("tools_used", []),
+                "liked": bool(item.get("liked", False)),
+                # Not stored, but saves the serializer a query per message.
+                "generated_by": user_message,
+                "model": model,
+            }
+        )
+    return messages, None
+
+
+def create_assistant_messages(messages: List[Dict]) -> List[AssistantMessage]:
+    assistant_messages = AssistantMessageRepository.create_many(messages)
+    for assistant_message, message in zip(assistant_messages, messages):
+        assistant_message.generated_by = message["generated_by"]
+        assistant_message.model = message["model"]
+    prefetch_related_objects(assistant_messages, "content_variations")
+    return assistant_messages
+
+
 class AssistantMessageListCreateView(ListCreateAPIView):
     queryset = None
     serializer_class = AssistantMessageSerializer
@@ -19,43 +101,50 @@ class AssistantMessageListCreateView(ListCreateAPIView):
 
     def get_queryset(self):
         return AssistantMessage.objects.filter(
-            conversation__user=self.request.user, is_delete=False
+            conversation__user=self.request.user, is_deleted=False
         )
 
     def post(self, request, *args, **kwargs):
-        # Get the conversation and model from the request
-        conversation_id = request.data.get("conversation")
-        model_id = request.data.get("model")
+        messages, error = resolve_assistant_messages(request.user, [request.data])
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Retrieve the conversation and model instances
-        conversation = Conversation.objects.get(
-            id=conversation_id, user=self.request.user
-        )
-        model = Model.objects.get(id=model_id)
-
-        # Retireve the user message used to generate this assistant message
-        user_message = UserMessage.objects.get(id=request.data.get("generated_by"))
-
-        # Create an AssistantMessage instance without committing to the database
-        assistant_message = AssistantMessage(
-            conversation=conversation,
-            model=model,
-            provider=request.data.get("provider"),
-            liked=request.data.get("liked", False),
-            generated_by=user_message,
-            tools_used=request.data.get("tools_used", [])
-        )
+        # Committed together, so a variation is never seen without its message (MessageReaper).
+        assistant_message = create_assistant_messages(messages)[0]
 
-        assistant_message.save()  # Save the AssistantMessage to generate an ID
+        serializer = self.get_serializer(assistant_message)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        content_variations_data = request.data.get("content_variations", [])
-        for content in content_variations_data:
-            # Create a new ContentVariation instance
-            content_variation = ContentVariation.objects.create(content=content)
-            # Associate it with the AssistantMessage
-            assistant_message.content_variations.add(content_variation)
 
-        serializer = self.get_serializer(assistant_message)
+class AssistantMessageBatchCreateView(APIView):
+    """
+    Creates many assistant messages at once, for imports and for replies of several models
+    to the same user message: {"messages": [...]}, each like a POST to messages/assistant/.
+    All of them are created in one transaction, or none if any is invalid.
+    """
+
+    permission_classes = [IsAuthenticated]
+    max_batch_size = 100
+
+    def post(self, request, *args, **kwargs):
+        items = request.data.get("messages") if isinstance(request.data, dict) else None
+        if not items:
+            return Response({"error": "messages is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if isinstance(items, list) and len(items) > self.max_batch_size:
+            return Response(
+                {"error": f"At most {self.max_batch_size} messages at a time."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        messages, error = resolve_assistant_messages(request.user, items)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        assistant_messages = create_assistant_messages(messages)
+
+        serializer = AssistantMessageSerializer(
+            assistant_messages, many=True, context={"request": request}
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -79,8 +168,9 @@ class AssistantMessageDetailView(RetrieveUpdateDestroyAPIView):
         # Add single content variation if provided
         new_content = request.data.get("new_content_variation", None)
         if new_content:
-            content_variation = ContentVariation.objects.create(content=new_content)
-            instance.content_variations.add(content_variation)
+            with transaction.atomic():
+                content_variation = ContentVariation.objects.create(content=new_content)
+                instance.content_variations.add(content_variation)
 
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         if serializer.is_valid():
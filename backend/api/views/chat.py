@@ -1,37 +1,469 @@
 import json
-from django.http import StreamingHttpResponse
+import queue
+import asyncio
+import threading
+from typing import Tuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.views import View
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
 
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
 from ..models.tool import Tool
+from ..models.model import Model
 from ..models.conversation import Conversation
-
-from ..serializers.conversation_detail_serializer import ConversationDetailSerializer
-
+from ..models.user_message import UserMessage
+
+from ..repositories.model_repository import ModelRepository
+from ..repositories.conversation_repository import ConversationRepository
+from ..repositories.assistant_message_repository import AssistantMessageRepository
+
+from ..services.stream_broker import ReplayGapError, StreamBroker
+from ..services.base_llm_service import StreamCancel
+from ..services.stream_metrics import StreamMetrics
+from ..services.token_counter import estimate_tokens
+from ..services.stream_coalescer import ChunkCoalescer
+from ..services.conversation_summarizer import ConversationSummarizer
 from ..services.llm_service_factory import LLMServiceFactory
 
+from .assistant_message import parse_id
+
 from users.models.settings import Settings
 
 
 def map_old_messages(messages):
+    # History images are only stored as file references, the providers expect the
+    # base64 payload, so older turns are sent as text only.
     new_messages = [
         {
-            "role": message["type"],
-            "content": (
-                message.get("content")
-                if message["type"] == "user"
-                else message["content_variations"][-1]["content"]
-            ),
-            "images": [message.get("image")] if message.get("image") else [],
+            "role": message["role"],
+            "content": message["content"],
+            "images": [],
         }
         for message in messages
     ]
     return new_messages
 
 
+def build_history(conversation, user_settings, model, provider):
+    """
+    Returns the prompt history for a chat request, ready to prepend to the new message.
+
+    With `compact_history` on, the turns up to `Conversation.summarized_until` are replaced
+    by the conversation's rolling summary, and a background refresh of the summary is
+    queued for the turns that have since fallen out of the window. Until SUMMARY_MIN_TURNS
+    of them would have, the window still starts at `summarized_until`.
+
+    The window drops old turns HISTORY_TRIM_BLOCK messages at a time, so consecutive
+    requests share their prompt prefix up to the newest turns.
+    """
+    token_budget = ModelRepository.get_history_token_budget(model, provider)
+
+    if not user_settings.compact_history:
+        return map_old_messages(
+            ConversationRepository.get_message_history(
+                conversation.id,
+                user_settings.message_history_count,
+                token_budget,
+                block=settings.HISTORY_TRIM_BLOCK,
+            )
+        )
+
+    summary = conversation.summary
+    history = ConversationRepository.get_message_history(
+        conversation.id,
+        user_settings.message_history_count,
+        max(token_budget - estimate_tokens(summary), 0),
+        since=conversation.summarized_until,
+        block=settings.HISTORY_TRIM_BLOCK,
+        keep=settings.SUMMARY_MIN_TURNS,
+    )
+
+    if history:
+        ConversationSummarizer.schedule_refresh(
+            conversation.id, history[0]["created_at"], model, provider
+        )
+
+    messages = map_old_messages(history)
+    if summary:
+        messages.insert(
+            0,
+            {
+                "role": "user",
+                "content": f"Summary of the earlier conversation:\n{summary}",
+                "images": [],
+            },
+        )
+    return messages
+
+
+class StreamedReply:
+    """
+    Collects a streamed reply so the stream views can store it as an AssistantMessage
+    when generation ends, instead of the client posting it back (the `persist` option).
+    """
+
+    def __init__(self, user_message, model_id, provider):
+        self.user_message = user_message
+        self.model_id = model_id
+        self.provider = provider
+        self.parts = []
+        self.tools_used = None
+        self.saved = None
+        self.discarded = False
+
+    @staticmethod
+    def resolve_model_id(data) -> Tuple[int | None, str | None]:
+        """
+        Finds the model a reply is stored with, checked before the stream starts rather
+        than failing when the reply is saved: `model_id` if given, otherwise the model with
+        the request's model name and provider, if there is one.
+
+        Returns:
+            Tuple[int | None, str | None]: The model's id (None if none matches the name),
+                and None; or None and the error.
+        """
+        if data.get("model_id") in (None, ""):
+            model_id = (
+                Model.objects.filter(model=data.get("model"), provider=data.get("provider"))
+                .values_list("id", flat=True)
+                .first()
+            )
+            return model_id, None
+
+        model_id = parse_id(data.get("model_id"))
+        if model_id is None or not Model.objects.filter(id=model_id).exists():
+            return None, "Model not found."
+        return model_id, None
+
+    @classmethod
+    def for_request(cls, data, user, model_id):
+        """
+        Returns a StreamedReply for the user message named by `generated_by`, or None if
+        that message does not belong to the user.
+        """
+        user_message = (
+            UserMessage.objects.filter(id=data.get("generated_by"), conversation__user=user)
+            .only("id", "conversation_id")
+            .first()
+        )
+        if not user_message:
+            return None
+        return cls(user_message, model_id, data.get("provider"))
+
+    def add(self, chunk):
+        if content := (chunk.get("message") or {}).get("content"):
+            self.parts.append(content)
+        if self.tools_used is None:
+            self.tools_used = chunk.get("tools_used")
+
+    def discard(self):
+        self.discarded = True
+
+    def save(self):
+        """
+        Stores the reply once; returns the new ids, or None if there was nothing to store.
+        """
+        if self.saved is None and self.parts and not self.discarded:
+            assistant_message = AssistantMessageRepository.create(
+                conversation_id=self.user_message.conversation_id,
+                generated_by_id=self.user_message.id,
+                model_id=self.model_id,
+                provider=self.provider,
+                contents=["".join(self.parts)],
+                tools_used=self.tools_used,
+            )
+            self.saved = {
+                "assistant_message": assistant_message.id,
+                "content_variations": [
+                    content_variation.id
+                    for content_variation in assistant_message.created_variations
+                ],
+            }
+        return self.saved
+
+
+def sse(data) -> bytes:
+    return f"data: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+class StreamPublisher:
+    """
+    Runs one generation into a StreamBuffer, independently of the request that started
+    it, so a client can drop, resume from its last event id and share the stream with
+    other subscribers without a second inference.
+
+    Generation stops, and the provider stream is closed, when the stream is cancelled
+    or abandoned by all of its subscribers (see StreamBuffer.cancel).
+    """
+
+    def __init__(self, buffer, model, reply=None):
+        self.buffer = buffer
+        self.model = model
+        self.reply = reply
+        self.coalescer = ChunkCoalescer()
+        self.generated = []
+        self.failed = False
+
+    def publish(self, chunk) -> bool:
+        """
+        Buffers a provider chunk; returns False when it is an error and generation should stop.
+        """
+        if not chunk or isinstance(chunk, str):
+            return True
+
+        if "error" in chunk:
+            self.failed = True
+            if self.reply:
+                self.reply.discard()
+            if frame := self.coalescer.flush():
+                self.buffer.publish(frame)
+            self.buffer.publish(sse({"message": chunk}))
+            return False
+
+        if content := (chunk.get("message") or {}).get("content"):
+            self.generated.append(content)
+
+        if usage := chunk.get("usage"):
+            StreamMetrics.record_usage(self.model, usage)
+
+        if self.reply:
+            self.reply.add(chunk)
+
+        if frame := self.coalescer.add(chunk):
+            self.buffer.publish(frame)
+        return True
+
+    def finish(self):
+        if frame := self.coalescer.flush():
+            self.buffer.publish(frame)
+
+        if self.reply and self.reply.save():
+            self.buffer.publish(sse({"saved": self.reply.saved}))
+
+    def close(self):
+        if reason := self.buffer.cancel_reason:
+            # Subscribers still get, and `persist` still stores, what was generated so far.
+            self.finish()
+            self.buffer.publish(sse({"cancelled": reason}))
+        elif self.reply:
+            # Keep what was generated if the provider stream broke off part way.
+            self.reply.save()
+
+        if not self.failed:
+            tokens = estimate_tokens("".join(self.generated))
+            if self.buffer.cancel_reason:
+                StreamMetrics.record_cancelled(self.model, tokens, self.buffer.cancel_reason)
+            else:
+                StreamMetrics.record_completed(self.model, tokens)
+
+        self.buffer.close()
+
+    def close_and_release(self):
+        try:
+            self.close()
+        finally:
+            # This runs after the request that started the stream has finished, and so
+            # after Django last checked this thread's connection.
+            close_old_connections()
+
+    def flush_due(self):
+        # The coalescing window ran out before the next chunk came.
+        if frame := self.coalescer.flush():
+            self.buffer.publish(frame)
+
+    def run(self, chunks):
+        """
+        Drains a sync provider stream; meant to run on its own thread.
+
+        The provider stream is read on a second thread, so this one can wait for the next
+        chunk with a timeout and send buffered content when its coalescing window ends. A
+        cancel wakes it right away and closes the provider's responses (see StreamCancel),
+        rather than waiting for a chunk that may be a tool call or a slow first token away.
+        """
+        received = queue.Queue()
+        cancel = StreamCancel()
+
+        def read():
+            try:
+                with cancel:
+                    for chunk in chunks:
+                        if cancel.cancelled:
+                            break
+                        received.put((chunk, None))
+            except Exception as e:
+                received.put((None, e))
+            finally:
+                chunks.close()
+                received.put(None)
+                connection.close()
+
+        def stop():
+            cancel.cancel()
+            received.put(None)
+
+        self.buffer.on_cancel = stop
+        if self.buffer.cancel_reason:
+            stop()
+
+        threading.Thread(target=read, name="stream-reader", daemon=True).start()
+        try:
+            while True:
+                try:
+                    item = received.get(timeout=self.coalescer.remaining())
+                except queue.Empty:
+                    self.flush_due()
+                    continue
+                if self.buffer.cancel_reason:
+                    return
+                if item is None:
+                    break
+                chunk, error = item
+                if error is not None:
+                    raise error
+                if not self.publish(chunk):
+                    return
+            self.finish()
+        except Exception as e:
+            self.publish({"error": str(e)})
+        finally:
+            cancel.cancel()
+            self.close()
+            connection.close()
+
+    async def run_async(self, chunks):
+        """
+        Drains an async provider stream; meant to run as a task on the event loop, which
+        StreamBuffer.cancel cancels.
+
+        The next chunk is awaited as a task of its own, so the wait can time out when the
+        coalescing window ends without cancelling the provider stream.
+        """
+        chunks = aiter(chunks)
+        next_chunk = None
+        try:
+            while True:
+                if next_chunk is None:
+                    next_chunk = asyncio.ensure_future(anext(chunks))
+                done, _ = await asyncio.wait({next_chunk}, timeout=self.coalescer.remaining())
+                if not done:
+                    self.flush_due()
+                    continue
+                try:
+                    chunk = next_chunk.result()
+                except StopAsyncIteration:
+                    break
+                next_chunk = None
+                if not self.publish(chunk):
+                    return
+            await sync_to_async(self.finish)()
+        except Exception as e:
+            self.publish({"error": str(e)})
+        finally:
+            try:
+                # Ends the provider stream, which closes its HTTP response: by cancelling the
+                # pending read, or closing the generator if it is suspended between chunks.
+                if next_chunk is not None and not next_chunk.done():
+                    next_chunk.cancel()
+                elif hasattr(chunks, "aclose"):
+                    await chunks.aclose()
+            finally:
+                await sync_to_async(self.close_and_release)()
+
+
+# Sent while a subscriber waits for the model, so proxies keep the connection open.
+KEEP_ALIVE_FRAME = b": keep-alive\n\n"
+KEEP_ALIVE_SECONDS = 15
+
+
+def last_event_id(request) -> int:
+    """
+    Reads the position to resume from, sent as `Last-Event-ID` ("<stream id>:<n>" or "<n>")
+    or as the `last_event_id` query parameter. 0 replays the stream from the start.
+    """
+    value = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id") or ""
+    try:
+        return max(int(value.rpartition(":")[2]), 0)
+    except ValueError:
+        return 0
+
+
+def subscribe(buffer, after_id=0):
+    buffer.subscribe()
+    try:
+        while True:
+            try:
+                events, done = buffer.wait(after_id, timeout=KEEP_ALIVE_SECONDS)
+            except ReplayGapError:
+                # Fell behind the ring buffer, the client has to resume (and gets a 410).
+                return
+
+            for after_id, frame in events:
+                yield frame
+
+            if done and not events:
+                return
+            if not events:
+                yield KEEP_ALIVE_FRAME
+    finally:
+        # Also runs when the client disconnects.
+        buffer.unsubscribe()
+
+
+async def subscribe_async(buffer, after_id=0):
+    buffer.subscribe()
+    try:
+        while True:
+            try:
+                events, done = await buffer.wait_async(after_id, timeout=KEEP_ALIVE_SECONDS)
+            except ReplayGapError:
+                return
+
+            for after_id, frame in events:
+                yield frame
+
+            if done and not events:
+                return
+            if not events:
+                yield KEEP_ALIVE_FRAME
+    finally:
+        buffer.unsubscribe()
+
+
+def event_stream_response(content, buffer, methods="POST, OPTIONS"):
+    response = StreamingHttpResponse(content, content_type="text/event-stream")
+
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    response["X-Stream-ID"] = buffer.id
+    response["Access-Control-Allow-Origin"] = "*"
+    response["Access-Control-Allow-Headers"] = "Authorization, Content-Type, Last-Event-ID"
+    response["Access-Control-Allow-Methods"] = methods
+    response["Access-Control-Allow-Credentials"] = "true"
+    response["Access-Control-Expose-Headers"] = "X-Stream-ID"
+
+    return response
+
+
+def resume_error(buffer, after_id):
+    """
+    Returns why a stream cannot be resumed from `after_id` as (error, status), or None.
+    """
+    if buffer is None:
+        return "Stream not found", status.HTTP_404_NOT_FOUND
+    if not buffer.can_replay(after_id):
+        return "Stream events are no longer buffered", status.HTTP_410_GONE
+    return None
+
+
 class ChatAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -68,14 +500,7 @@ class ChatAPIView(APIView):
                         status=status.HTTP_404_NOT_FOUND,
                     )
 
-                messages = (
-                    map_old_messages(
-                        ConversationDetailSerializer(conversation).data.get(
-                            "messages", []
-                        )[-user_settings.message_history_count + 1 : -1]
-                    )
-                    + messages
-                )
+                messages = build_history(conversation, user_settings, model, provider) + messages
 
             self.llm_service = LLMServiceFactory.get_service(provider)
 
@@ -152,14 +577,7 @@ class StreamChatAPIView(APIView):
                         status=status.HTTP_404_NOT_FOUND,
                     )
 
-                messages = (
-                    map_old_messages(
-                        ConversationDetailSerializer(conversation).data.get(
-                            "messages", []
-                        )[-user_settings.message_history_count + 1 : -1]
-                    )
-                    + messages
-                )
+                messages = build_history(conversation, user_settings, model, provider) + messages
 
             if not self.llm_service:
                 return Response(
@@ -167,35 +585,38 @@ class StreamChatAPIView(APIView):
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 )
 
-            def stream_response():
-                for chunk in self.llm_service.chat_stream(
-                    model=model,
-                    messages=messages,
-                    use_tools=use_tools,
-                    user_tools=user_tools,
-                ):
-                    if chunk and not isinstance(chunk, str):
-                        if "error" in chunk:
-                            return Response(
-                                {"message": chunk},
-                                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            )
-
-                        data = f"data: {json.dumps(chunk)}\n\n"
-                        yield data.encode("utf-8")
-
-            response = StreamingHttpResponse(
-                stream_response(), content_type="text/event-stream"
-            )
+            reply = None
+            if request.data.get("persist"):
+                model_id, error = StreamedReply.resolve_model_id(request.data)
+                if error:
+                    return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
-            response["Cache-Control"] = "no-cache"
-            response["X-Accel-Buffering"] = "no"
-            response["Access-Control-Allow-Origin"] = "*"
-            response["Access-Control-Allow-Headers"] = "Authorization, Content-Type"
-            response["Access-Control-Allow-Methods"] = "POST, OPTIONS"
-            response["Access-Control-Allow-Credentials"] = "true"
+                reply = StreamedReply.for_request(request.data, request.user, model_id)
 
-            return response
+                if not reply:
+                    return Response(
+                        {"error": "User message not found"},
+                        status=status.HTTP_404_NOT_FOUND,
+                    )
+
+            # Generation runs on its own thread and outlives this response, the
+            # client can reconnect through StreamResumeAPIView.
+            buffer = StreamBroker.create(request.user.id)
+            publisher = StreamPublisher(buffer, model, reply)
+            threading.Thread(
+                target=publisher.run,
+                args=(
+                    self.llm_service.chat_stream(
+                        model=model,
+                        messages=messages,
+                        use_tools=use_tools,
+                        user_tools=user_tools,
+                    ),
+                ),
+                daemon=True,
+            ).start()
+
+            return event_stream_response(subscribe(buffer), buffer)
 
         except Settings.DoesNotExist:
             return Response(
@@ -206,3 +627,201 @@ class StreamChatAPIView(APIView):
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class StreamResumeAPIView(APIView):
+    """
+    Replays a stream started by one of the stream views from `Last-Event-ID` and then
+    follows it live. Any number of clients can subscribe to the same stream.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, stream_id):
+        buffer = StreamBroker.get(stream_id, request.user.id)
+        after_id = last_event_id(request)
+
+        if error := resume_error(buffer, after_id):
+            return Response({"error": error[0]}, status=error[1])
+
+        return event_stream_response(subscribe(buffer, after_id), buffer, "GET, OPTIONS")
+
+
+class StreamCancelAPIView(APIView):
+    """
+    Stops a running stream and closes its provider stream.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, stream_id):
+        buffer = StreamBroker.get(stream_id, request.user.id)
+
+        if buffer is None:
+            return Response({"error": "Stream not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({"cancelled": buffer.cancel()}, status=status.HTTP_200_OK)
+
+
+class StreamMetricsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(StreamMetrics.snapshot(), status=status.HTTP_200_OK)
+
+
+class AsyncAPIView(View):
+    """
+    Base for the async views used under ASGI (see backend/asgi.py). DRF views are
+    sync-only, so token authentication is done here directly and the handlers get the
+    user on `request.user`.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token authenticated like the DRF views, which are CSRF exempt as well.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def authenticate(self, request):
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            user_auth = await sync_to_async(authentication_class().authenticate)(request)
+            if user_auth is not None:
+                return user_auth[0]
+        return None
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user = await self.authenticate(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        if user is None or not user.is_active:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncStreamChatView(AsyncAPIView):
+    """
+    Async variant of StreamChatAPIView.
+
+    The provider stream is consumed with the services' async clients, so an open
+    stream holds no worker thread while the model is generating.
+    """
+
+    async def post(self, request):
+        user = request.user
+
+        # A body that isn't a JSON object is the client's error, like the sync view's parse errors.
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError as e:
+            return JsonResponse(
+                {"error": f"Invalid JSON: {e}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not isinstance(data, dict):
+            return JsonResponse(
+                {"error": "Expected a JSON object"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            user_settings = await Settings.objects.aget(user=user)
+            user_tools = [str(tool.id) async for tool in Tool.objects.filter(user=user)]
+            model = data.get("model")
+            provider = data.get("provider")
+            messages = [data.get("message")]
+            conversation_id = data.get("conversation")
+            use_tools = True if data.get("use_tools") else False
+
+            if not model or not provider or not messages:
+                return JsonResponse(
+                    {"error": "Model, message, and provider are required"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            # The first call for a provider builds its SDK clients, keep that off the event loop.
+            llm_service = await sync_to_async(LLMServiceFactory.get_service, thread_sensitive=False)(provider)
+
+            if user_settings.use_message_history and conversation_id:
+                conversation = await Conversation.objects.filter(
+                    id=conversation_id, user=user
+                ).afirst()
+
+                if not conversation:
+                    return JsonResponse(
+                        {"error": "Conversation not found"},
+                        status=status.HTTP_404_NOT_FOUND,
+                    )
+
+                messages = (
+                    await sync_to_async(build_history)(conversation, user_settings, model, provider)
+                    + messages
+                )
+
+            if not llm_service:
+                return JsonResponse(
+                    {"error": f"'{provider}' is an invalid provider."},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+            reply = None
+            if data.get("persist"):
+                model_id, error = await sync_to_async(StreamedReply.resolve_model_id)(data)
+                if error:
+                    return JsonResponse({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+                reply = await sync_to_async(StreamedReply.for_request)(data, user, model_id)
+
+                if not reply:
+                    return JsonResponse(
+                        {"error": "User message not found"},
+                        status=status.HTTP_404_NOT_FOUND,
+                    )
+
+            # The task outlives this response, the client can reconnect through
+            # AsyncStreamResumeView.
+            buffer = StreamBroker.create(user.id)
+            publisher = StreamPublisher(buffer, model, reply)
+            buffer.task = asyncio.create_task(
+                publisher.run_async(
+                    llm_service.chat_stream_async(
+                        model=model,
+                        messages=messages,
+                        use_tools=use_tools,
+                        user_tools=user_tools,
+                    )
+                )
+            )
+
+            return event_stream_response(subscribe_async(buffer), buffer)
+
+        except Settings.DoesNotExist:
+            return JsonResponse(
+                {"error": "User settings not found."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            return JsonResponse(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class AsyncStreamResumeView(AsyncAPIView):
+    """
+    Async variant of StreamResumeAPIView.
+    """
+
+    async def get(self, request, stream_id):
+        buffer = StreamBroker.get(stream_id, request.user.id)
+        after_id = last_event_id(request)
+
+        if error := resume_error(buffer, after_id):
+            return JsonResponse({"error": error[0]}, status=error[1])
+
+        return event_stream_response(subscribe_async(buffer, after_id), buffer, "GET, OPTIONS")
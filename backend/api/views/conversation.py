@@ -1,51 +1,132 @@
-import pytz
+import uuid
+import base64
 import datetime
+from typing import Iterator
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import status
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 
-from ..serializers.conversation_serializer import ConversationSerializer
+from ..serializers.conversation_serializer import ConversationSerializer, ConversationListSerializer
 from ..serializers.conversation_detail_serializer import ConversationDetailSerializer
 
 from ..models.conversation import Conversation
+from ..repositories.conversation_repository import ConversationRepository
+from ..repositories.search_repository import SearchRepository
+from ..services.conversation_archive import ConversationArchive
+
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def encode_cursor(*parts) -> str:
+    """
+    Encodes the sort key of the last row of a page as an opaque cursor.
+    """
+    return base64.urlsafe_b64encode("|".join(str(part) for part in parts).encode()).decode()
+
+
+def decode_cursor(cursor: str, count: int) -> list:
+    """
+    Decodes a cursor from encode_cursor into its `count` parts, as strings.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    parts = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    if len(parts) != count:
+        raise ValueError("Malformed cursor")
+    return parts
+
+
+def join_lines(lines: Iterator[str], size: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Joins lines into chunks of about `size` bytes, so a streamed response isn't written a
+    line at a time.
+    """
+    parts, length = [], 0
+    for line in lines:
+        part = line.encode()
+        parts.append(part)
+        length += len(part)
+        if length >= size:
+            yield b"".join(parts)
+            parts, length = [], 0
+    if parts:
+        yield b"".join(parts)
+
+
+async def iterate_in_thread(iterator: Iterator):
+    """
+    Serves a sync iterator as an async one, a chunk at a time, all in the same thread as
+    its database connection. Under ASGI, Django reads a sync iterator to the end before
+    sending any of it.
+    """
+    try:
+        while (chunk := await sync_to_async(next)(iterator, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(iterator.close)()
 
 
 class ConversationListCreateView(ListCreateAPIView):
     queryset = None
     serializer_class = ConversationSerializer
     permission_classes = [IsAuthenticated]
+    page_size = 50
+    max_page_size = 200
 
     def get_queryset(self):
         return Conversation.objects.filter(user=self.request.user)
 
     def get(self, request):
-        conversations = self.get_queryset()
-        serializer = self.get_serializer(conversations, many=True)
-
-        utc = pytz.UTC  # UTC timezone instance
+        """
+        Returns the user's conversations, newest first, grouped for the sidebar.
 
-        for conversation in serializer.data:
-            # Parse and make the `created_at` aware of UTC
-            created_at = datetime.datetime.fromisoformat(
-                conversation["created_at"].replace("Z", "+00:00")
-            ).astimezone(utc)
-
-            # Get current time in UTC
-            now_utc = datetime.datetime.now(datetime.UTC)
+        With `limit` (or a `cursor`), returns a page of them as `results`, with the URL of the
+        next page as `next`. With `preview=true`, each conversation also has its
+        `message_count` and a `preview` of its newest message.
+        """
+        paginate = "limit" in request.query_params or "cursor" in request.query_params
+        try:
+            limit = int(request.query_params.get("limit", self.page_size)) if paginate else None
+            before = None
+            if cursor := request.query_params.get("cursor"):
+                created_at, conversation_id = decode_cursor(cursor, 2)
+                before = datetime.datetime.fromisoformat(created_at), uuid.UUID(conversation_id)
+        except ValueError:
+            return Response(
+                {"error": "Invalid limit or cursor."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if limit is not None:
+            limit = max(1, min(limit, self.max_page_size))
 
-            # Calculate the time difference in days
-            days_difference = (now_utc.date() - created_at.date()).days
+        conversations, next_key = ConversationRepository.get_conversations(
+            request.user.id,
+            limit=limit,
+            before=before,
+            with_preview=request.query_params.get("preview") in ("1", "true"),
+        )
+        data = ConversationListSerializer(conversations, many=True).data
 
-            if days_difference == 0:
-                conversation["grouping"] = "Today"
-            elif days_difference <= 7:
-                conversation["grouping"] = "This Week"
-            elif now_utc.month == created_at.month:
-                conversation["grouping"] = "This Month"
-            else:
-                conversation["grouping"] = "Old"
+        if not paginate:
+            return Response(data)
 
-        return Response(serializer.data)
+        next_url = None
+        if next_key:
+            created_at, conversation_id = next_key
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                "cursor",
+                encode_cursor(created_at.isoformat(), conversation_id),
+            )
+        return Response({"results": data, "next": next_url})
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -71,3 +152,110 @@ class ConversationDetailView(RetrieveUpdateDestroyAPIView):
 
     def perform_update(self, serializer):
         serializer.save(user=self.request.user)
+
+
+class ConversationMessagesView(APIView):
+    """
+    Returns a conversation's messages a page at a time, newest page first, each page oldest
+    first. `next` is the URL of the page before it, or None once the start is reached.
+    """
+
+    permission_classes = [IsAuthenticated]
+    page_size = 50
+    max_page_size = 200
+
+    def get(self, request, pk):
+        conversation = get_object_or_404(Conversation, id=pk, user=request.user)
+
+        try:
+            limit = int(request.query_params.get("limit", self.page_size))
+            before = None
+            if cursor := request.query_params.get("cursor"):
+                created_at, message_id, message_type = decode_cursor(cursor, 3)
+                if message_type not in ("user", "assistant"):
+                    raise ValueError(f"Unknown message type {message_type}")
+                before = datetime.datetime.fromisoformat(created_at), int(message_id), message_type
+        except ValueError:
+            return Response(
+                {"error": "Invalid limit or cursor."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, self.max_page_size))
+
+        messages, next_key = ConversationRepository.get_message_page(
+            conversation.id, limit, before
+        )
+
+        next_url = None
+        if next_key:
+            created_at, message_id, message_type = next_key
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                "cursor",
+                encode_cursor(created_at.isoformat(), message_id, message_type),
+            )
+
+        serializer = ConversationDetailSerializer(context={"request": request})
+        return Response(
+            {"results": serializer.serialize_messages(messages), "next": next_url}
+        )
+
+
+class ConversationSearchView(APIView):
+    """
+    Searches the user's conversation titles and messages. `q` is the words to search for,
+    all of which have to match, and `limit` the most matches to return, best first.
+    """
+
+    permission_classes = [IsAuthenticated]
+    page_size = 20
+    max_page_size = 100
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "Missing search query."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get("limit", self.page_size))
+        except ValueError:
+            return Response({"error": "Invalid limit."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.max_page_size))
+
+        return Response({"results": SearchRepository.search(request.user.id, query, limit)})
+
+
+class ConversationExportView(APIView):
+    """
+    Streams all of the user's conversations as NDJSON, see ConversationArchive.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        content = join_lines(ConversationArchive.export(request.user.id))
+        if isinstance(request._request, ASGIRequest):
+            content = iterate_in_thread(content)
+
+        response = StreamingHttpResponse(content, content_type="application/x-ndjson")
+        response["Content-Disposition"] = 'attachment; filename="conversations.ndjson"'
+        return response
+
+
+class ConversationImportView(APIView):
+    """
+    Imports an NDJSON export from the request body as new conversations of the user,
+    reading it a line at a time. Returns the number of rows imported of each kind.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.stream is None:
+            return Response({"error": "Nothing to import."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            counts = ConversationArchive.import_lines(request.user, request.stream)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(counts, status=status.HTTP_201_CREATED)
@@ -7,6 +7,7 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
 from ..services.llm_service_factory import LLMServiceFactory
+from ..services.conversation_summarizer import PROMPTS, ConversationSummarizer
 from ..models.conversation import Conversation
 from ..models.user_message import UserMessage
 from ..models.assistant_message import AssistantMessage
@@ -14,11 +15,6 @@ from ..models.assistant_message import AssistantMessage
 from ..serializers.assistant_message_serializer import AssistantMessageSerializer
 from ..serializers.user_message_serializer import UserMessageSerializer
 
-PROMPTS = {
-    "title": "Generate a concise, creative title for the following conversation using the provided summary. Always start and end the title with an emoji. Return only the title, no other text or markdown. Always return text. If there is no conversation, make a random title.",
-    "summary": "Create a summary of the following conversation. Return only the summary, no other text or markdown.",
-}
-
 
 class MagicTitleAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -72,19 +68,7 @@ class MagicTitleAPIView(APIView):
             else:
                 messages_string += f"{message['type']}: {message['content']}\n"
 
-        summary_response = self.llm_service.chat(
-            model=model,
-            messages=[
-                {
-                    "role": "assistant",
-                    "content": PROMPTS.get("summary"),
-                },
-                {
-                    "role": "user",
-                    "content": f"MESSAGE HISTORY:\n{messages_string}"
-                }
-            ],
-        )
+        summary_response = ConversationSummarizer.summarize(self.llm_service, model, messages_string)
 
         if "error" in summary_response:
             return Response(summary_response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 
 from ..models.tool import Tool
+from ..services.tool_service import ToolRegistry
 
 from ..serializers.tool_serializer import ToolSerializer
 
@@ -16,6 +17,7 @@ class ToolFileMixin:
         script_file_path = os.path.join(os.getcwd(), "api", "tools", f"{tool.id}.py")
         with open(script_file_path, "w") as file:
             file.write(tool.script.replace("\r", ""))
+        ToolRegistry.invalidate(tool.id)
 
     def delete_script_file(self, tool):
         script_file_path = os.path.join(os.getcwd(), "api", "tools", f"{tool.id}.py")
@@ -24,6 +26,7 @@ class ToolFileMixin:
             os.remove(script_file_path)
         else:
             print(f"Tried to delete tool {tool.id} but path {script_file_path} did not exist!")
+        ToolRegistry.invalidate(tool.id)
 
 
 class ToolsListCreateView(ToolFileMixin, ListCreateAPIView):
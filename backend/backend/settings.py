@@ -75,18 +75,79 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "backend.wsgi.application"
+ASGI_APPLICATION = "backend.asgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLITE_PROFILE=production (the default) sets SQLite up for concurrent requests: WAL lets
+# reads run while a write commits, IMMEDIATE transactions take the write lock when they
+# start, so writers queue for up to SQLITE_BUSY_TIMEOUT ms instead of failing with
+# "database is locked", and connections are kept for CONN_MAX_AGE seconds instead of
+# opened per request. SQLITE_PROFILE=default leaves Django's stock settings.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000))
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": SQLITE_BUSY_TIMEOUT,
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 128 * 1024 * 1024)),
+    # Negative sizes are in KiB.
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", 32 * 1024)),
+    "temp_store": "MEMORY",
+}
+
+# DB_ENGINE=postgresql uses the POSTGRES_* settings instead of SQLite. Connections come
+# from a psycopg pool of POSTGRES_POOL_MIN_SIZE to POSTGRES_POOL_MAX_SIZE connections per
+# process, and a request waits up to POSTGRES_POOL_TIMEOUT seconds for one. Behind
+# PgBouncer (POSTGRES_PGBOUNCER=True), which pools on the server side, Django's pool is
+# off and server-side cursors are disabled, as transaction pooling doesn't support them.
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite")
+POSTGRES_PGBOUNCER = os.getenv("POSTGRES_PGBOUNCER", "False") == "True"
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
     }
 }
 
+if DB_ENGINE == "postgresql":
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.getenv("POSTGRES_DB", "bruh"),
+        "USER": os.getenv("POSTGRES_USER", "postgres"),
+        "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+        "HOST": os.getenv("POSTGRES_HOST", "localhost"),
+        "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
+    }
+    if POSTGRES_PGBOUNCER:
+        DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+    else:
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.getenv("POSTGRES_POOL_TIMEOUT", 10)),
+        }
+elif SQLITE_PROFILE == "production":
+    DATABASES["default"].update(
+        {
+            "CONN_MAX_AGE": int(os.getenv("CONN_MAX_AGE", 600)),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "transaction_mode": "IMMEDIATE",
+                "timeout": SQLITE_BUSY_TIMEOUT / 1000,
+                # Run on every new connection.
+                "init_command": ";".join(
+                    f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()
+                ),
+            },
+        }
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -177,3 +238,63 @@ CSRF_TRUSTED_ORIGINS = [
 CSRF_COOKIE_HTTPONLY = False
 
 RECOVERY_HOURS = 24
+
+# Streamed chat output is sent in frames of at most one per STREAM_COALESCE_MS
+# (0 sends every provider chunk as its own frame) or once STREAM_COALESCE_BYTES
+# of text is waiting; text never waits longer than STREAM_COALESCE_MS for a frame.
+STREAM_COALESCE_MS = int(os.getenv("STREAM_COALESCE_MS", 30))
+STREAM_COALESCE_BYTES = int(os.getenv("STREAM_COALESCE_BYTES", 2048))
+
+# Streams are buffered in memory so clients can resume them with Last-Event-ID: up to
+# STREAM_REPLAY_EVENTS frames per stream, kept STREAM_REPLAY_TTL seconds after it ends.
+STREAM_REPLAY_EVENTS = int(os.getenv("STREAM_REPLAY_EVENTS", 4096))
+STREAM_REPLAY_TTL = int(os.getenv("STREAM_REPLAY_TTL", 300))
+
+# A stream nobody is subscribed to is cancelled after STREAM_CANCEL_GRACE seconds,
+# which is how long a dropped client has to resume it.
+STREAM_CANCEL_GRACE = float(os.getenv("STREAM_CANCEL_GRACE", 5))
+
+# Tokens of conversation history sent with a prompt, for models without their own
+# `history_token_budget`.
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 2048))
+
+# Old messages leave the history window HISTORY_TRIM_BLOCK at a time rather than one per
+# turn, so the start of the prompt stays the same, and cached, for that many turns
+# (1 slides the window a message at a time).
+HISTORY_TRIM_BLOCK = int(os.getenv("HISTORY_TRIM_BLOCK", 8))
+
+# With `compact_history` on, turns that fall out of the history window are folded into
+# the conversation's rolling summary once at least SUMMARY_MIN_TURNS of them are waiting,
+# at most SUMMARY_MAX_TURNS per refresh.
+SUMMARY_MIN_TURNS = int(os.getenv("SUMMARY_MIN_TURNS", 6))
+SUMMARY_MAX_TURNS = int(os.getenv("SUMMARY_MAX_TURNS", 40))
+
+# Soft-deleted messages past RECOVERY_HOURS, and the content variations and images left
+# without a message, are hard-deleted every MESSAGE_REAPER_INTERVAL seconds by the web
+# server (0 turns it off, e.g. to run `manage.py reap_messages` from cron instead),
+# MESSAGE_REAPER_BATCH_SIZE rows per transaction.
+MESSAGE_REAPER_INTERVAL = float(os.getenv("MESSAGE_REAPER_INTERVAL", 3600))
+MESSAGE_REAPER_BATCH_SIZE = int(os.getenv("MESSAGE_REAPER_BATCH_SIZE", 500))
+
+# The tool calls a model asks for in one turn run concurrently, at most
+# TOOL_CALL_CONCURRENCY at a time, and each is given up on after TOOL_CALL_TIMEOUT
+# seconds. Run in the server process (TOOL_PROCESSES = 0, below), tools that aren't async
+# run on a pool of TOOL_THREADS threads per process, and a sync tool that times out keeps
+# its thread until it returns.
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", 30))
+TOOL_CALL_CONCURRENCY = int(os.getenv("TOOL_CALL_CONCURRENCY", 4))
+TOOL_THREADS = int(os.getenv("TOOL_THREADS", 8))
+
+# Tool calls run on one long-lived event loop per process, where async tools share an
+# HTTP client (ToolManager.http_client) keeping up to TOOL_HTTP_CONNECTIONS connections.
+TOOL_HTTP_CONNECTIONS = int(os.getenv("TOOL_HTTP_CONNECTIONS", 20))
+
+# Tool calls run in a pool of up to TOOL_PROCESSES worker processes per server process
+# (0 runs them in the server process), apart from the server, which then never imports a
+# tool script: the workers also read the tools' signatures. Each call may use
+# TOOL_CALL_CPU_SECONDS of CPU time, each process TOOL_PROCESS_MEMORY_MB of address space
+# (0 for no limit), and a process is replaced after TOOL_PROCESS_MAX_CALLS calls.
+TOOL_PROCESSES = int(os.getenv("TOOL_PROCESSES", 4))
+TOOL_CALL_CPU_SECONDS = float(os.getenv("TOOL_CALL_CPU_SECONDS", 10))
+TOOL_PROCESS_MEMORY_MB = int(os.getenv("TOOL_PROCESS_MEMORY_MB", 1024))
+TOOL_PROCESS_MAX_CALLS = int(os.getenv("TOOL_PROCESS_MAX_CALLS", 200))
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_wsgi_application()
+
+# Imported once the apps are loaded.
+from api.services.message_reaper import MessageReaper  # noqa: E402
+from api.services.tool_service import ToolProcessPool  # noqa: E402
+
+MessageReaper.start()
+ToolProcessPool.start(os.path.join(os.getcwd(), "api", "tools"))
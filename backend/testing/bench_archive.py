@@ -0,0 +1,161 @@
+"""
+Benchmark for the NDJSON export and import of conversations (ConversationArchive).
+
+Seeds a scratch test database of the configured engine (DB_ENGINE in settings.py) with one
+user's conversations, exports them to a file, imports the file for a second user, and
+prints the time and throughput of each direction, and with --trace-memory their peak
+memory use, measured on a second run with tracemalloc:
+
+    python testing/bench_archive.py --messages 1000000
+    DB_ENGINE=postgresql POSTGRES_HOST=localhost python testing/bench_archive.py
+
+With the defaults, an assistant reply of about 2 KB per turn, a million messages make an
+export of about 1.3 GB.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--database", default="/tmp/bench_archive.sqlite3", help="the SQLite database file")
+parser.add_argument("--output", default="/tmp/bench_archive.ndjson")
+parser.add_argument("--messages", type=int, default=1_000_000)
+parser.add_argument("--turns-per-conversation", type=int, default=20)
+parser.add_argument("--reply-size", type=int, default=2000)
+parser.add_argument("--batch-size", type=int, default=1000)
+parser.add_argument("--trace-memory", action="store_true")
+args = parser.parse_args()
+
+from django.conf import settings
+
+if settings.DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+    settings.DATABASES["default"]["TEST"] = {"NAME": args.database}
+# With DEBUG, every query is kept in connection.queries, which would be counted as memory use.
+settings.DEBUG = False
+
+import django
+
+django.setup()
+
+from django.db import connection, transaction
+from django.contrib.auth.models import User
+
+from api.models.model import Model
+from api.models.conversation import Conversation
+from api.models.user_message import UserMessage
+from api.models.assistant_message import AssistantMessage
+from api.models.content_variation import ContentVariation
+from api.services.conversation_archive import ConversationArchive
+
+BATCH_SIZE = 5000
+SYLLABLES = ["ka", "lo", "mi", "ten", "ra", "su", "vel", "dor", "an", "pi", "qua", "zen", "ur", "bex"]
+# Words drawn with a Zipf distribution, like natural language, as the search index (api
+# migration 0016) is filled on insert and costs more per distinct word.
+WORDS = list(itertools.islice(("".join(parts) for parts in itertools.product(SYLLABLES, repeat=3)), 2000))
+WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(WORDS) + 1)))
+
+
+def text(length):
+    words = random.choices(WORDS, cum_weights=WEIGHTS, k=length // 6)
+    return " ".join(words)[:length]
+
+
+def seed(user):
+    random.seed(0)
+    model = Model.objects.create(name="bench", model="bench", provider="ollama")
+    replies = [text(args.reply_size) for _ in range(1000)]
+
+    turns = args.turns_per_conversation
+    conversations = max(args.messages // (2 * turns), 1)
+    for start in range(0, conversations, 500):
+        with transaction.atomic():
+            batch = Conversation.objects.bulk_create(
+                [Conversation(user=user, title=text(40)) for _ in range(start, min(start + 500, conversations))]
+            )
+            user_messages = UserMessage.objects.bulk_create(
+                [UserMessage(conversation=conversation, content=text(200)) for conversation in batch for _ in range(turns)],
+                batch_size=BATCH_SIZE,
+            )
+            variations = ContentVariation.objects.bulk_create(
+                [ContentVariation(content=random.choice(replies)) for _ in user_messages], batch_size=BATCH_SIZE
+            )
+            assistant_messages = AssistantMessage.objects.bulk_create(
+                [
+                    AssistantMessage(
+                        conversation_id=user_message.conversation_id,
+                        generated_by=user_message,
+                        model=model,
+                        provider="ollama",
+                    )
+                    for user_message in user_messages
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            AssistantMessage.content_variations.through.objects.bulk_create(
+                [
+                    AssistantMessage.content_variations.through(
+                        assistantmessage_id=assistant_message.id, contentvariation_id=variation.id
+                    )
+                    for assistant_message, variation in zip(assistant_messages, variations)
+                ],
+                batch_size=BATCH_SIZE,
+            )
+        print(f"  seeded {min(start + 500, conversations)}/{conversations} conversations", flush=True)
+
+
+def measure(name, run, size):
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    line = f"{name:<8}{elapsed:>10.1f}s{size / elapsed / 2**20:>10.1f} MB/s"
+
+    if args.trace_memory:
+        tracemalloc.start()
+        run()
+        line += f"{tracemalloc.get_traced_memory()[1] / 2**20:>10.1f} MB peak"
+        tracemalloc.stop()
+    print(line, flush=True)
+    return result
+
+
+def export(user):
+    with open(args.output, "w", encoding="utf-8") as output:
+        for line in ConversationArchive.export(user.id):
+            output.write(line)
+
+
+def load(user):
+    with open(args.output, encoding="utf-8") as lines:
+        return ConversationArchive.import_lines(user, lines, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    old_name = settings.DATABASES["default"]["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    source = User.objects.create(username="source", password="!")
+    target = User.objects.create(username="target", password="!")
+    print(f"Seeding {connection.settings_dict['NAME']} ...", flush=True)
+    started = time.perf_counter()
+    seed(source)
+    print(f"Seeded in {time.perf_counter() - started:.0f}s\n")
+
+    export(source)
+    size = os.path.getsize(args.output)
+    print(f"{connection.vendor}: {size / 2**20:.0f} MB export\n")
+
+    measure("export", lambda: export(source), size)
+    counts = measure("import", lambda: load(target), size)
+    print(f"\n{counts} per import")
+
+    os.remove(args.output)
+    connection.creation.destroy_test_db(old_name, verbosity=0)
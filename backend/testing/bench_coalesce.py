@@ -0,0 +1,85 @@
+"""
+Benchmark for SSE chunk coalescing.
+
+Feeds Ollama-shaped chunks into ChunkCoalescer at a fixed token rate and reports the
+frames and bytes sent and the CPU time spent building them, per stream, for each
+coalescing window:
+
+    python testing/bench_coalesce.py --tokens 500 --rate 80 --windows 0 30 100
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.services.stream_coalescer import ChunkCoalescer
+
+
+def make_chunk(index: int, done: bool = False) -> dict:
+    # Same keys as OllamaService.chat_stream yields (ChatResponse.model_dump()).
+    return {
+        "model": "llama3.1",
+        "created_at": "2025-01-01T00:00:00.000000Z",
+        "done": done,
+        "done_reason": "stop" if done else None,
+        "total_duration": None,
+        "load_duration": None,
+        "prompt_eval_count": None,
+        "prompt_eval_duration": None,
+        "eval_count": None,
+        "eval_duration": None,
+        "message": {
+            "role": "assistant",
+            "content": "" if done else f" token{index}",
+            "images": None,
+            "tool_calls": None,
+        },
+        "tools_used": None,
+    }
+
+
+def run(tokens: int, rate: float, window_ms: int, max_bytes: int) -> dict:
+    coalescer = ChunkCoalescer(window_ms=window_ms, max_bytes=max_bytes)
+    frames = 0
+    sent = 0
+    cpu = 0.0
+    delay = 1 / rate
+    started = time.perf_counter()
+
+    for index in range(tokens + 1):
+        chunk = make_chunk(index, done=index == tokens)
+        time.sleep(delay)
+
+        cpu_started = time.process_time()
+        frame = coalescer.add(chunk)
+        if index == tokens:
+            frame = frame or coalescer.flush()
+        cpu += time.process_time() - cpu_started
+
+        if frame:
+            frames += 1
+            sent += len(frame)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "window_ms": window_ms,
+        "frames": frames,
+        "frames_per_s": round(frames / elapsed, 1),
+        "bytes": sent,
+        "cpu_ms_per_stream": round(cpu * 1000, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=80, help="tokens per second")
+    parser.add_argument("--windows", type=int, nargs="+", default=[0, 30, 100])
+    parser.add_argument("--max-bytes", type=int, default=2048)
+    args = parser.parse_args()
+
+    print(json.dumps([run(args.tokens, args.rate, window, args.max_bytes) for window in args.windows], indent=4))
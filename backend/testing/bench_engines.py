@@ -0,0 +1,173 @@
+"""
+Chat path database benchmark for SQLite and PostgreSQL (DB_ENGINE in settings.py).
+
+Runs each engine in its own process, with its settings from the environment, against a
+scratch test database seeded with a conversation. Times the queries of a chat turn one
+at a time (median ms), then runs whole turns from several threads, each handling its
+connection as a request does, so PostgreSQL takes connections from its pool:
+
+    DB_ENGINE=postgresql POSTGRES_HOST=localhost python testing/bench_engines.py --threads 8
+
+The engines to compare are taken from --engines; PostgreSQL is reached with the
+POSTGRES_* variables, which must be set in the environment.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--engines", nargs="+", default=["sqlite", "postgresql"])
+parser.add_argument("--turns", type=int, default=200, help="turns in the seeded conversation")
+parser.add_argument("--repeat", type=int, default=200)
+parser.add_argument("--threads", type=int, default=8)
+parser.add_argument("--seconds", type=float, default=10)
+parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+
+def median_ms(run) -> float:
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def benchmark() -> dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+    import django
+    from django.conf import settings
+
+    directory = tempfile.mkdtemp()
+    # A file rather than SQLite's in-memory test database, which threads can't share.
+    settings.DATABASES["default"]["TEST"] = {"NAME": os.path.join(directory, "bench.sqlite3")}
+    django.setup()
+
+    from django.db import connection, close_old_connections
+    from django.contrib.auth.models import User
+
+    from api.models.model import Model
+    from api.models.conversation import Conversation
+    from api.models.user_message import UserMessage
+    from api.models.assistant_message import AssistantMessage
+    from api.repositories.conversation_repository import ConversationRepository
+    from api.repositories.assistant_message_repository import AssistantMessageRepository
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        user = User.objects.create(username="bench", password="!")
+        model = Model.objects.create(name="bench", model="bench", provider="ollama")
+        conversation = Conversation.objects.create(user=user, title="bench")
+        for index in range(50):
+            Conversation.objects.create(user=user, title=f"bench {index}")
+
+        def turn():
+            user_message = UserMessage.objects.create(conversation=conversation, content="How fast is it?")
+            ConversationRepository.get_message_history(conversation.id, 20)
+            assistant_message = AssistantMessageRepository.create(
+                conversation_id=conversation.id,
+                generated_by_id=user_message.id,
+                model_id=model.id,
+                provider=model.provider,
+                contents=["Fast enough." * 20],
+                tools_used=["weather"],
+            )
+            AssistantMessage.objects.filter(id=assistant_message.id).update(liked=True)
+
+        for _ in range(args.turns):
+            turn()
+        user_message = UserMessage.objects.create(conversation=conversation, content="Hello")
+
+        queries = {
+            "save user message": lambda: UserMessage.objects.create(conversation=conversation, content="Hello"),
+            "message history": lambda: ConversationRepository.get_message_history(conversation.id, 20),
+            "save reply": lambda: AssistantMessageRepository.create(
+                conversation_id=conversation.id,
+                generated_by_id=user_message.id,
+                model_id=model.id,
+                provider=model.provider,
+                contents=["Hi."],
+            ),
+            "like reply": lambda: AssistantMessage.objects.filter(conversation=conversation).update(liked=True),
+            "newest page": lambda: ConversationRepository.get_message_page(conversation.id, 50),
+            "conversation list": lambda: list(ConversationRepository.get_conversations(user.id, limit=50)),
+        }
+        if connection.vendor == "postgresql":
+            # JSON containment, served by the GIN index; SQLite doesn't support the lookup.
+            queries["replies using a tool"] = lambda: AssistantMessage.objects.filter(
+                tools_used__contains=["weather"]
+            ).count()
+        results = {name: median_ms(run) for name, run in queries.items()}
+
+        latencies, errors = [], []
+        deadline = time.monotonic() + args.seconds
+
+        def worker():
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                close_old_connections()
+                try:
+                    turn()
+                    latencies.append((time.perf_counter() - started) * 1000)
+                except Exception as e:
+                    errors.append(repr(e))
+                finally:
+                    close_old_connections()
+            connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        latencies.sort()
+        results["turns/s"] = len(latencies) / args.seconds
+        results["turn p50 ms"] = statistics.median(latencies) if latencies else 0
+        results["turn p99 ms"] = latencies[int(len(latencies) * 0.99)] if latencies else 0
+        results["failed turns"] = len(errors)
+    finally:
+        connection.close()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return results
+
+
+if __name__ == "__main__":
+    if args.child:
+        print(json.dumps(benchmark()))
+        sys.exit()
+
+    results = {}
+    for engine in args.engines:
+        print(f"Running {engine} ...", flush=True)
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", *sys.argv[1:]],
+            cwd=BACKEND_DIR,
+            env={**os.environ, "DB_ENGINE": engine, "ALLOWED_HOSTS": os.environ.get("ALLOWED_HOSTS", "*")},
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[engine] = json.loads(output.splitlines()[-1])
+
+    print(f"\n{args.turns} turn conversation, {args.threads} threads for {args.seconds:g}s\n")
+    print(f"{'':<24}" + "".join(f"{engine:>14}" for engine in results))
+    names = dict.fromkeys(name for result in results.values() for name in result)
+    for name in names:
+        print(
+            f"{name:<24}"
+            + "".join(f"{result[name]:>14.2f}" if name in result else f"{'-':>14}" for result in results.values())
+        )
@@ -0,0 +1,245 @@
+"""
+Benchmark for the conversation and message indexes (api migration 0014).
+
+Seeds a separate database with conversations and messages, one of them a very long
+conversation, and times the hot queries as the app runs them, first migrated back to
+0013 (foreign key indexes only) and then migrated forward. Prints the median time spent
+in the database and in total (with building the model instances) for each query, and
+its plan, before and after:
+
+    python testing/bench_indexes.py --messages 1000000 --database /tmp/bench.sqlite3
+
+The database is kept, so later runs skip the seeding.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+from datetime import timedelta
+from contextlib import contextmanager
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--database", default="/tmp/bench_indexes.sqlite3")
+parser.add_argument("--messages", type=int, default=1_000_000)
+parser.add_argument("--users", type=int, default=50)
+parser.add_argument("--turns-per-conversation", type=int, default=50)
+parser.add_argument("--long-turns", type=int, default=25_000)
+parser.add_argument("--repeat", type=int, default=30)
+args = parser.parse_args()
+
+from django.conf import settings
+
+settings.DATABASES["default"]["NAME"] = args.database
+
+import django
+
+django.setup()
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.test.utils import CaptureQueriesContext
+
+from api.models.model import Model
+from api.models.conversation import Conversation
+from api.models.user_message import UserMessage
+from api.models.assistant_message import AssistantMessage
+from api.models.content_variation import ContentVariation
+from api.repositories.conversation_repository import ConversationRepository
+
+BATCH_SIZE = 5000
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Lets bulk_create keep the given created_at values instead of the current time.
+    """
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def seed_conversation(model, conversation, turns, start):
+    now = timezone.now()
+    user_messages = []
+    for turn in range(turns):
+        deleted = random.random() < 0.02
+        user_messages.append(
+            UserMessage(
+                conversation=conversation,
+                content=f"question {turn}",
+                token_count=3,
+                created_at=start + timedelta(seconds=turn * 60),
+                is_deleted=deleted,
+                deleted_at=now - timedelta(hours=random.randint(0, 72)) if deleted else None,
+            )
+        )
+    user_messages = UserMessage.objects.bulk_create(user_messages, batch_size=BATCH_SIZE)
+
+    variations = ContentVariation.objects.bulk_create(
+        [ContentVariation(content=f"answer {turn}", token_count=3) for turn in range(turns)],
+        batch_size=BATCH_SIZE,
+    )
+    assistant_messages = AssistantMessage.objects.bulk_create(
+        [
+            AssistantMessage(
+                conversation=conversation,
+                generated_by=user_message,
+                model=model,
+                provider="ollama",
+                created_at=user_message.created_at + timedelta(seconds=5),
+                is_deleted=user_message.is_deleted,
+                deleted_at=user_message.deleted_at,
+            )
+            for user_message in user_messages
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    AssistantMessage.content_variations.through.objects.bulk_create(
+        [
+            AssistantMessage.content_variations.through(
+                assistantmessage_id=assistant_message.id, contentvariation_id=variation.id
+            )
+            for assistant_message, variation in zip(assistant_messages, variations)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def seed():
+    random.seed(0)
+    start = timezone.now() - timedelta(days=365)
+    model = Model.objects.create(name="bench", model="bench", provider="ollama")
+    users = User.objects.bulk_create(
+        [User(username=f"bench{index}", password="!") for index in range(args.users)]
+    )
+
+    with explicit_timestamps(Conversation, UserMessage, AssistantMessage), transaction.atomic():
+        long_conversation = Conversation.objects.create(
+            user=users[0], title="long", created_at=start
+        )
+        seed_conversation(model, long_conversation, args.long_turns, start)
+
+        turns = args.turns_per_conversation
+        count = max((args.messages - 2 * args.long_turns) // (2 * turns), 1)
+        for index in range(count):
+            created_at = start + timedelta(minutes=index * 50)
+            conversation = Conversation.objects.create(
+                user=users[index % len(users)], title=f"conversation {index}", created_at=created_at
+            )
+            seed_conversation(model, conversation, turns, created_at)
+            if index % 1000 == 0:
+                print(f"  seeded {index}/{count} conversations", flush=True)
+
+
+def median_ms(run):
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def benchmarks():
+    user = User.objects.get(username="bench0")
+    long_id = Conversation.objects.get(title="long").id
+    typical_id = Conversation.objects.exclude(title="long").order_by("created_at").values_list("id", flat=True)[0]
+    cutoff = timezone.now() - timedelta(hours=settings.RECOVERY_HOURS or 24)
+
+    page, next_key = ConversationRepository.get_message_page(long_id, 50)
+
+    # name -> (what the app runs, the main query of it for the plan)
+    return {
+        "history, long conversation": (
+            lambda: ConversationRepository.get_message_history(long_id, 20),
+            ConversationRepository._user_messages(long_id).order_by("-created_at")[:19],
+        ),
+        "newest page, long conversation": (
+            lambda: ConversationRepository.get_message_page(long_id, 50),
+            UserMessage.objects.filter(conversation_id=long_id).order_by("-created_at", "-id")[:51],
+        ),
+        "second page, long conversation": (
+            lambda: ConversationRepository.get_message_page(long_id, 50, next_key),
+            UserMessage.objects.filter(conversation_id=long_id, created_at__lt=next_key[0]).order_by("-created_at", "-id")[:51],
+        ),
+        "detail, typical conversation": (
+            lambda: (
+                list(UserMessage.objects.filter(conversation_id=typical_id)),
+                list(ConversationRepository.get_assistant_messages(typical_id)),
+            ),
+            UserMessage.objects.filter(conversation_id=typical_id),
+        ),
+        "conversation list": (
+            lambda: list(Conversation.objects.filter(user=user).order_by("-created_at", "-id")[:50]),
+            Conversation.objects.filter(user=user).order_by("-created_at", "-id")[:50],
+        ),
+        "deleted past recovery": (
+            lambda: UserMessage.objects.filter(is_deleted=True, deleted_at__lt=cutoff).count(),
+            UserMessage.objects.filter(is_deleted=True, deleted_at__lt=cutoff),
+        ),
+    }
+
+
+def measure():
+    results = {}
+    for name, (run, queryset) in benchmarks().items():
+        # The database's share of the time, without building model instances.
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        statements = [query["sql"] for query in queries.captured_queries]
+
+        def run_sql():
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+                    cursor.fetchall()
+
+        results[name] = (median_ms(run_sql), median_ms(run), queryset.explain())
+    return results
+
+
+if __name__ == "__main__":
+    call_command("migrate", verbosity=0)
+    if not UserMessage.objects.exists():
+        print(f"Seeding {args.database} ...", flush=True)
+        started = time.perf_counter()
+        seed()
+        print(f"Seeded in {time.perf_counter() - started:.0f}s")
+    print(
+        f"{UserMessage.objects.count() + AssistantMessage.objects.count()} messages, "
+        f"{Conversation.objects.count()} conversations"
+    )
+
+    call_command("migrate", "api", "0013", verbosity=0)
+    before = measure()
+
+    started = time.perf_counter()
+    call_command("migrate", verbosity=0)
+    print(f"Migrated forward (building the indexes) in {time.perf_counter() - started:.1f}s\n")
+    after = measure()
+
+    print(f"{'query':<34}{'db ms before':>14}{'after':>9}{'total ms before':>18}{'after':>9}")
+    for name, (db_before, total_before, _) in before.items():
+        db_after, total_after, _ = after[name]
+        print(f"{name:<34}{db_before:>14.2f}{db_after:>9.2f}{total_before:>18.2f}{total_after:>9.2f}")
+
+    for name in before:
+        print(f"\n{name}")
+        for label, plan in (("before", before[name][2]), ("after", after[name][2])):
+            print(f"  {label}:")
+            print("\n".join(f"    {line}" for line in plan.splitlines()))
@@ -0,0 +1,173 @@
+"""
+Benchmark for conversation search (SearchRepository, api migration 0016).
+
+Seeds a scratch test database of the configured engine (DB_ENGINE in settings.py) with
+conversations whose messages are drawn from a vocabulary with a Zipf distribution, like
+natural language, so some words are in most messages and others in a few. The search
+index is filled by its triggers as the rows are inserted. Then times searches by one user
+for rare to very common words, and prints the median time and the number of matches:
+
+    python testing/bench_search.py --messages 1000000
+    DB_ENGINE=postgresql POSTGRES_HOST=localhost python testing/bench_search.py
+
+The database is kept (test_<name> on PostgreSQL, --database on SQLite), so later runs
+skip the seeding; --fresh seeds it again.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--database", default="/tmp/bench_search.sqlite3", help="the SQLite database file")
+parser.add_argument("--messages", type=int, default=1_000_000)
+parser.add_argument("--users", type=int, default=50)
+parser.add_argument("--turns-per-conversation", type=int, default=20)
+parser.add_argument("--vocabulary", type=int, default=20_000)
+parser.add_argument("--repeat", type=int, default=30)
+parser.add_argument("--limit", type=int, default=20)
+parser.add_argument("--fresh", action="store_true")
+args = parser.parse_args()
+
+from django.conf import settings
+
+if settings.DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+    settings.DATABASES["default"]["TEST"] = {"NAME": args.database}
+
+import django
+
+django.setup()
+
+from django.db import connection, transaction
+from django.contrib.auth.models import User
+
+from api.models.model import Model
+from api.models.conversation import Conversation
+from api.models.user_message import UserMessage
+from api.models.assistant_message import AssistantMessage
+from api.models.content_variation import ContentVariation
+from api.repositories.search_repository import SearchRepository
+
+BATCH_SIZE = 5000
+SYLLABLES = ["ka", "lo", "mi", "ten", "ra", "su", "vel", "dor", "an", "pi", "qua", "zen", "ur", "bex"]
+
+
+def vocabulary():
+    # Made-up words, so stemming leaves them alone and each is its own term.
+    words = ("".join(parts) for length in (2, 3, 4) for parts in itertools.product(SYLLABLES, repeat=length))
+    return list(itertools.islice(words, args.vocabulary))
+
+
+def weights():
+    return list(itertools.accumulate(1 / rank for rank in range(1, args.vocabulary + 1)))
+
+
+def sentence(words, cumulative, length):
+    return " ".join(random.choices(words, cum_weights=cumulative, k=length))
+
+
+def seed(words, cumulative):
+    random.seed(0)
+    model = Model.objects.create(name="bench", model="bench", provider="ollama")
+    users = User.objects.bulk_create(
+        [User(username=f"bench{index}", password="!") for index in range(args.users)]
+    )
+
+    turns = args.turns_per_conversation
+    conversations = max(args.messages // (2 * turns), 1)
+    for start in range(0, conversations, 500):
+        with transaction.atomic():
+            batch = Conversation.objects.bulk_create(
+                [
+                    Conversation(user=users[index % len(users)], title=sentence(words, cumulative, 5))
+                    for index in range(start, min(start + 500, conversations))
+                ]
+            )
+            user_messages = UserMessage.objects.bulk_create(
+                [
+                    UserMessage(conversation=conversation, content=sentence(words, cumulative, 20))
+                    for conversation in batch
+                    for _ in range(turns)
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            variations = ContentVariation.objects.bulk_create(
+                [ContentVariation(content=sentence(words, cumulative, 60)) for _ in user_messages],
+                batch_size=BATCH_SIZE,
+            )
+            assistant_messages = AssistantMessage.objects.bulk_create(
+                [
+                    AssistantMessage(
+                        conversation_id=user_message.conversation_id,
+                        generated_by=user_message,
+                        model=model,
+                        provider="ollama",
+                    )
+                    for user_message in user_messages
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            AssistantMessage.content_variations.through.objects.bulk_create(
+                [
+                    AssistantMessage.content_variations.through(
+                        assistantmessage_id=assistant_message.id, contentvariation_id=variation.id
+                    )
+                    for assistant_message, variation in zip(assistant_messages, variations)
+                ],
+                batch_size=BATCH_SIZE,
+            )
+        print(f"  seeded {min(start + 500, conversations)}/{conversations} conversations", flush=True)
+
+
+def median_ms(run):
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def count_matches(user_id, query):
+    return len(SearchRepository.search(user_id, query, 10_000_000))
+
+
+if __name__ == "__main__":
+    old_name = settings.DATABASES["default"]["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=not args.fresh)
+
+    words, cumulative = vocabulary(), weights()
+    if not UserMessage.objects.exists():
+        print(f"Seeding {connection.settings_dict['NAME']} ...", flush=True)
+        started = time.perf_counter()
+        seed(words, cumulative)
+        print(f"Seeded in {time.perf_counter() - started:.0f}s")
+
+    messages = UserMessage.objects.count() + AssistantMessage.objects.count()
+    user_id = User.objects.get(username="bench0").id
+    print(f"{connection.vendor}: {messages} messages, {messages // args.users} per user\n")
+
+    queries = {
+        "rare word": words[5000],
+        "uncommon word": words[500],
+        "common word": words[50],
+        "very common word": words[0],
+        "two words": f"{words[50]} {words[500]}",
+        "no match": "nothingmatchesthis",
+    }
+    print(f"{'query':<20}{'matches':>10}{'median ms':>12}")
+    for name, query in queries.items():
+        matches = count_matches(user_id, query)
+        elapsed = median_ms(lambda: SearchRepository.search(user_id, query, args.limit))
+        print(f"{name:<20}{matches:>10}{elapsed:>12.2f}")
+
+    connection.close()
+    settings.DATABASES["default"]["NAME"] = old_name
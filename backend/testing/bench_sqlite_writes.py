@@ -0,0 +1,153 @@
+"""
+Concurrent write benchmark for the SQLite profiles (SQLITE_PROFILE in settings.py).
+
+Starts worker processes, like the workers of a web server, that each run the writes of
+a streamed chat turn in a loop: save the user message, read the history, save the reply
+with its variations, like it and add a variation. Connections are handled as in a
+request, closed at the end of each turn unless CONN_MAX_AGE keeps them. Reports turns
+per second, turn latency and failed turns ("database is locked") for each profile:
+
+    python testing/bench_sqlite_writes.py --workers 8 --seconds 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+import multiprocessing
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def worker(seconds: float, conversation_id, model_id: int, results):
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+    import django
+
+    django.setup()
+
+    from django.db import OperationalError, close_old_connections, transaction
+    from api.models.user_message import UserMessage
+    from api.models.assistant_message import AssistantMessage
+    from api.models.content_variation import ContentVariation
+    from api.repositories.conversation_repository import ConversationRepository
+    from api.repositories.assistant_message_repository import AssistantMessageRepository
+
+    latencies, errors = [], 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        close_old_connections()
+        try:
+            user_message = UserMessage.objects.create(
+                conversation_id=conversation_id, content="How do I benchmark SQLite?"
+            )
+            ConversationRepository.get_message_history(conversation_id, 20)
+            assistant_message = AssistantMessageRepository.create(
+                conversation_id=conversation_id,
+                generated_by_id=user_message.id,
+                model_id=model_id,
+                provider="ollama",
+                contents=["With concurrent writers." * 20],
+            )
+            AssistantMessage.objects.filter(id=assistant_message.id).update(liked=True)
+            with transaction.atomic():
+                # A read before the write in one transaction, like the reaper and the
+                # content variation views.
+                AssistantMessage.objects.get(id=assistant_message.id)
+                variation = ContentVariation.objects.create(content="Another answer.")
+                assistant_message.content_variations.add(variation)
+            latencies.append((time.perf_counter() - started) * 1000)
+        except OperationalError:
+            errors += 1
+        finally:
+            close_old_connections()
+
+    results.put((latencies, errors))
+
+
+def prepare(profile: str, directory: str) -> tuple:
+    env = {
+        **os.environ,
+        "SQLITE_PROFILE": profile,
+        "SQLITE_PATH": os.path.join(directory, f"{profile}.sqlite3"),
+        "ALLOWED_HOSTS": os.environ.get("ALLOWED_HOSTS", "*"),
+    }
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "--verbosity", "0"],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+    )
+    # The rows every turn writes into, created with the profile's own settings.
+    setup = (
+        "import django; django.setup()\n"
+        "from django.contrib.auth.models import User\n"
+        "from api.models.model import Model\n"
+        "from api.models.conversation import Conversation\n"
+        "user = User.objects.create(username='bench', password='!')\n"
+        "model = Model.objects.create(name='bench', model='bench', provider='ollama')\n"
+        "conversation = Conversation.objects.create(user=user, title='bench')\n"
+        "print(conversation.id, model.id)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", setup],
+        cwd=BACKEND_DIR,
+        env={**env, "DJANGO_SETTINGS_MODULE": "backend.settings"},
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return env, output
+
+
+def run(profile: str, args, directory: str):
+    env, (conversation_id, model_id) = prepare(profile, directory)
+    os.environ.update(env)
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=worker, args=(args.seconds, conversation_id, int(model_id), results)
+        )
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = sorted(latency for worker_latencies, _ in collected for latency in worker_latencies)
+    errors = sum(worker_errors for _, worker_errors in collected)
+    return {
+        "turns/s": len(latencies) / args.seconds,
+        "p50 ms": statistics.median(latencies) if latencies else 0,
+        "p99 ms": latencies[int(len(latencies) * 0.99)] if latencies else 0,
+        "failed": errors,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--profiles", nargs="+", default=["default", "production"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {profile: run(profile, args, directory) for profile in args.profiles}
+
+    print(f"{args.workers} workers, {args.seconds:g}s each\n")
+    print(f"{'profile':<12}{'turns/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'failed':>10}")
+    for profile, result in results.items():
+        print(
+            f"{profile:<12}{result['turns/s']:>10.1f}{result['p50 ms']:>10.1f}"
+            f"{result['p99 ms']:>10.1f}{result['failed']:>10}"
+        )
@@ -0,0 +1,84 @@
+"""
+Query-count regression check for the conversation detail endpoint.
+
+Builds conversations of different lengths (inside a transaction that is rolled back),
+requests each through ConversationDetailView and fails if the number of queries grows
+with the number of messages:
+
+    python testing/check_detail_queries.py --turns 5 50 500
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+from django.db import connection, transaction
+from django.contrib.auth.models import User
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models.model import Model
+from api.models.conversation import Conversation
+from api.models.user_message import UserMessage
+from api.views.conversation import ConversationDetailView
+from api.repositories.assistant_message_repository import AssistantMessageRepository
+
+
+def build_conversation(user: User, model: Model, turns: int) -> Conversation:
+    conversation = Conversation.objects.create(user=user, title=f"{turns} turns")
+    for turn in range(turns):
+        user_message = UserMessage.objects.create(conversation=conversation, content=f"question {turn}")
+        assistant_message = AssistantMessageRepository.create(
+            conversation_id=conversation.id,
+            generated_by_id=user_message.id,
+            model_id=model.id,
+            provider=model.provider,
+            contents=[f"answer {turn}", f"another answer {turn}"],
+        )
+        # Cover the deleted-message placeholders as well.
+        if turn % 10 == 3:
+            user_message.soft_delete()
+            assistant_message.soft_delete()
+    return conversation
+
+
+def count_queries(user: User, conversation: Conversation) -> int:
+    request = APIRequestFactory().get(f"/api/v1/conversations/{conversation.id}/")
+    force_authenticate(request, user=user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = ConversationDetailView.as_view()(request, pk=str(conversation.id))
+        response.render()
+
+    assert response.status_code == 200, response.content
+    return len(queries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[5, 50, 500])
+    args = parser.parse_args()
+
+    counts = {}
+    with transaction.atomic():
+        user = User.objects.create_user(username="query-count-check", password="query-count-check")
+        model = Model.objects.create(name="query-count-check", model="query-count-check", provider="ollama")
+
+        for turns in args.turns:
+            counts[turns] = count_queries(user, build_conversation(user, model, turns))
+            print(f"{turns:>6} turns: {counts[turns]} queries")
+
+        transaction.set_rollback(True)
+
+    if len(set(counts.values())) > 1:
+        print("FAIL: the number of queries depends on the conversation length")
+        sys.exit(1)
+    print("OK")
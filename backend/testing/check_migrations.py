@@ -0,0 +1,46 @@
+"""
+Migration check for the configured database engine (DB_ENGINE in settings.py).
+
+Creates a scratch test database, applies every migration, unapplies the api migrations
+back to zero and applies them again, then checks that the models have no changes
+missing a migration. The scratch database is dropped afterwards. Run it once per engine:
+
+    python testing/check_migrations.py
+    DB_ENGINE=postgresql POSTGRES_HOST=localhost python testing/check_migrations.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.core.management import call_command
+from django.db.migrations.recorder import MigrationRecorder
+
+
+def applied(app_label: str) -> int:
+    return MigrationRecorder(connection).migration_qs.filter(app=app_label).count()
+
+
+if __name__ == "__main__":
+    print(f"{connection.vendor}: creating a scratch database")
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        print(f"  applied, api at {applied('api')} migrations")
+        call_command("migrate", "api", "zero", verbosity=0)
+        print(f"  unapplied, api at {applied('api')} migrations")
+        call_command("migrate", verbosity=0)
+        print(f"  applied again, api at {applied('api')} migrations")
+        call_command("makemigrations", "--check", "--dry-run", verbosity=0)
+        print("  no model changes without a migration")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print("OK")
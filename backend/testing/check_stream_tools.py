@@ -0,0 +1,145 @@
+"""
+Check that a tool-enabled chat streams its first tokens as soon as one without tools
+(OllamaService.chat_stream and chat_stream_async).
+
+Puts a fake client in front of the service, which waits --latency seconds before each
+reply and --token-delay between tokens, and calls a tool only when asked to. Fails unless
+the first token of a tool-enabled turn that uses no tool comes about as soon as that of a
+turn without tools, and a turn that calls a tool streams the answer made with its result:
+
+    python testing/check_stream_tools.py --latency 0.2 --token-delay 0.02
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+from ollama import ChatResponse, Message
+
+from api.services.ollama_service import OllamaService
+from api.services.tool_service import ToolManager, ToolProcessPool
+
+TOOLS = '''
+def weather(city: str) -> str:
+    """Tells the weather in a city."""
+    return f"sunny in {city}"
+'''
+
+
+def replies(messages, tools, tokens):
+    """The chunks of a reply: a tool call if the user asks for one and it has not been made."""
+    if tools and "weather" in messages[-1]["content"]:
+        call = Message.ToolCall(function=Message.ToolCall.Function(name="weather", arguments={"city": "Oslo"}))
+        yield ChatResponse(model="fake", message=Message(role="assistant", content="", tool_calls=[call]))
+        yield ChatResponse(model="fake", done=True, message=Message(role="assistant", content=""))
+        return
+    answer = "sunny" if "sunny in Oslo" in messages[-1]["content"] else "token"
+    for index in range(tokens):
+        yield ChatResponse(model="fake", message=Message(role="assistant", content=f"{answer} "))
+    yield ChatResponse(model="fake", done=True, message=Message(role="assistant", content=""))
+
+
+class FakeClient:
+    def __init__(self, latency, token_delay, tokens):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.tokens = tokens
+
+    def chat(self, model, messages, stream, tools=None, **kwargs):
+        def chunks():
+            time.sleep(self.latency)
+            for chunk in replies(messages, tools, self.tokens):
+                yield chunk
+                time.sleep(self.token_delay)
+        return chunks()
+
+
+class FakeAsyncClient(FakeClient):
+    async def chat(self, model, messages, stream, tools=None, **kwargs):
+        async def chunks():
+            await asyncio.sleep(self.latency)
+            for chunk in replies(messages, tools, self.tokens):
+                yield chunk
+                await asyncio.sleep(self.token_delay)
+        return chunks()
+
+
+def first_token(chunks):
+    """Seconds to the first chunk with content, and the text of the reply."""
+    started = time.perf_counter()
+    ttft, text = None, ""
+    for chunk in chunks:
+        content = chunk.get("message", {}).get("content", "")
+        if content and ttft is None:
+            ttft = time.perf_counter() - started
+        text += content
+    return ttft, text
+
+
+async def first_token_async(chunks):
+    started = time.perf_counter()
+    ttft, text = None, ""
+    async for chunk in chunks:
+        content = chunk.get("message", {}).get("content", "")
+        if content and ttft is None:
+            ttft = time.perf_counter() - started
+        text += content
+    return ttft, text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each reply starts")
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=20)
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tools_dir:
+        Path(tools_dir, "check.py").write_text(TOOLS)
+        # As the server does on start (backend/wsgi.py), so the turns find the schemas loaded.
+        if warming := ToolProcessPool.start(tools_dir):
+            warming.result()
+        service = OllamaService(endpoint="http://localhost:11434")
+        service.tool_manager = ToolManager(tools_dir)
+        service.client = FakeClient(args.latency, args.token_delay, args.tokens)
+        service.async_client = FakeAsyncClient(args.latency, args.token_delay, args.tokens)
+
+        def turns(stream):
+            yield "no tools", stream([{"role": "user", "content": "hello"}], False)
+            yield "tools, none used", stream([{"role": "user", "content": "hello"}], True)
+            yield "tools, one used", stream([{"role": "user", "content": "weather?"}], True)
+
+        def sync_stream(messages, use_tools):
+            return first_token(service.chat_stream("fake", messages, use_tools=use_tools, user_tools=["check"]))
+
+        def async_stream(messages, use_tools):
+            return asyncio.run(first_token_async(service.chat_stream_async("fake", messages, use_tools=use_tools, user_tools=["check"])))
+
+        for name, stream in (("sync", sync_stream), ("async", async_stream)):
+            results = dict(turns(stream))
+            for turn, (ttft, text) in results.items():
+                print(f"{name:6} {turn:18} first token {ttft:.3f}s  {text[:20]!r}")
+
+            baseline = results["no tools"][0]
+            if results["tools, none used"][0] > baseline + args.latency / 2:
+                print(f"FAIL: {name} turn with tools waits for a second request")
+                failed = True
+            if not results["tools, one used"][1].startswith("sunny"):
+                print(f"FAIL: {name} turn that used a tool did not answer with its result")
+                failed = True
+
+    if failed:
+        sys.exit(1)
+    print("OK")
@@ -0,0 +1,104 @@
+"""
+Check that the tool calls of a turn run concurrently (OllamaService.process_tool_calls).
+
+Writes a few tools to a scratch directory, async and sync ones that take --delay seconds,
+one that hangs and one that fails, and has the service run a call to each of them. Fails
+unless the turn takes about as long as the slowest call that finished, or the timeout,
+rather than the sum of the calls, and still reports the results of the others:
+
+    python testing/check_tool_calls.py --calls 6 --delay 0.5 --timeout 1
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from ollama import Message
+
+from api.services.ollama_service import OllamaService
+from api.services.tool_service import ToolManager
+
+TOOLS = '''
+import time
+import asyncio
+
+
+async def fetch_async(city: str) -> str:
+    """Waits, like a request to a web API, then answers."""
+    await asyncio.sleep({delay})
+    return f"async {{city}}"
+
+
+def fetch_sync(city: str) -> str:
+    """Blocks, like a request with a sync client, then answers."""
+    time.sleep({delay})
+    return f"sync {{city}}"
+
+
+async def hang(city: str) -> str:
+    """Never answers in time."""
+    await asyncio.sleep(3600)
+
+
+def fail(city: str) -> str:
+    """Raises."""
+    raise ValueError(f"no data for {{city}}")
+'''
+
+
+def tool_call(name, city):
+    return Message.ToolCall(function=Message.ToolCall.Function(name=name, arguments={"city": city}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=6, help="calls to each of the async and sync tools")
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    args = parser.parse_args()
+
+    settings.TOOL_CALL_CONCURRENCY = 2 * args.calls + 2
+    settings.TOOL_THREADS = args.calls
+    settings.TOOL_PROCESSES = settings.TOOL_CALL_CONCURRENCY
+
+    with tempfile.TemporaryDirectory() as tools_dir:
+        Path(tools_dir, "check.py").write_text(TOOLS.format(delay=args.delay))
+        service = OllamaService(endpoint="http://localhost:11434")
+        service.tool_manager = ToolManager(tools_dir)
+        # Loaded with the default timeout, which covers starting the first tool process.
+        tools = asyncio.run(service.tool_manager.load_tools(["check"]))
+
+        calls = [tool_call(name, f"city {index}") for index in range(args.calls) for name in ("fetch_async", "fetch_sync")]
+        calls += [tool_call("hang", "nowhere"), tool_call("fail", "nowhere")]
+        # Calls to start the tool processes first, which a running server has warm.
+        warm_up = [("fetch_async", {"city": "warm"})] * len(calls)
+        asyncio.run(service.tool_manager.run_tools(warm_up, tools, timeout=60))
+        settings.TOOL_CALL_TIMEOUT = args.timeout
+
+        started = time.perf_counter()
+        results, called_tools = asyncio.run(service.process_tool_calls(calls, tools))
+        elapsed = time.perf_counter() - started
+
+    sequential = 2 * args.calls * args.delay + args.timeout
+    print(f"{len(calls)} calls in {elapsed:.2f}s, {sequential:.2f}s one after another")
+    print(f"{len(called_tools)} results, timed out: {'Timed out' in results}, failed: {'no data for' in results}")
+
+    if len(called_tools) != 2 * args.calls or "Timed out" not in results or "no data for" not in results:
+        print("FAIL: results are missing")
+        sys.exit(1)
+    if elapsed > max(args.delay, args.timeout) + 0.5:
+        print("FAIL: the calls did not run concurrently")
+        sys.exit(1)
+    print("OK")
@@ -0,0 +1,136 @@
+"""
+Check that concurrent tool turns of different users on the one shared OllamaService only
+ever run their own tools (OllamaService.chat_stream and chat_stream_async).
+
+Gives each of two users a tool script with a function of the same name, puts a fake client
+in front of the service that always calls it and answers with the tool's result, and runs
+--turns turns for both users at once, on threads and on one event loop. Fails unless every
+answer is the result of the asking user's own tool:
+
+    python testing/check_tool_isolation.py --turns 20
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from ollama import ChatResponse, Message
+
+from api.services.ollama_service import OllamaService
+from api.services.tool_service import ToolManager
+
+TOOLS = '''
+import time
+
+def secret(name: str) -> str:
+    """Tells the secret of a name."""
+    time.sleep(0.01)
+    return "{user}'s secret"
+'''
+
+USERS = ("alice", "bob")
+
+
+def replies(messages):
+    """The chunks of a reply: a call to `secret`, then an answer made of the tool's result."""
+    if "DATA:" not in messages[-1]["content"]:
+        call = Message.ToolCall(function=Message.ToolCall.Function(name="secret", arguments={"name": "x"}))
+        yield ChatResponse(model="fake", message=Message(role="assistant", content="", tool_calls=[call]))
+    else:
+        answer = messages[-1]["content"].split("Result: ")[-1].strip()
+        yield ChatResponse(model="fake", message=Message(role="assistant", content=answer))
+    yield ChatResponse(model="fake", done=True, message=Message(role="assistant", content=""))
+
+
+def whole(chunks):
+    """The reply of a request that isn't streamed: the chunks' content and tool calls in one."""
+    chunks = list(chunks)
+    return ChatResponse(
+        model="fake",
+        done=True,
+        message=Message(
+            role="assistant",
+            content="".join(chunk.message.content or "" for chunk in chunks),
+            tool_calls=[call for chunk in chunks for call in chunk.message.tool_calls or []] or None,
+        ),
+    )
+
+
+class FakeClient:
+    def chat(self, model, messages, stream, tools=None, **kwargs):
+        return replies(messages) if stream else whole(replies(messages))
+
+
+class FakeAsyncClient:
+    async def chat(self, model, messages, stream, tools=None, **kwargs):
+        if not stream:
+            return whole(replies(messages))
+
+        async def generate():
+            for chunk in replies(messages):
+                await asyncio.sleep(0)
+                yield chunk
+
+        return generate()
+
+
+def answer(chunks):
+    return "".join(chunk["message"]["content"] or "" for chunk in chunks if "message" in chunk)
+
+
+async def answer_async(chunks):
+    return "".join([chunk["message"]["content"] or "" async for chunk in chunks if "message" in chunk])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20, help="turns of each user, at the same time")
+    parser.add_argument("--processes", type=int, default=0, help="TOOL_PROCESSES, 0 to run the tools in this process")
+    args = parser.parse_args()
+
+    settings.TOOL_PROCESSES = args.processes
+    turns = [user for _ in range(args.turns) for user in USERS]
+
+    with tempfile.TemporaryDirectory() as tools_dir:
+        for user in USERS:
+            Path(tools_dir, f"{user}.py").write_text(TOOLS.format(user=user))
+        service = OllamaService(endpoint="http://localhost:11434")
+        service.tool_manager = ToolManager(tools_dir)
+        service.client = FakeClient()
+        service.async_client = FakeAsyncClient()
+
+        def sync_turn(user):
+            return answer(service.chat_stream("fake", [{"role": "user", "content": "?"}], use_tools=True, user_tools=[user]))
+
+        async def async_turns():
+            return await asyncio.gather(*(
+                answer_async(service.chat_stream_async("fake", [{"role": "user", "content": "?"}], use_tools=True, user_tools=[user]))
+                for user in turns
+            ))
+
+        with ThreadPoolExecutor(max_workers=len(turns)) as pool:
+            results = {"sync": list(pool.map(sync_turn, turns)), "async": asyncio.run(async_turns())}
+
+    failed = False
+    for name, answers in results.items():
+        wrong = [(user, text) for user, text in zip(turns, answers) if text != f"{user}'s secret"]
+        print(f"{name:6} {len(answers)} turns, {len(wrong)} answered with another user's tool or none")
+        if wrong:
+            print(f"FAIL: e.g. {wrong[0][0]} got {wrong[0][1]!r}")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("OK")
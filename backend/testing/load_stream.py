@@ -0,0 +1,108 @@
+"""
+Concurrent SSE load test for the chat streaming endpoints.
+
+Opens N streams at once against a running backend and reports how many finished,
+the time to first byte and the total wall time. Compare the WSGI endpoint with the
+ASGI one, e.g.:
+
+    python manage.py runserver 8000
+    python testing/load_stream.py --path chat/stream/ --concurrency 200
+
+    uvicorn backend.asgi:application --port 8000 --workers 2
+    python testing/load_stream.py --path chat/stream/async/ --concurrency 200
+"""
+
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient, base_url: str, username: str, password: str) -> str:
+    response = await client.post(
+        f"{base_url}/api/v1/login/",
+        json={"username": username, "password": password},
+    )
+    response.raise_for_status()
+    return response.json()["token"]
+
+
+async def open_stream(client: httpx.AsyncClient, url: str, token: str, payload: dict):
+    started = time.perf_counter()
+    first_byte = None
+    chunks = 0
+    try:
+        async with client.stream(
+            "POST",
+            url,
+            json=payload,
+            headers={"Authorization": f"Token {token}"},
+        ) as response:
+            if response.status_code != 200:
+                return {"ok": False, "error": f"HTTP {response.status_code}"}
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                chunks += 1
+        return {
+            "ok": True,
+            "ttfb": first_byte,
+            "duration": time.perf_counter() - started,
+            "chunks": chunks,
+        }
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        token = await login(client, args.base_url, args.username, args.password)
+        payload = {
+            "model": args.model,
+            "provider": args.provider,
+            "message": {"role": "user", "content": args.prompt, "images": []},
+        }
+        url = f"{args.base_url}/api/v1/{args.path}"
+
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(open_stream(client, url, token, payload) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    succeeded = [result for result in results if result["ok"]]
+    failed = [result for result in results if not result["ok"]]
+    ttfbs = sorted(result["ttfb"] for result in succeeded if result["ttfb"] is not None)
+
+    report = {
+        "endpoint": url,
+        "concurrency": args.concurrency,
+        "succeeded": len(succeeded),
+        "failed": len(failed),
+        "wall_time_s": round(elapsed, 2),
+        "ttfb_p50_s": round(statistics.median(ttfbs), 3) if ttfbs else None,
+        "ttfb_p95_s": round(ttfbs[int(len(ttfbs) * 0.95) - 1], 3) if ttfbs else None,
+        "errors": sorted({result["error"] for result in failed})[:5],
+    }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="chat/stream/async/")
+    parser.add_argument("--username", default="ethan")
+    parser.add_argument("--password", default="ethan")
+    parser.add_argument("--model", default="llama3.1")
+    parser.add_argument("--provider", default="ollama")
+    parser.add_argument("--prompt", default="How do I write a simple server in C++?")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=300)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_profile_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settings',
+            name='compact_history',
+            field=models.BooleanField(default=False),
+        ),
+    ]
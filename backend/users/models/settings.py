@@ -30,6 +30,8 @@ class Settings(models.Model):
     )
     use_message_history = models.BooleanField(default=True)
     message_history_count = models.IntegerField(default=5)
+    # Send older turns as a rolling summary instead of dropping them.
+    compact_history = models.BooleanField(default=False)
     use_tools = models.BooleanField(default=False)
 
     def __str__(self):
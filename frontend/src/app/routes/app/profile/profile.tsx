@@ -23,6 +23,7 @@ const formSchema = z.object({
   use_message_history: z.boolean(),
   stream_responses: z.boolean(),
   message_history_count: z.number().min(0).max(15),
+  compact_history: z.boolean(),
   preferred_model: z.number(),
   profile_image: z.string().url().optional(),
 });
@@ -56,6 +57,7 @@ export function ProfileRoute() {
       use_message_history: user?.settings.use_message_history,
       stream_responses: user?.settings.stream_responses,
       message_history_count: user?.settings.message_history_count,
+      compact_history: user?.settings.compact_history,
       preferred_model: user?.settings.preferred_model?.id || models?.[0].id,
       profile_image: user?.profile.image,
     },
@@ -75,6 +77,7 @@ export function ProfileRoute() {
           [
             "use_message_history",
             "message_history_count",
+            "compact_history",
             "preferred_model",
             "stream_responses",
           ].includes(key)
@@ -266,6 +269,23 @@ export function ProfileRoute() {
                 Current value: {watch("message_history_count")}
               </p>
             </div>
+
+            <div className="space-y-2">
+              <div className="flex items-center space-x-2">
+                <Controller
+                  name="compact_history"
+                  control={control}
+                  render={({ field }) => (
+                    <Switch
+                      checked={field.value}
+                      onCheckedChange={field.onChange}
+                      id="compact_history"
+                    />
+                  )}
+                />
+                <Label htmlFor="compact_history">Summarize Older Messages</Label>
+              </div>
+            </div>
           </div>
 
           <Button type="submit">Update Profile</Button>
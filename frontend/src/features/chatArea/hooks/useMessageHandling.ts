@@ -78,7 +78,13 @@ export function useMessageHandling({
         Authorization: `Token ${localStorage.getItem("token")}`,
         "Content-Type": "application/json",
       },
-      body: JSON.stringify(payload),
+      // Let the backend store the reply when the stream ends.
+      body: JSON.stringify({
+        ...payload,
+        persist: true,
+        generated_by: newUserMessage.id,
+        model_id: model?.id,
+      }),
       credentials: "include",
     });
 
@@ -86,6 +92,7 @@ export function useMessageHandling({
 
     let accumulatedContent = "";
     let tools_used: any = null;
+    let saved: { assistant_message: number; content_variations: number[] } | null = null;
 
     const reader = response.body?.getReader();
     while (true) {
@@ -96,11 +103,16 @@ export function useMessageHandling({
       const lines = decoded.split("\n");
 
       for (const line of lines) {
-        if (line.trim()) {
+        if (line.startsWith("data: ")) {
           try {
             const data = JSON.parse(line.slice(6));
             if (data.message?.error) throw new Error(data.message.error);
 
+            if (data.saved) {
+              saved = data.saved;
+              continue;
+            }
+
             if (data.message?.content) {
               accumulatedContent += data.message.content;
               tools_used ??= data.tools_used;
@@ -142,22 +154,46 @@ export function useMessageHandling({
       }
     }
 
-    const assistantPostData = await createAssistantMessage({
-      data: {
-        conversation: currentChatId,
-        content_variations: [accumulatedContent],
-        model: model?.id || -1,
-        provider: model?.provider || "ollama",
-        generated_by: newUserMessage.id,
-        tools_used,
-      },
-    });
+    const finalAssistantMessage: AssistantMessage = saved
+      ? {
+          id: String(saved.assistant_message),
+          created_at: new Date().toISOString(),
+          content_variations: [
+            { id: saved.content_variations[0], content: accumulatedContent },
+          ],
+          generated_by: newUserMessage,
+          conversation: currentChatId,
+          model: model || {
+            id: -1,
+            name: "",
+            model: "",
+            liked: false,
+            provider: "",
+            color: "gray",
+          },
+          provider: model?.provider || "",
+          liked: false,
+          type: "assistant",
+          is_deleted: false,
+          deleted_at: "",
+          recoverable: false,
+          tools_used,
+        }
+      : {
+          ...(await createAssistantMessage({
+            data: {
+              conversation: currentChatId,
+              content_variations: [accumulatedContent],
+              model: model?.id || -1,
+              provider: model?.provider || "ollama",
+              generated_by: newUserMessage.id,
+              tools_used,
+            },
+          })),
+          type: "assistant",
+        };
+
 
-    const finalAssistantMessage: AssistantMessage = {
-      ...assistantPostData,
-      type: "assistant",
-    };
-    
     setMessages((prevMessages) =>
       prevMessages[prevMessages.length - 1]?.id === "temp"
         ? [...prevMessages.slice(0, -1), finalAssistantMessage]
@@ -127,7 +127,7 @@ const GenerateNewMessageButton: React.FC<{
           const lines = decoded.split("\n");
 
           for (const line of lines) {
-            if (line.trim()) {
+            if (line.startsWith("data: ")) {
               try {
                 const jsonStr = line.slice(6); // Remove "data: " prefix
                 const data = JSON.parse(jsonStr);
@@ -35,6 +35,7 @@ import React, {
       theme: "light",
       use_message_history: true,
       message_history_count: 5,
+      compact_history: false,
       use_tools: false
     },
   };
@@ -64,6 +64,7 @@ export type Settings = {
     theme: string;
     use_message_history: boolean;
     message_history_count: number;
+    compact_history: boolean;
     use_tools: boolean;
 }
 